@@ -28,14 +28,9 @@
 from PyQt5.QtWidgets import QAction, QActionGroup
 from PyQt5.QtGui import QKeySequence
 
-try:
-    import matplotlib.figure as matplotlib_figure
-except ImportError:
-    matplotlib_figure = None
-
 from icons import Icon
 from lib.attrdict import AttrDict
-from lib.dependencies import get_enchant_version
+from lib.dependencies import is_installed
 
 
 class Action(QAction):
@@ -362,6 +357,18 @@ class MainWindowActions(AttrDict):
                                   statustip='Indicates frozen cells with a '
                                             'background crosshatch')
 
+        self.toggle_cell_profiler = \
+            Action(self.parent, "Profile cell evaluation",
+                   self.parent.on_toggle_cell_profiler, checkable=True,
+                   statustip='Record evaluation count, time and result size '
+                             'of each cell')
+
+        self.show_cell_profile = \
+            Action(self.parent, "Slowest cells...",
+                   self.parent.on_show_cell_profile,
+                   statustip='Show cells that take the longest time to '
+                             'evaluate')
+
     def create_format_actions(self):
         """actions for Format menu"""
 
@@ -436,7 +443,7 @@ class MainWindowActions(AttrDict):
                             statustip='Show cell results as image. A numpy '
                                       'array of shape (x, y, 3) '
                                       'is expected')
-        if matplotlib_figure is not None:
+        if is_installed("matplotlib"):
             self.matplotlib = \
                 Action(self.parent, "Matplotlib chart renderer",
                        self.parent.grid.on_matplotlib_renderer_pressed,
@@ -449,7 +456,7 @@ class MainWindowActions(AttrDict):
         renderer_group.addAction(self.text)
         renderer_group.addAction(self.markup)
         renderer_group.addAction(self.image)
-        if matplotlib_figure is not None:
+        if is_installed("matplotlib"):
             renderer_group.addAction(self.matplotlib)
 
         self.text_color = Action(
@@ -738,7 +745,7 @@ class MainWindowActions(AttrDict):
     def disable_unavailable(self):
         """Disables unavailable menu items e.g. due to missing dependencies"""
 
-        if get_enchant_version() is None:
+        if not is_installed("enchant"):
             self.toggle_spell_checker.setEnabled(False)
 
 
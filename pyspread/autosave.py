@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+Autosave of recovery files in the background
+
+Recovery files are uncompressed pysu files in the pyspread recovery
+directory. There are up to `settings.autosave_files` rotating recovery files
+for each pyspread file. The newest recovery file has the number 0.
+
+Untitled workbooks that have never been saved get recovery files with a name
+that is unique for each session. Recovery files of untitled workbooks of
+sessions that have ended are offered at startup.
+
+**Provides**
+
+* :func:`recovery_paths`: Paths of recovery files for a pyspread file
+* :func:`remove_recovery_files`: Removes recovery files of a pyspread file
+* :func:`untitled_recovery_paths`: Recovery files of ended sessions
+* :func:`adopt_recovery_files`: Moves recovery files to this session
+* :func:`discard_recovery_files`: Removes recovery files of a recovery file
+* :func:`snapshot`: Copy of a code_array that is used for saving
+* :class:`AutosaveThread`: Writes snapshot to recovery file
+
+"""
+
+from glob import escape
+from hashlib import blake2b
+import os
+from pathlib import Path
+import re
+from shutil import move
+from tempfile import NamedTemporaryFile
+from time import time
+
+from PyQt5.QtCore import QThread, QStandardPaths, pyqtSignal
+
+from __init__ import APP_NAME
+from interfaces.pys import PysWriter
+from lib.hashing import StreamSigner
+from model.model import DataArray
+
+
+# Recovery file name stem of untitled workbooks of this session
+UNTITLED_NAME = "untitled-{}-{}".format(os.getpid(), int(time()))
+
+
+def recovery_directory():
+    """Returns directory of recovery files"""
+
+    data_location = \
+        QStandardPaths.writableLocation(QStandardPaths.GenericDataLocation)
+    return Path(data_location) / APP_NAME / "recovery"
+
+
+def _recovery_name(filepath):
+    """Returns recovery file name stem for pyspread file filepath
+
+    The name contains a hash of the path so that files with equal names in
+    different directories do not share recovery files. Paths without suffix
+    denote untitled workbooks, see :meth:`Workflows.file_save`.
+
+    """
+
+    if filepath is None or not filepath.suffix:
+        return UNTITLED_NAME
+
+    path_hash = blake2b(bytes(str(filepath.absolute()), "utf-8"),
+                        digest_size=8).hexdigest()
+    return "{}-{}".format(filepath.stem, path_hash)
+
+
+def recovery_paths(filepath, number):
+    """Returns paths of recovery files for filepath, newest file first
+
+    :param filepath: Path of pyspread file, None or home for new files
+    :type filepath: pathlib.Path
+    :param number: Number of rotating recovery files
+    :type number: int
+
+    """
+
+    directory = recovery_directory()
+    name = _recovery_name(filepath)
+
+    return [directory / "{}.{}.pysu".format(name, i) for i in range(number)]
+
+
+def remove_recovery_files(filepath):
+    """Removes all recovery files and their signatures for filepath
+
+    :param filepath: Path of pyspread file, None or home for new files
+    :type filepath: pathlib.Path
+
+    """
+
+    _remove_recovery_files(_recovery_name(filepath))
+
+
+def _remove_recovery_files(name):
+    """Removes all recovery files and their signatures with name stem name"""
+
+    directory = recovery_directory()
+    pattern = "{}.*.pysu*".format(escape(name))
+
+    for path in directory.glob(pattern):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _is_running(pid):
+    """Returns True if a process with pid may be running
+
+    Processes can only be checked on POSIX systems. Elsewhere, they are
+    considered as not running.
+
+    """
+
+    if os.name != "posix":
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # E.g. process of another user
+    return True
+
+
+def untitled_recovery_paths():
+    """Returns newest recovery files of untitled workbooks, newest first
+
+    Recovery files of this session and of running sessions are omitted.
+
+    """
+
+    paths = []
+    for path in recovery_directory().glob("untitled-*-*.0.pysu"):
+        name = path.name.split(".")[0]
+        match = re.fullmatch(r"untitled-(\d+)-\d+", name)
+        if match is None:
+            continue  # Recovery file of a saved file with a similar name
+        if name == UNTITLED_NAME or _is_running(int(match.group(1))):
+            continue
+        try:
+            paths.append((path.stat().st_mtime, path))
+        except OSError:
+            pass
+
+    return [path for _, path in sorted(paths, reverse=True)]
+
+
+def discard_recovery_files(recovery_path):
+    """Removes recovery_path and the other recovery files of its workbook
+
+    :param recovery_path: Recovery file
+    :type recovery_path: pathlib.Path
+
+    """
+
+    _remove_recovery_files(recovery_path.name.split(".")[0])
+
+
+def adopt_recovery_files(recovery_path):
+    """Moves recovery files of an untitled workbook to this session
+
+    The files become the recovery files of the untitled workbook of this
+    session so that they are rotated by autosave and removed on save.
+    Returns the new path of recovery_path.
+
+    :param recovery_path: Newest recovery file of an untitled workbook
+    :type recovery_path: pathlib.Path
+
+    """
+
+    name = recovery_path.name.split(".")[0]
+
+    _remove_recovery_files(UNTITLED_NAME)
+
+    for path in recovery_path.parent.glob("{}.*.pysu*".format(escape(name))):
+        new_name = UNTITLED_NAME + path.name[len(name):]
+        move(str(path), str(path.with_name(new_name)))
+
+    suffixes = recovery_path.name[len(name):]
+    return recovery_path.with_name(UNTITLED_NAME + suffixes)
+
+
+def snapshot(code_array):
+    """Returns a copy of the code_array data that can be saved in a thread
+
+    Cell code strings are shared. Tables that have not been loaded lazily
+    yet are copied as compressed chunks and loaded when the copy is saved.
+
+    :param code_array: Code array to be copied
+    :type code_array: model.model.DataArray
+
+    """
+
+    code_array_copy = DataArray(code_array.shape, code_array.settings)
+
+    dict_grid = code_array.dict_grid
+    dict_grid_copy = code_array_copy.dict_grid
+
+    # dict.items does not load the unloaded tables
+    dict.update(dict_grid_copy, dict.items(dict_grid))
+    if dict_grid.unloaded_tables:
+        dict_grid_copy.unloaded_tables.update(dict_grid.unloaded_tables)
+        dict_grid_copy.table_loader = \
+            dict_grid.table_loader.copy(code_array_copy)
+
+    # Attribute dicts are copied because PysWriter merges them
+    code_array_copy.cell_attributes.extend((selection, table, dict(attrs))
+                                           for selection, table, attrs
+                                           in code_array.cell_attributes)
+
+    code_array_copy.row_heights.update(code_array.row_heights)
+    code_array_copy.col_widths.update(code_array.col_widths)
+    code_array_copy.macros = code_array.macros
+
+    return code_array_copy
+
+
+class AutosaveThread(QThread):
+    """Writes a code_array snapshot to the newest recovery file
+
+    Older recovery files are rotated.
+
+    :param parent: Parent object
+    :type parent: QObject
+    :param code_array: Snapshot that is not changed while saving
+    :type code_array: model.model.DataArray
+    :param paths: Recovery file paths, newest first
+    :type paths: list of pathlib.Path
+    :param signature_key: Key for signing recovery file, None for no signing
+    :type signature_key: bytes or str
+
+    """
+
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent, code_array, paths, signature_key=None):
+        super().__init__(parent)
+
+        self.code_array = code_array
+        self.paths = paths
+        self.signature_key = signature_key
+
+    def run(self):
+        """Saves the recovery file, emits failed on error"""
+
+        try:
+            self._save()
+        except (OSError, ValueError) as err:
+            self.failed.emit(str(err))
+
+    def _save(self):
+        """Saves recovery file and its signature"""
+
+        if not self.paths:
+            return
+
+        directory = self.paths[0].parent
+        directory.mkdir(parents=True, exist_ok=True)
+
+        signer = None
+        if self.signature_key:
+            signer = StreamSigner(self.signature_key)
+
+        with NamedTemporaryFile(dir=str(directory), delete=False) as tempfile:
+            try:
+                for line in PysWriter(self.code_array):
+                    line = bytes(line, "utf-8")
+                    tempfile.write(line)
+                    if signer is not None:
+                        signer.update(line)
+            except (OSError, ValueError):
+                tempfile.close()
+                os.remove(tempfile.name)
+                raise
+
+        # Rotate older recovery files
+        for newer, older in reversed(list(zip(self.paths, self.paths[1:]))):
+            for suffix in ("", ".sig"):
+                newer_path = Path(str(newer) + suffix)
+                older_path = Path(str(older) + suffix)
+                if newer_path.exists():
+                    move(str(newer_path), str(older_path))
+                elif older_path.exists():
+                    older_path.unlink()
+
+        move(tempfile.name, str(self.paths[0]))
+
+        signature_path = Path(str(self.paths[0]) + ".sig")
+        if signer is None:
+            if signature_path.exists():
+                signature_path.unlink()
+        else:
+            with open(signature_path, "wb") as signature_file:
+                signature_file.write(signer.signature())
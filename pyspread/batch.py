@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+Headless batch evaluation of pyspread files
+
+The module loads a pys, pysu or pysb file including its save journal,
+executes the macros, evaluates a region of a table and writes the results
+to a csv, json, npy or npz file. No Qt widgets are imported.
+
+Only files that are signed with the signature key are evaluated unless
+the option --unsigned is given. The key is taken from the pyspread
+settings unless the environment variable PYSPREAD_SIGNATURE_KEY provides
+the repr of the key bytes.
+
+Example::
+
+    python3 pyspread/batch.py workbook.pysu results.csv --table 1
+
+**Provides**
+
+* :class:`BatchSettings`: Settings for the model
+* :class:`BatchArgumentParser`: Parser for the command line
+* :func:`load`: Loads a pyspread file into a code array
+* :func:`evaluate`: Evaluates a region of a code array
+* :func:`write`: Writes results to file
+* :func:`main`: Runs a batch evaluation
+
+"""
+
+from argparse import ArgumentParser
+import bz2
+import csv
+import json
+import os
+from pathlib import Path
+import sys
+
+import numpy
+
+from __init__ import APP_NAME, VERSION
+from interfaces.journal import JournalReader, journal_path
+from interfaces.npy import save_npy, save_npz
+from interfaces.pys import PysReader
+from interfaces.pysb import PysbReader
+from lib.hashing import verify_stream
+from model.model import CodeArray
+
+OUTPUT_SUFFIXES = [".csv", ".json", ".npy", ".npz"]
+
+
+class BatchSettings:
+    """Settings that are used by the model"""
+
+    # Timeout for cell calculations, as in settings.Settings
+    timeout = 1000
+
+
+class BatchArgumentParser(ArgumentParser):
+    """Parser for the batch command line"""
+
+    def __init__(self):
+        description = "Evaluates a pyspread file without GUI and writes " \
+                      "the results of a table region to a csv, json, npy " \
+                      "or npz file."
+
+        super().__init__(prog="{} batch".format(APP_NAME),
+                         description=description)
+
+        self.add_argument('--version', action='version', version=VERSION)
+        self.add_argument('file', type=Path,
+                          help='pyspread file in pys, pysu or pysb format')
+        self.add_argument('output', type=Path,
+                          help='output file, format is chosen by suffix: '
+                               + ", ".join(OUTPUT_SUFFIXES))
+        self.add_argument('--table', type=int, default=0,
+                          help='table that is evaluated, defaults to 0')
+        self.add_argument('--region', type=int, nargs=4,
+                          metavar=('TOP', 'LEFT', 'BOTTOM', 'RIGHT'),
+                          help='cell region that is evaluated, defaults to '
+                               'all cells of the table')
+        self.add_argument('--unsigned', action='store_true',
+                          help='evaluate files without valid signature')
+
+    def parse_args(self, *args, **kwargs):
+        """Parses arguments and checks output suffix and region"""
+
+        args = super().parse_args(*args, **kwargs)
+
+        if args.output.suffix not in OUTPUT_SUFFIXES:
+            self.error("output suffix must be one of "
+                       + ", ".join(OUTPUT_SUFFIXES))
+
+        if args.region is not None:
+            top, left, bottom, right = args.region
+            if not 0 <= top <= bottom or not 0 <= left <= right:
+                self.error("region must be non-empty and non-negative")
+
+        return args
+
+
+def get_signature_key():
+    """Returns signature key from environment or pyspread settings"""
+
+    try:
+        return os.environ["PYSPREAD_SIGNATURE_KEY"]
+    except KeyError:
+        pass
+
+    try:
+        from PyQt5.QtCore import QSettings
+    except ImportError:
+        return
+
+    return QSettings(APP_NAME, APP_NAME).value("signature_key")
+
+
+def is_signed(filepath, signature_key):
+    """Returns signature of filepath if it is valid for signature_key
+
+    :param filepath: Path of pyspread file
+    :type filepath: pathlib.Path
+    :param signature_key: Signature key
+    :type signature_key: str
+
+    """
+
+    if not signature_key:
+        return
+
+    signature_path = filepath.with_suffix(filepath.suffix + '.sig')
+    try:
+        with open(filepath, "rb") as infile, \
+                open(signature_path, "rb") as sigfile:
+            signature = sigfile.read()
+            if verify_stream(infile, signature, signature_key):
+                return signature
+    except (OSError, ValueError):
+        return
+
+
+def load(filepath, signature_key=None, unsigned=False):
+    """Returns code array with pyspread file and its save journal
+
+    :param filepath: Path of pyspread file
+    :type filepath: pathlib.Path
+    :param signature_key: Key for verifying the file's signature
+    :type signature_key: str
+    :param unsigned: If True then files without valid signature are loaded
+    :type unsigned: bool
+    :raises ValueError: If the file is not signed and unsigned is False
+
+    """
+
+    signature = is_signed(filepath, signature_key)
+    if signature is None and not unsigned:
+        msg = "{} has no valid signature. Use --unsigned to evaluate it."
+        raise ValueError(msg.format(filepath))
+
+    code_array = CodeArray((1, 1, 1), BatchSettings())
+
+    if filepath.suffix == ".pysb":
+        reader_class = PysbReader
+    else:
+        reader_class = PysReader
+
+    fopen = bz2.open if filepath.suffix == ".pys" else open
+
+    with fopen(filepath, "rb") as infile:
+        for _ in reader_class(infile, code_array):
+            pass
+
+    try:
+        with open(journal_path(filepath), "rb") as journal_file:
+            reader = JournalReader(journal_file, code_array,
+                                   signature or b"", signature_key,
+                                   verify=signature is not None)
+            for _ in reader:
+                pass
+    except FileNotFoundError:
+        return code_array
+
+    if not reader.verified and signature is not None:
+        sys.stderr.write("Save journal entries with invalid signature "
+                         "ignored.\n")
+
+    return code_array
+
+
+def evaluate(code_array, table=0, region=None):
+    """Executes macros and returns results of region as nested list
+
+    :param code_array: Code array with loaded file
+    :type code_array: model.model.CodeArray
+    :param table: Table that is evaluated
+    :type table: int
+    :param region: top, left, bottom, right, None for all cells of table
+    :type region: tuple of 4 int
+
+    """
+
+    rows, columns, tables = code_array.shape
+    if not 0 <= table < tables:
+        raise ValueError("Table {} not in grid shape {}.".format(
+            table, code_array.shape))
+
+    _, errors = code_array.execute_macros()
+    if errors:
+        sys.stderr.write(errors)
+
+    if region is None:
+        bottom, right, _ = code_array.get_last_filled_cell(table)
+        region = 0, 0, bottom, right
+
+    top, left, bottom, right = region
+    bottom = min(bottom, rows - 1)
+    right = min(right, columns - 1)
+
+    return [list(row) for row in code_array[top: bottom + 1,
+                                            left: right + 1, table]]
+
+
+def _json_default(obj):
+    """Returns json serializable representation of cell results"""
+
+    if isinstance(obj, numpy.ndarray):
+        return obj.tolist()
+    if isinstance(obj, numpy.generic):
+        return obj.item()
+
+    return repr(obj)
+
+
+def write(filepath, results, first_column=0):
+    """Writes results to filepath in the format given by its suffix
+
+    :param filepath: Path of output file
+    :type filepath: pathlib.Path
+    :param results: Cell results, None for empty cells
+    :type results: list of lists
+    :param first_column: Grid column of the first column of results
+    :type first_column: int
+
+    """
+
+    if filepath.suffix == ".csv":
+        with open(filepath, "w", newline='') as csvfile:
+            csv.writer(csvfile).writerows(results)
+
+    elif filepath.suffix == ".json":
+        with open(filepath, "w") as jsonfile:
+            json.dump(results, jsonfile, default=_json_default)
+
+    elif filepath.suffix == ".npy":
+        with open(filepath, "wb") as npy_file:
+            save_npy(npy_file, results)
+
+    elif filepath.suffix == ".npz":
+        with open(filepath, "wb") as npz_file:
+            save_npz(npz_file, results, first_column)
+
+    else:
+        raise ValueError("Unsupported output format {}".format(
+            filepath.suffix))
+
+
+def main(args=None):
+    """Runs a batch evaluation, returns exit status
+
+    :param args: Command line arguments, sys.argv[1:] if None
+    :type args: list of str
+
+    """
+
+    args = BatchArgumentParser().parse_args(args)
+
+    try:
+        code_array = load(args.file, get_signature_key(), args.unsigned)
+        results = evaluate(code_array, args.table, args.region)
+        first_column = 0 if args.region is None else args.region[1]
+        write(args.output, results, first_column)
+    except (OSError, ValueError) as error:
+        sys.stderr.write("error: {}\n".format(error))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -56,13 +56,23 @@ class ArgumentParser(ArgumentParser):
                       "Python."
 
         # Override usage because of the PathAction fix for paths with spaces
-        usage = "{} [-h] [--version] [file]".format(APP_NAME)
+        usage = "{} [-h] [--version] [--startup-time] " \
+                "[--profile-startup REPORT [--profile-stats STATS]] " \
+                "[file]".format(APP_NAME)
 
         super().__init__(prog=APP_NAME, description=description, usage=usage)
 
         self.add_argument('--version', action='version', version=VERSION)
+        self.add_argument('--startup-time', action='store_true',
+                          help='print durations of startup phases to stderr')
+        self.add_argument('--profile-startup', metavar='REPORT', type=Path,
+                          help='write durations of startup phases as JSON to '
+                               'REPORT')
+        self.add_argument('--profile-stats', metavar='STATS', type=Path,
+                          help='write cProfile statistics of the main window '
+                               'startup to STATS, requires --profile-startup')
         self.add_argument('file', action=PathAction, nargs="*",
-                          help='open pyspread file in pys or pysu format')
+                          help='open pyspread file in pys, pysu or pysb format')
 
     def check_mandatory_dependencies(self):
         """Checks mandatory dependencies and exits if they are not met"""
@@ -25,6 +25,7 @@ Pyspread undoable commands
 
 * :class:`SetGridSize`
 * :class:`SetCellCode`
+* :class:`SetCellCodeBlock`
 * :class:`SetCellFormat`
 * :class:`SetCellMerge`
 * :class:`SetCellRenderer`
@@ -130,6 +131,51 @@ class SetCellCode(QUndoCommand):
         self.model.dataChanged.emit(QModelIndex(), QModelIndex())
 
 
+class SetCellCodeBlock(QUndoCommand):
+    """Sets cell code of a block of cells in grid in one model operation
+
+    block is a list of rows of cell code, key is the top left cell.
+    In contrast to merged :class:`SetCellCode` commands, only the code of
+    cells that have been occupied before is stored for undo.
+
+    """
+
+    def __init__(self, block, model, key, description):
+        super().__init__(description)
+
+        self.block = block
+        self.model = model
+        self.key = key
+        self.old_codes = {}
+
+    def _set_block(self, block):
+        """Sets block in code_array and emits one dataChanged for it"""
+
+        row, column, _ = self.key
+        rows, columns, _ = self.model.shape
+
+        with self.model.main_window.entry_line.disable_highlighter():
+            old_codes = self.model.code_array.set_code_block(self.key, block)
+
+        bottom = min(row + len(self.block), rows) - 1
+        right = min(column + max(map(len, self.block), default=0),
+                    columns) - 1
+        self.model.dataChanged.emit(self.model.index(row, column),
+                                    self.model.index(bottom, right))
+
+        return old_codes
+
+    def redo(self):
+        self.old_codes = self._set_block(self.block)
+
+    def undo(self):
+        row, column, table = self.key
+        old_block = ([self.old_codes.get((row + i, column + j, table))
+                      for j in range(len(line))]
+                     for i, line in enumerate(self.block))
+        self._set_block(old_block)
+
+
 class SetRowsHeight(QUndoCommand):
     """Sets rows height in grid"""
 
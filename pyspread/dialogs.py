@@ -35,10 +35,12 @@
  * :class:`FileSaveDialog`
  * :class:`ImageFileOpenDialog`
  * :class:`CsvFileImportDialog`
+ * :class:`CellProfileExportDialog`
  * :class:`FindDialog`
  * :class:`ChartDialog`
  * :class:`CsvImportDialog`
  * :class:`CsvExportDialog`
+ * :class:`CellProfileDialog`
  * (:class:`HelpDialogBase`)
  * :class:`TutorialDialog`
  * :class:`ManualDialog`
@@ -52,6 +54,7 @@ except ImportError:
     from pyspread.lib.dataclasses import dataclass  # Python 3.6 compatibility
 from functools import partial
 import io
+from pathlib import Path
 
 from PyQt5.QtCore import Qt, QPoint, QSize
 from PyQt5.QtWidgets \
@@ -59,24 +62,19 @@ from PyQt5.QtWidgets \
             QFormLayout, QVBoxLayout, QGroupBox, QDialogButtonBox, QSplitter,
             QTextBrowser, QCheckBox, QGridLayout, QLayout, QHBoxLayout,
             QPushButton, QWidget, QComboBox, QTableView, QAbstractItemView,
-            QPlainTextEdit, QToolBar)
+            QPlainTextEdit, QToolBar, QTableWidget, QTableWidgetItem)
 from PyQt5.QtGui \
     import (QIntValidator, QImageWriter, QStandardItemModel, QStandardItem,
             QTextDocument)
 
 from PyQt5.QtPrintSupport import QPrintPreviewDialog, QPrintPreviewWidget
 
-try:
-    from matplotlib.figure import Figure
-    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
-except ImportError:
-    Figure = None
-
 from actions import ChartDialogActions
 from toolbar import ChartTemplatesToolBar
 from icons import PYSPREAD_PATH
-from lib.csv import sniff, csv_reader, get_header, typehandlers, convert
-from lib.markdown2 import markdown
+from lib.csv import (sniff, csv_reader, get_header, typehandlers, convert,
+                     infer_digest_types)
+from lib.dependencies import is_installed
 from lib.spelltextedit import SpellTextEdit
 from lib.testlib import unit_test_dialog_override
 from settings import TUTORIAL_PATH, MANUAL_PATH
@@ -367,6 +365,12 @@ class SvgExportAreaDialog(PrintAreaDialog):
     groupbox_title = "SVG export area"
 
 
+class NpyExportAreaDialog(PrintAreaDialog):
+    """Modal dialog for entering npy export area"""
+
+    groupbox_title = "NumPy export area"
+
+
 class PreferencesDialog(DataEntryDialog):
     """Modal dialog for entering pyspread preferences"""
 
@@ -374,14 +378,19 @@ class PreferencesDialog(DataEntryDialog):
         title = "Preferences"
         groupbox_title = "Global settings"
         labels = ["Signature key for files", "Cell calculation timeout [ms]",
-                  "Frozen cell refresh period [ms]", "Number of recent files"]
+                  "Frozen cell refresh period [ms]", "Number of recent files",
+                  "Save journal size [MB], 0 disables journal",
+                  "Autosave interval [s], 0 disables autosave",
+                  "Number of recovery files"]
         self.keys = ["signature_key", "timeout", "refresh_timeout",
-                     "max_file_history"]
-        self.mappers = [str, int, int, int]
+                     "max_file_history", "journal_size", "autosave_interval",
+                     "autosave_files"]
+        self.mappers = [str, int, int, int, int, int, int]
         data = [getattr(parent.settings, key) for key in self.keys]
         validator = QIntValidator()
         validator.setBottom(0)  # Do not allow negative values
-        validators = [None, validator, validator, validator]
+        validators = [None, validator, validator, validator, validator,
+                      validator, validator]
         super().__init__(parent, title, labels, data, groupbox_title,
                          validators)
 
@@ -462,8 +471,10 @@ class FileDialogBase:
 
     filters_list = [
         "Pyspread un-compressed (*.pysu)",
-        "Pyspread compressed (*.pys)"
+        "Pyspread compressed (*.pys)",
+        "Pyspread binary (*.pysb)",
     ]
+    suffixes = [".pysu", ".pys", ".pysb"]
     selected_filter = None
 
     @property
@@ -476,10 +487,7 @@ class FileDialogBase:
     def suffix(self):
         """Suffix for filepath"""
 
-        if self.filters_list.index(self.selected_filter):
-            return ".pys"
-        else:
-            return ".pysu"
+        return self.suffixes[self.filters_list.index(self.selected_filter)]
 
     def __init__(self, main_window):
 
@@ -553,6 +561,7 @@ class CsvFileImportDialog(FileDialogBase):
     title = "Import data"
     filters_list = [
         "CSV file (*.*)",
+        "NumPy array (*.npy)",
     ]
 
     @property
@@ -578,16 +587,30 @@ class CsvFileExportDialog(FileDialogBase):
     filters_list = [
         "CSV file (*.*)",
         "SVG file (*.svg)",
+        "NumPy array (*.npy)",
+        "NumPy arrays per column (*.npz)",
     ]
+    suffixes = [None, ".svg", ".npy", ".npz"]
 
-    @property
-    def suffix(self):
-        """Suffix for filepath"""
+    def show_dialog(self):
+        """Present dialog and update values"""
 
-        if self.filters_list.index(self.selected_filter):
-            return ".svg"
-        else:
-            return
+        path = self.main_window.settings.last_file_output_path
+        self.file_path, self.selected_filter = \
+            QFileDialog.getSaveFileName(self.main_window, self.title,
+                                        str(path), self.filters,
+                                        self.filters_list[0])
+
+
+class CellProfileExportDialog(FileDialogBase):
+    """Modal dialog for exporting the cell profile"""
+
+    title = "Export cell profile"
+    filters_list = [
+        "CSV file (*.csv)",
+        "JSON file (*.json)",
+    ]
+    suffixes = [".csv", ".json"]
 
     def show_dialog(self):
         """Present dialog and update values"""
@@ -776,8 +799,8 @@ class ChartDialog(QDialog):
     """The chart dialog"""
 
     def __init__(self, parent):
-        if Figure is None:
-            raise ImportError
+        if not is_installed("matplotlib"):
+            raise ImportError("matplotlib is not installed")
 
         super().__init__(parent)
 
@@ -846,6 +869,10 @@ class ChartDialog(QDialog):
 
         figure = self.parent.grid.model.code_array._eval_cell(key, code)
 
+        # Imported here because importing matplotlib slows down startup
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+        from matplotlib.figure import Figure
+
         if isinstance(figure, Figure):
             canvas = FigureCanvasQTAgg(figure)
             self.splitter.replaceWidget(1, canvas)
@@ -1222,7 +1249,17 @@ class CsvImportDialog(QDialog):
             self.parent.statusBar().showMessage(str(error))
             return
         self.parameter_groupbox.set_csvdialect(dialect)
-        self.csv_table.fill(self.filepath, dialect)
+
+        try:
+            digest_types = infer_digest_types(self.filepath, dialect,
+                                              self.sniff_size)
+        except OSError as error:
+            self.parent.statusBar().showMessage(str(error))
+            digest_types = None
+
+        self.csv_table.fill(self.filepath, dialect, digest_types)
+        if digest_types is not None:
+            self.csv_table.update_comboboxes(digest_types)
 
     def apply(self):
         """Button event handler, applies parameters to csv_table"""
@@ -1353,6 +1390,126 @@ class CsvExportDialog(QDialog):
         return button_box
 
 
+class CellProfileDialog(QDialog):
+    """Sortable report of the slowest cells of the cell profiler
+
+    Double clicking a row selects the cell in the grid.
+
+    :param main_window: Application main window
+    :type main_window: pyspread.MainWindow
+    :param profiler: Cell profiler with the statistics to be shown
+    :type profiler: lib.cell_profiler.CellProfiler
+
+    """
+
+    title = "Slowest cells"
+    column_headers = ("Cell", "Count", "Cumulative [ms]", "Self [ms]",
+                      "Last [ms]", "Result size [bytes]")
+
+    def __init__(self, main_window, profiler):
+        super().__init__(main_window)
+
+        self.main_window = main_window
+        self.profiler = profiler
+
+        self.setWindowTitle(self.title)
+        self.resize(700, 400)
+
+        self.table = QTableWidget(self)
+        self.table.setColumnCount(len(self.column_headers))
+        self.table.setHorizontalHeaderLabels(self.column_headers)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().hide()
+        self.table.cellDoubleClicked.connect(self.on_double_click)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table)
+        layout.addWidget(self.create_buttonbox())
+        self.setLayout(layout)
+
+        self.update_table()
+
+    def create_buttonbox(self):
+        """Returns a QDialogButtonBox"""
+
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
+        refresh_button = button_box.addButton("Refresh",
+                                              QDialogButtonBox.ActionRole)
+        clear_button = button_box.addButton("Clear",
+                                            QDialogButtonBox.ResetRole)
+        export_button = button_box.addButton("Export...",
+                                             QDialogButtonBox.ActionRole)
+
+        button_box.rejected.connect(self.reject)
+        refresh_button.clicked.connect(self.update_table)
+        clear_button.clicked.connect(self.on_clear)
+        export_button.clicked.connect(self.on_export)
+
+        return button_box
+
+    def update_table(self):
+        """Fills table with the profiler statistics"""
+
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(self.profiler.stats))
+
+        for row, stats in enumerate(self.profiler.slowest()):
+            key = stats.row, stats.column, stats.table
+            values = (stats.count, stats.cumulative_time * 1000,
+                      stats.self_time * 1000, stats.last_time * 1000,
+                      stats.result_size)
+
+            key_item = QTableWidgetItem("{}, {}, {}".format(*key))
+            key_item.setData(Qt.UserRole, key)
+            self.table.setItem(row, 0, key_item)
+
+            for column, value in enumerate(values, start=1):
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    value = round(value, 3)
+                item.setData(Qt.DisplayRole, value)
+                self.table.setItem(row, column, item)
+
+        self.table.setSortingEnabled(True)
+        self.table.sortItems(2, Qt.DescendingOrder)
+        self.table.resizeColumnsToContents()
+
+    def on_double_click(self, row, column):
+        """Double click event handler, selects cell in grid"""
+
+        self.main_window.grid.current = \
+            self.table.item(row, 0).data(Qt.UserRole)
+
+    def on_clear(self):
+        """Clear button event handler"""
+
+        self.profiler.clear()
+        self.update_table()
+
+    def on_export(self):
+        """Export button event handler, exports statistics to csv or json"""
+
+        dial = CellProfileExportDialog(self.main_window)
+        if not dial.file_path:
+            return  # Cancel pressed
+
+        filepath = Path(dial.file_path)
+        if not filepath.suffix:
+            filepath = filepath.with_suffix(dial.suffix)
+
+        try:
+            with open(filepath, "w", newline='') as export_file:
+                if filepath.suffix == ".json":
+                    self.profiler.write_json(export_file)
+                else:
+                    self.profiler.write_csv(export_file)
+        except OSError as err:
+            msg = "Error exporting cell profile to {}: {}".format(filepath,
+                                                                  err)
+            self.main_window.statusBar().showMessage(msg)
+
+
 class TutorialDialog(QDialog):
     """Dialog for browsing the pyspread tutorial"""
 
@@ -1392,6 +1549,8 @@ class TutorialDialog(QDialog):
         with open(self.path) as helpfile:
             help_text = helpfile.read()
 
+        from lib.markdown2 import markdown  # Slow import, only used here
+
         help_html = markdown(help_text, extras=['metadata'])
         self.browser.setHtml(help_html)
 
@@ -1477,6 +1636,8 @@ class ManualDialog(QDialog):
         document.setMetaInformation(QTextDocument.DocumentUrl,
                                     'file://' + self.baseurl + "/")
 
+        from lib.markdown2 import markdown  # Slow import, only used here
+
         header_text = str(ManualNavigator(self.path)) + '\n \n-----------'
         header_html = markdown(header_text)
 
@@ -107,6 +107,9 @@ class Entryline(SpellTextEdit):
 
         self.highlighter.enable_enchant = True if signal else False
 
+        if signal:
+            self.load_dict()
+
     def setPlainText(self, text):
         """Overides setPlainText
 
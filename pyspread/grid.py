@@ -34,7 +34,6 @@
 
 from ast import literal_eval
 from contextlib import contextmanager
-from io import BytesIO
 from math import isclose
 
 import numpy
@@ -44,25 +43,21 @@ from PyQt5.QtWidgets \
             QStyleOptionViewItem, QApplication, QStyle, QAbstractItemDelegate,
             QHeaderView, QFontDialog, QInputDialog, QLineEdit)
 from PyQt5.QtGui \
-    import (QColor, QBrush, QPen, QFont, QPainter, QPalette, QImage,
+    import (QColor, QBrush, QPen, QFont, QPainter, QPalette, QImage, QPixmap,
             QTextOption, QAbstractTextDocumentLayout, QTextDocument)
 from PyQt5.QtCore \
     import (Qt, QAbstractTableModel, QModelIndex, QVariant, QEvent, QPointF,
             QRectF, QLineF, QSize, QRect, QItemSelectionModel)
 
-try:
-    import matplotlib
-    import matplotlib.figure
-except ImportError:
-    matplotlib = None
-
 import commands
 from model.model import CodeArray
+from lib.chart_renderer import ChartRenderer, figure2qimage
+from lib.lru_cache import LRUCache
 from lib.selection import Selection
-from lib.string_helpers import quote, wrap_text, get_svg_size
+from lib.string_helpers import quote, wrap_text, preview_str, get_svg_size
 from lib.qimage2ndarray import array2qimage
 from lib.qimage_svg import QImageSvg
-from lib.typechecks import is_svg
+from lib.typechecks import is_svg, is_matplotlib_figure
 from menus \
     import (GridContextMenu, TableChoiceContextMenu,
             HorizontalHeaderContextMenu, VerticalHeaderContextMenu)
@@ -86,8 +81,18 @@ class Grid(QTableView):
 
         self.widget_indices = []  # Store each index with an indexWidget here
 
+        # Spans that are set in the view, maps (top, left) to
+        # (row span, column span). None if spans have to be reset.
+        self.applied_spans = None
+
         # Signals
         self.model.dataChanged.connect(self.on_data_changed)
+
+        # QTableView moves or drops spans if rows or columns change
+        for signal in (self.model.rowsInserted, self.model.rowsRemoved,
+                       self.model.columnsInserted, self.model.columnsRemoved,
+                       self.model.modelReset):
+            signal.connect(self.reset_applied_spans)
         self.selectionModel().currentChanged.connect(self.on_current_changed)
 
         self.main_window.widgets.text_color_button.colorChanged.connect(
@@ -115,6 +120,10 @@ class Grid(QTableView):
         self.delegate = GridCellDelegate(main_window, self.model.code_array)
         self.setItemDelegate(self.delegate)
 
+        border_geometry_cache = self.delegate.border_geometry_cache
+        self.model.dataChanged.connect(border_geometry_cache.clear)
+        self.model.modelReset.connect(border_geometry_cache.clear)
+
         # Select upper left cell because initial selection behaves strange
         self.reset_selection()
 
@@ -125,6 +134,12 @@ class Grid(QTableView):
         # Initially, select top left cell on table 0
         self.current = 0, 0, 0
 
+    def paintEvent(self, event):
+        """Overloads QTableView paintEvent to cache cell views of the frame"""
+
+        with self.model.cell_view_caching():
+            super().paintEvent(event)
+
     @contextmanager
     def undo_resizing_row(self):
         self.__undo_resizing_row = True
@@ -866,10 +881,17 @@ class Grid(QTableView):
                                          self.selected_idx, description)
         self.main_window.undo_stack.push(command)
 
+    def reset_applied_spans(self):
+        """Marks spans of the view as unknown so that they are set anew"""
+
+        self.applied_spans = None
+
     def update_cell_spans(self):
-        """Update cell spans from model data"""
+        """Update cell spans from model data
 
-        self.clearSpans()
+        Only spans that differ from applied_spans are changed in the view.
+
+        """
 
         spans = {}  # Dict of (top, left): (bottom, right)
 
@@ -886,32 +908,70 @@ class Grid(QTableView):
                 except (KeyError, TypeError):
                     pass
 
-        for top, left in spans:
+        new_spans = {}  # Dict of (top, left): (row span, column span)
+        for (top, left), bottom_right in spans.items():
             try:
-                bottom, right = spans[(top, left)]
-                self.setSpan(top, left, bottom-top+1, right-left+1)
+                bottom, right = bottom_right
             except TypeError:
-                pass
+                continue
+            new_spans[(top, left)] = bottom - top + 1, right - left + 1
+
+        if self.applied_spans is None:
+            self.clearSpans()
+            self.applied_spans = {}
+
+        # Spans are removed first so that new spans do not overlap them
+        for (top, left), span in self.applied_spans.items():
+            if new_spans.get((top, left)) != span:
+                self.setSpan(top, left, 1, 1)
+
+        for (top, left), span in new_spans.items():
+            if self.applied_spans.get((top, left)) != span:
+                self.setSpan(top, left, *span)
+
+        self.applied_spans = new_spans
 
     def update_index_widgets(self):
-        """Remove old index widgets from model data"""
+        """Update index widgets from model data
 
-        # Remove old button cells
-        for index in self.widget_indices:
-            self.setIndexWidget(index, None)
-        self.widget_indices.clear()
+        Button cells that are present in the view are reused.
+
+        """
 
-        # Add button cells for current table
+        # Button texts for current table
+        texts = {}  # Dict of (row, column): text
         code_array = self.model.code_array
         for selection, table, attr in code_array.cell_attributes:
             if table == self.table and 'button_cell' in attr \
                and attr['button_cell']:
                 row, column = selection.get_bbox()[0]
-                index = self.model.index(row, column, QModelIndex())
-                text = attr['button_cell']
-                button = CellButton(text, self, (row, column, table))
+                texts[(row, column)] = attr['button_cell']
+
+        # Remove button cells that are not in the current table
+        buttons = {}  # Dict of (row, column): button
+        for index in self.widget_indices:
+            button = self.indexWidget(index)
+            if button is None:
+                continue
+            if (index.row(), index.column()) in texts:
+                buttons[(index.row(), index.column())] = button
+            else:
+                self.setIndexWidget(index, None)
+        self.widget_indices.clear()
+
+        # Add or update button cells for current table
+        for (row, column), text in texts.items():
+            key = row, column, self.table
+            index = self.model.index(row, column, QModelIndex())
+            try:
+                button = buttons[(row, column)]
+            except KeyError:
+                button = CellButton(text, self, key)
                 self.setIndexWidget(index, button)
-                self.widget_indices.append(index)
+            else:
+                button.key = key
+                button.setText(text)
+            self.widget_indices.append(index)
 
     def on_freeze_pressed(self, toggled):
         """Freeze cell event handler"""
@@ -1164,12 +1224,129 @@ class GridHeaderView(QHeaderView):
 class GridTableModel(QAbstractTableModel):
     """QAbstractTableModel for Grid"""
 
+    # Maximum length of cell result strings for display and tooltip
+    # Results of markup cells are displayed completely
+    display_maxlen = 20000
+    tooltip_maxlen = 2000
+
+    # Roles that are served from cell attributes and results
+    cell_view_roles = frozenset([Qt.DisplayRole, Qt.ToolTipRole,
+                                 Qt.DecorationRole, Qt.BackgroundColorRole,
+                                 Qt.TextColorRole, Qt.FontRole,
+                                 Qt.TextAlignmentRole])
+
     def __init__(self, main_window, dimensions):
         super().__init__()
 
         self.main_window = main_window
         self.code_array = CodeArray(dimensions, main_window.settings)
 
+        # Qt style objects that are shared by cells with equal attributes
+        self.font_cache = LRUCache(max_size=256)
+        self.color_cache = LRUCache(max_size=1024)
+        self.brush_cache = LRUCache(max_size=16)
+
+        # Bounded strings of cell results, cleared so that old results are
+        # not kept alive after changes
+        self.preview_cache = LRUCache(max_size=1024)
+        self.dataChanged.connect(self.preview_cache.clear)
+        self.modelReset.connect(self.preview_cache.clear)
+
+        # Maps key to dict with cell attributes and result while painting
+        self.cell_view_cache = None
+        self.dataChanged.connect(self.clear_cell_view_cache)
+        self.modelReset.connect(self.clear_cell_view_cache)
+
+    @contextmanager
+    def cell_view_caching(self):
+        """Context manager that caches cell views, e.g. for painting a frame
+
+        Within the context, attributes and result of each cell are looked up
+        only once for all roles.
+
+        """
+
+        self.cell_view_cache = {}
+        try:
+            yield
+        finally:
+            self.cell_view_cache = None
+
+    def clear_cell_view_cache(self):
+        """Clears cell view cache if cell views are being cached"""
+
+        if self.cell_view_cache is not None:
+            self.cell_view_cache.clear()
+
+    def cell_view(self, key):
+        """Returns cell view dict of key
+
+        The dict has the key `attributes` for the cell attributes. The cell
+        result is added with the key `result` by :meth:`cell_result`.
+
+        :param key: Key of the cell
+        :type key: tuple
+
+        """
+
+        if self.cell_view_cache is None:
+            return {"attributes": self.code_array.cell_attributes[key]}
+
+        try:
+            return self.cell_view_cache[key]
+        except KeyError:
+            view = {"attributes": self.code_array.cell_attributes[key]}
+            self.cell_view_cache[key] = view
+            return view
+
+    def cell_result(self, key, view):
+        """Returns result of cell key, which is stored in its cell view
+
+        :param key: Key of the cell
+        :type key: tuple
+        :param view: Cell view dict of key from :meth:`cell_view`
+        :type view: dict
+
+        """
+
+        try:
+            return view["result"]
+        except KeyError:
+            result = view["result"] = self.code_array[key]
+            return result
+
+    def preview(self, key, result, maxlen):
+        """Returns string of cell result that is truncated to maxlen
+
+        Strings are cached for each key and maxlen until the result or the
+        model data changes.
+
+        :param key: Key of the cell
+        :type key: tuple
+        :param result: Result of cell key
+        :param maxlen: Maximum length of the string
+        :type maxlen: int
+
+        """
+
+        cache_key = key, maxlen
+        try:
+            cached_result, text = self.preview_cache[cache_key]
+        except KeyError:
+            pass
+        else:
+            if cached_result is result:
+                return text
+
+        try:
+            text = preview_str(result, maxlen)
+        except RecursionError as err:
+            text = str(err)
+
+        # The result is stored so that its id cannot be reused
+        self.preview_cache[cache_key] = result, text
+        return text
+
     @contextmanager
     def model_reset(self):
         """Context manager for handle changing/resetting model data"""
@@ -1288,10 +1465,29 @@ class GridTableModel(QAbstractTableModel):
 
         self.code_array.delete(table, count, axis=2)
 
-    def font(self, key):
-        """Returns font for given key"""
+    def font(self, key, attr=None):
+        """Returns font for given key
+
+        The font is shared by all cells with equal font attributes and must
+        not be changed.
+
+        :param key: Key of the cell
+        :type key: tuple
+        :param attr: Cell attributes of key, looked up if None
+        :type attr: AttrDict
+
+        """
+
+        if attr is None:
+            attr = self.code_array.cell_attributes[key]
+        font_key = (attr["textfont"], attr["pointsize"], attr["fontweight"],
+                    attr["fontstyle"], attr["underline"],
+                    attr["strikethrough"])
+        try:
+            return self.font_cache[font_key]
+        except KeyError:
+            pass
 
-        attr = self.code_array.cell_attributes[key]
         font = QFont()
         if attr["textfont"] is not None:
             font.setFamily(attr["textfont"])
@@ -1305,39 +1501,75 @@ class GridTableModel(QAbstractTableModel):
             font.setUnderline(attr["underline"])
         if attr["strikethrough"] is not None:
             font.setStrikeOut(attr["strikethrough"])
+
+        self.font_cache[font_key] = font
         return font
 
+    def color(self, rgb):
+        """Returns QColor for rgb color tuple
+
+        The color is shared by all cells with equal colors and must not be
+        changed.
+
+        :param rgb: Color tuple with red, green, blue and optional alpha
+        :type rgb: Iterable[int]
+
+        """
+
+        rgb = tuple(rgb)
+        try:
+            return self.color_cache[rgb]
+        except KeyError:
+            color = self.color_cache[rgb] = QColor(*rgb)
+            return color
+
+    def frozen_brush(self):
+        """Returns QBrush for highlighting frozen cells"""
+
+        pattern_rgb = self.grid.palette().highlight().color()
+        rgba = pattern_rgb.rgba()
+        try:
+            return self.brush_cache[rgba]
+        except KeyError:
+            brush = self.brush_cache[rgba] = QBrush(pattern_rgb,
+                                                    Qt.BDiagPattern)
+            return brush
+
     def data(self, index, role=Qt.DisplayRole):
         """Overloaded data for code_array backend"""
 
-        def safe_str(obj):
-            """Returns str(obj), on RecursionError returns error message"""
-            try:
-                return str(value)
-            except RecursionError as err:
-                return str(err)
+        if role not in self.cell_view_roles:
+            return QVariant()
 
         key = self.current(index)
+        view = self.cell_view(key)
+        attributes = view["attributes"]
 
         if role == Qt.DisplayRole:
-            value = self.code_array[key]
-            renderer = self.code_array.cell_attributes[key]["renderer"]
+            value = self.cell_result(key, view)
+            renderer = attributes["renderer"]
             if renderer == "image" or value is None:
                 return ""
+            elif renderer == "markup":
+                # Markup must not be truncated because it is parsed as html
+                try:
+                    return str(value)
+                except RecursionError as err:
+                    return str(err)
             else:
-                return safe_str(value)
+                return self.preview(key, value, self.display_maxlen)
 
         if role == Qt.ToolTipRole:
-            value = self.code_array[key]
+            value = self.cell_result(key, view)
             if value is None:
                 return ""
             else:
-                return wrap_text(safe_str(value))
+                return wrap_text(self.preview(key, value, self.tooltip_maxlen))
 
         if role == Qt.DecorationRole:
-            renderer = self.code_array.cell_attributes[key]["renderer"]
+            renderer = attributes["renderer"]
             if renderer == "image":
-                value = self.code_array[key]
+                value = self.cell_result(key, view)
                 if isinstance(value, QImage):
                     return value
                 else:
@@ -1348,27 +1580,25 @@ class GridTableModel(QAbstractTableModel):
                         return value
 
         if role == Qt.BackgroundColorRole:
-            if self.main_window.settings.show_frozen \
-               and self.code_array.cell_attributes[key]["frozen"]:
-                pattern_rgb = self.grid.palette().highlight().color()
-                bg_color = QBrush(pattern_rgb, Qt.BDiagPattern)
+            if self.main_window.settings.show_frozen and attributes["frozen"]:
+                bg_color = self.frozen_brush()
             else:
-                bg_color_rgb = self.code_array.cell_attributes[key]["bgcolor"]
+                bg_color_rgb = attributes["bgcolor"]
                 if bg_color_rgb is None:
                     bg_color = self.grid.palette().color(QPalette.Base)
                 else:
-                    bg_color = QColor(*bg_color_rgb)
+                    bg_color = self.color(bg_color_rgb)
             return bg_color
 
         if role == Qt.TextColorRole:
-            text_color_rgb = self.code_array.cell_attributes[key]["textcolor"]
+            text_color_rgb = attributes["textcolor"]
             if text_color_rgb is None:
                 return self.grid.palette().color(QPalette.Text)
             else:
-                return QColor(*text_color_rgb)
+                return self.color(text_color_rgb)
 
         if role == Qt.FontRole:
-            return self.font(key)
+            return self.font(key, attributes)
 
         if role == Qt.TextAlignmentRole:
             pys2qt = {
@@ -1380,9 +1610,8 @@ class GridTableModel(QAbstractTableModel):
                 "align_center": Qt.AlignVCenter,
                 "align_bottom": Qt.AlignBottom,
             }
-            attr = self.code_array.cell_attributes[key]
-            alignment = pys2qt[attr["vertical_align"]]
-            justification = pys2qt[attr["justification"]]
+            alignment = pys2qt[attributes["vertical_align"]]
+            justification = pys2qt[attributes["justification"]]
             alignment |= justification
             return alignment
 
@@ -1454,11 +1683,15 @@ class GridTableModel(QAbstractTableModel):
 class GridCellNavigator:
     """Find neighbors of a cell"""
 
-    def __init__(self, main_window, key):
+    def __init__(self, main_window, key, get_merging_cell=None):
         self.main_window = main_window
         self.code_array = main_window.grid.model.code_array
         self.row, self.column, self.table = self.key = key
 
+        if get_merging_cell is None:
+            get_merging_cell = self.code_array.cell_attributes.get_merging_cell
+        self.get_merging_cell = get_merging_cell
+
     @property
     def borderwidth_bottom(self):
         """Width of bottom border line"""
@@ -1500,7 +1733,7 @@ class GridCellNavigator:
     def _merging_key(self, *key):
         """Merging cell if key is merged else key"""
 
-        merging_key = self.code_array.cell_attributes.get_merging_cell(key)
+        merging_key = self.get_merging_cell(key)
         return key if merging_key is None else merging_key
 
     def above_keys(self):
@@ -1568,117 +1801,257 @@ class GridCellNavigator:
         return self._merging_key(self.row + 1, self.column + 1, self.table)
 
 
-class GridCellDelegate(QStyledItemDelegate):
+class BorderGeometryCache:
+    """Cache for border line geometry of painted cells
 
-    def __init__(self, main_window, code_array):
-        super().__init__()
+    The geometry of a cell depends on the border widths of up to eight
+    neighbors and on merged cells. Border widths and merging cells are
+    cached per key as well so that neighbors share them.
+
+    The cache is tagged with the number of cell attributes and the table.
+    It is cleared when the tag changes, when :meth:`clear` is called and
+    when it exceeds `max_size` cells.
+
+    :param main_window: Application main window
+    :type main_window: pyspread.MainWindow
+    :param cell_attributes: Cell attributes of the grid
+    :type cell_attributes: model.model.CellAttributes
 
+    """
+
+    max_size = 100000
+
+    def __init__(self, main_window, cell_attributes):
         self.main_window = main_window
-        self.code_array = code_array
-        self.cell_attributes = self.code_array.cell_attributes
+        self.cell_attributes = cell_attributes
 
-    @property
-    def grid(self):
-        return self.main_window.grid
+        self._tag = None
+        self._geometries = {}
+        self._widths = {}
+        self._merging_cells = {}
 
-    @contextmanager
-    def painter_save(self, painter):
-        painter.save()
-        yield
-        painter.restore()
+    def clear(self):
+        """Clears the cache"""
 
-    def _paint_bl_border_lines(self, x, y, width, height, painter, key):
-        """Paint the bottom and the left border line of the cell"""
+        self._geometries.clear()
+        self._widths.clear()
+        self._merging_cells.clear()
+
+    def _validate(self, table):
+        """Clears the cache if it is outdated or too large"""
+
+        tag = len(self.cell_attributes), table
+        if tag != self._tag or len(self._geometries) > self.max_size:
+            self.clear()
+            self._tag = tag
+
+    def _get_merging_cell(self, key):
+        """Cached get_merging_cell of the cell attributes"""
+
+        try:
+            return self._merging_cells[key]
+        except KeyError:
+            merging_cell = self.cell_attributes.get_merging_cell(key)
+            self._merging_cells[key] = merging_cell
+            return merging_cell
+
+    def _border_widths(self, key):
+        """Returns cached tuple of bottom and right border width of key"""
+
+        try:
+            return self._widths[key]
+        except KeyError:
+            attributes = self.cell_attributes[key]
+            widths = (attributes["borderwidth_bottom"],
+                      attributes["borderwidth_right"])
+            self._widths[key] = widths
+            return widths
+
+    def _pen(self, width, color):
+        """Returns QPen for border line, palette color if color is None"""
+
+        if color is None:
+            qcolor = self.main_window.grid.palette().color(QPalette.Mid)
+        else:
+            qcolor = QColor(*color)
+        return QPen(QBrush(qcolor), width)
+
+    def geometry(self, key):
+        """Returns border geometry of cell key
+
+        The geometry is a tuple of
+
+        * bottom border pen or None if the border has width 0
+        * right border pen or None if the border has width 0
+        * bottom line offsets at start and end
+        * right line offsets at start and end
+        * inner rect insets left, top, right and bottom
+
+        Offsets and insets are in unzoomed pixels.
 
-        cell = GridCellNavigator(self.main_window, key)
+        :param key: Key of the painted cell
+        :type key: tuple
 
-        borderline_bottom = [x - .5,
-                             y + height - .5,
-                             x + width - .5,
-                             y + height - .5]
-        borderline_right = [x + width - .5,
-                            y - .5,
-                            x + width - .5,
-                            y + height - .5]
+        """
+
+        self._validate(key[2])
+
+        try:
+            return self._geometries[key]
+        except KeyError:
+            geometry = self._geometries[key] = self._get_geometry(key)
+            return geometry
+
+    def _get_geometry(self, key):
+        """Computes border geometry of cell key, see :meth:`geometry`"""
+
+        cell = GridCellNavigator(self.main_window, key,
+                                 get_merging_cell=self._get_merging_cell)
+        widths = self._border_widths
+
+        bottom, right = widths(key)
+
+        above_left_bottom, above_left_right = widths(cell.above_left_key())
+        above_widths = [widths(_key) for _key in cell.above_keys()]
+        above_right_bottom, _ = widths(cell.above_right_key())
+        right_widths = [widths(_key) for _key in cell.right_keys()]
+        below_widths = [widths(_key) for _key in cell.below_keys()]
+        _, below_left_right = widths(cell.below_left_key())
+        left_widths = [widths(_key) for _key in cell.left_keys()]
 
         # Check, which line is the thickest at each edge
         # Shorten line accordingly
 
-        above_left_cell = GridCellNavigator(self.main_window,
-                                            cell.above_left_key())
-        above_cells = [GridCellNavigator(self.main_window, key)
-                       for key in cell.above_keys()]
-        above_right_cell = GridCellNavigator(self.main_window,
-                                             cell.above_right_key())
-        right_cells = [GridCellNavigator(self.main_window, key)
-                       for key in cell.right_keys()]
-#        below_right_cell = GridCellNavigator(self.main_window,
-#                                             cell.below_right_key())
-        below_cells = [GridCellNavigator(self.main_window, key)
-                       for key in cell.below_keys()]
-        below_left_cell = GridCellNavigator(self.main_window,
-                                            cell.below_left_key())
-        left_cells = [GridCellNavigator(self.main_window, key)
-                      for key in cell.left_keys()]
+        bottom_start = bottom_end = right_start = right_end = 0
 
         # Lower left edge:
         # Bottom lines of left cells and right line of below left cell
 
-        lower_left_edge_width = max([c.borderwidth_bottom for c in left_cells]
-                                    + [below_left_cell.borderwidth_right])
-        if lower_left_edge_width > cell.borderwidth_bottom:
-            borderline_bottom[0] += lower_left_edge_width / 2
+        lower_left_edge_width = max([w[0] for w in left_widths]
+                                    + [below_left_right])
+        if lower_left_edge_width > bottom:
+            bottom_start = lower_left_edge_width / 2
 
         # Lower right edge:
         # Right lines of below cells and bottom lines of right cells
 
-        lower_right_edge_width = \
-            max([c.borderwidth_right for c in below_cells]
-                + [c.borderwidth_bottom for c in right_cells])
+        lower_right_edge_width = max([w[1] for w in below_widths]
+                                     + [w[0] for w in right_widths])
 
-        if lower_right_edge_width > cell.borderwidth_bottom:
-            borderline_bottom[2] -= lower_right_edge_width / 2
+        if lower_right_edge_width > bottom:
+            bottom_end = lower_right_edge_width / 2
 
-        if lower_right_edge_width > cell.borderwidth_right:
-            borderline_right[3] -= lower_right_edge_width / 2
+        if lower_right_edge_width > right:
+            right_end = lower_right_edge_width / 2
 
         # Top right edge:
         # Right lines of above cells and bottom line of above right cell
 
-        top_right_edge_width = max([c.borderwidth_right for c in above_cells]
-                                   + [above_right_cell.borderwidth_bottom])
-        if top_right_edge_width > cell.borderwidth_bottom:
-            borderline_right[1] += top_right_edge_width / 2
+        top_right_edge_width = max([w[1] for w in above_widths]
+                                   + [above_right_bottom])
+        if top_right_edge_width > bottom:
+            right_start = top_right_edge_width / 2
+
+        # Inner rect insets
+
+        inset_left = max(above_left_right, *[w[1] for w in left_widths],
+                         below_left_right) / 2
+        inset_top = max(above_left_bottom, *[w[0] for w in above_widths],
+                        above_right_bottom) / 2
+        inset_right = max(above_widths[-1][1], right,
+                          below_widths[-1][1]) / 2
+        inset_bottom = max(left_widths[-1][0], bottom,
+                           right_widths[-1][0]) / 2
+
+        attributes = self.cell_attributes[key]
+        bottom_pen = right_pen = None
+        if bottom:
+            bottom_pen = self._pen(bottom, attributes["bordercolor_bottom"])
+        if right:
+            right_pen = self._pen(right, attributes["bordercolor_right"])
+
+        return (bottom_pen, right_pen, bottom_start, bottom_end, right_start,
+                right_end, inset_left, inset_top, inset_right, inset_bottom)
+
+
+class GridCellDelegate(QStyledItemDelegate):
+
+    # Maximum total size of the pixmaps in image_cache
+    image_cache_max_bytes = 256 * 2 ** 20
+
+    def __init__(self, main_window, code_array):
+        super().__init__()
+
+        self.main_window = main_window
+        self.code_array = code_array
+        self.cell_attributes = self.code_array.cell_attributes
+
+        self.border_geometry_cache = \
+            BorderGeometryCache(main_window, self.cell_attributes)
+
+        # Rendered images of image, svg and matplotlib cells
+        self.image_cache = LRUCache(max_size=256,
+                                    max_bytes=self.image_cache_max_bytes,
+                                    nbytes=self._image_cache_nbytes)
+
+        # Laid out documents of markup cells
+        self.markup_cache = LRUCache(max_size=256)
+
+        self.chart_renderer = ChartRenderer(self)
+        self.chart_renderer.rendered.connect(self.on_chart_rendered)
+
+    @property
+    def grid(self):
+        return self.main_window.grid
+
+    @staticmethod
+    def _image_cache_nbytes(item):
+        """Returns size of the pixmap of an image_cache item in bytes
+
+        :param item: Tuple (cell result, pixmap, width, height)
+        :type item: tuple
+
+        """
+
+        pixmap = item[1]
+        if pixmap is None:
+            return 0
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    @contextmanager
+    def painter_save(self, painter):
+        painter.save()
+        yield
+        painter.restore()
+
+    def _paint_bl_border_lines(self, x, y, width, height, painter, key):
+        """Paint the bottom and the left border line of the cell"""
+
+        (bottom_pen, right_pen, bottom_start, bottom_end, right_start,
+         right_end, inset_left, inset_top, inset_right, inset_bottom) = \
+            self.border_geometry_cache.geometry(key)
 
         # Draw lines if their width is not 0
 
-        if cell.borderwidth_bottom:
-            painter.setPen(QPen(QBrush(cell.border_qcolor_bottom),
-                                cell.borderwidth_bottom))
-            bottom_border_line = QLineF(*borderline_bottom)
-            painter.drawLine(bottom_border_line)
+        if bottom_pen is not None:
+            painter.setPen(bottom_pen)
+            painter.drawLine(QLineF(x - .5 + bottom_start,
+                                    y + height - .5,
+                                    x + width - .5 - bottom_end,
+                                    y + height - .5))
 
-        if cell.borderwidth_right:
-            painter.setPen(QPen(QBrush(cell.border_qcolor_right),
-                                cell.borderwidth_right))
-            right_border_line = QLineF(*borderline_right)
-            painter.drawLine(right_border_line)
+        if right_pen is not None:
+            painter.setPen(right_pen)
+            painter.drawLine(QLineF(x + width - .5,
+                                    y - .5 + right_start,
+                                    x + width - .5,
+                                    y + height - .5 - right_end))
 
         # Inner rect
-        irect_x = x - .5 + max(above_left_cell.borderwidth_right,
-                               *[c.borderwidth_right for c in left_cells],
-                               below_left_cell.borderwidth_right) / 2
-        irect_y = y - .5 + max(above_left_cell.borderwidth_bottom,
-                               *[c.borderwidth_bottom for c in above_cells],
-                               above_right_cell.borderwidth_bottom) / 2
-        irect_width = (x + width - irect_x
-                       - max(above_cells[-1].borderwidth_right,
-                             cell.borderwidth_right,
-                             below_cells[-1].borderwidth_right) / 2)
-        irect_height = (y + height - irect_y
-                        - max(left_cells[-1].borderwidth_bottom,
-                              cell.borderwidth_bottom,
-                              right_cells[-1].borderwidth_bottom) / 2)
+        irect_x = x - .5 + inset_left
+        irect_y = y - .5 + inset_top
+        irect_width = x + width - irect_x - inset_right
+        irect_height = y + height - irect_y - inset_bottom
 
         return irect_x, irect_y, irect_width, irect_height
 
@@ -1701,6 +2074,43 @@ class GridCellDelegate(QStyledItemDelegate):
         key = row, column, table
         return self._paint_bl_border_lines(0, 0, width, height, painter, key)
 
+    def _markup_document(self, html, width, font=None, alignment=None):
+        """Returns QTextDocument for html markup
+
+        Documents are cached in markup_cache so that they are laid out only
+        once. Cached documents must not be changed.
+
+        :param html: HTML markup
+        :type html: str
+        :param width: Text width of the document
+        :type width: int
+        :param font: Default font of the document, Qt default if None
+        :type font: QFont
+        :param alignment: Default alignment of the document, Qt default if None
+        :type alignment: Qt.Alignment
+
+        """
+
+        font_key = None if font is None else font.key()
+        alignment_key = None if alignment is None else int(alignment)
+        cache_key = html, width, font_key, alignment_key
+
+        try:
+            return self.markup_cache[cache_key]
+        except KeyError:
+            pass
+
+        doc = QTextDocument()
+        if font is not None:
+            doc.setDefaultFont(font)
+        if alignment is not None:
+            doc.setDefaultTextOption(QTextOption(alignment))
+        doc.setHtml(html)
+        doc.setTextWidth(width)
+
+        self.markup_cache[cache_key] = doc
+        return doc
+
     def _render_markup(self, painter, option, index):
         """HTML markup renderer"""
 
@@ -1708,20 +2118,10 @@ class GridCellDelegate(QStyledItemDelegate):
 
         style = option.widget.style()
 
-        doc = QTextDocument()
-
         font = self.grid.model.data(index, role=Qt.FontRole)
-        doc.setDefaultFont(font)
-
         alignment = self.grid.model.data(index, role=Qt.TextAlignmentRole)
-        doc.setDefaultTextOption(QTextOption(alignment))
-
-        bg_color = self.grid.model.data(index, role=Qt.BackgroundColorRole)
-        css = "background-color: {bg_color};".format(bg_color=bg_color)
-        doc.setDefaultStyleSheet(css)
-
-        doc.setHtml(option.text)
-        doc.setTextWidth(option.rect.width())
+        doc = self._markup_document(option.text, option.rect.width(), font,
+                                    alignment)
 
         option.text = ""
         style.drawControl(QStyle.CE_ItemViewItem, option, painter,
@@ -1774,9 +2174,10 @@ class GridCellDelegate(QStyledItemDelegate):
             return inner_width, inner_height
 
         key = index.row(), index.column(), self.grid.table
+        attributes = self.grid.model.cell_view(key)["attributes"]
 
-        justification = self.cell_attributes[key]["justification"]
-        vertical_align = self.cell_attributes[key]["vertical_align"]
+        justification = attributes["justification"]
+        vertical_align = attributes["vertical_align"]
 
         if justification == "justify_fill":
             return option.rect
@@ -1803,25 +2204,36 @@ class GridCellDelegate(QStyledItemDelegate):
 
         return QRect(image_x, image_y, image_width, image_height)
 
-    def _render_qimage(self, painter, option, index, qimage=None):
-        """QImage renderer"""
-
-        if qimage is None:
-            qimage = index.data(Qt.DecorationRole)
+    def _image_rect(self, option, index):
+        """Returns rect of the cell including merged cells"""
 
         row, column = index.row(), index.column()
         row_span = self.grid.rowSpan(row, column)
         column_span = self.grid.columnSpan(row, column)
         if row_span == column_span == 1:
-            rect = option.rect
-        else:
-            height = 0
-            width = 0
-            for __row in range(row, row + row_span + 1):
-                height += self.grid.rowHeight(__row)
-            for __column in range(column, column + column_span + 1):
-                width += self.grid.columnWidth(__column)
-            rect = QRect(option.rect.x(), option.rect.y(), width, height)
+            return option.rect
+
+        height = 0
+        width = 0
+        for __row in range(row, row + row_span + 1):
+            height += self.grid.rowHeight(__row)
+        for __column in range(column, column + column_span + 1):
+            width += self.grid.columnWidth(__column)
+        return QRect(option.rect.x(), option.rect.y(), width, height)
+
+    def _scaled_qimage(self, rect, justification, qimage):
+        """Returns tuple of scaled image, image width and image height
+
+        Returns None if qimage cannot be rendered.
+
+        :param rect: Target rect of the image
+        :type rect: QRect
+        :param justification: Cell justification attribute
+        :type justification: str
+        :param qimage: Image, svg as bytes or str or None
+        :type qimage: QImage or bytes or str
+
+        """
 
         if isinstance(qimage, QImage):
             img_width, img_height = qimage.width(), qimage.height()
@@ -1866,14 +2278,6 @@ class GridCellDelegate(QStyledItemDelegate):
             qimage = QImageSvg(img_width, img_height, QImage.Format_ARGB32)
             qimage.from_svg_bytes(svg_bytes)
 
-        img_rect = self._get_aligned_image_rect(option, index,
-                                                img_width, img_height)
-        if img_rect is None:
-            return
-
-        key = index.row(), index.column(), self.grid.table
-        justification = self.cell_attributes[key]["justification"]
-
         if justification == "justify_fill":
             qimage = qimage.scaled(img_width, img_height,
                                    Qt.IgnoreAspectRatio,
@@ -1883,6 +2287,77 @@ class GridCellDelegate(QStyledItemDelegate):
                                    Qt.KeepAspectRatio,
                                    Qt.SmoothTransformation)
 
+        return qimage, img_width, img_height
+
+    def _render_qimage(self, painter, option, index, qimage=None):
+        """QImage renderer
+
+        Scaled images are cached as pixmaps in image_cache. A cache entry is
+        used if the cell result is the identical object and if target size,
+        zoom and alignment are unchanged.
+
+        :param qimage: Image or svg to be rendered, cell result if None
+        :type qimage: QImage or bytes or str
+
+        """
+
+        key = index.row(), index.column(), self.grid.table
+        view = self.grid.model.cell_view(key)
+        attributes = view["attributes"]
+
+        if qimage is None:
+            result = self.grid.model.cell_result(key, view)
+        else:
+            result = qimage
+
+        rect = self._image_rect(option, index)
+        cache_key = ("image", key, rect.width(), rect.height(),
+                     self.grid.zoom, self.main_window.settings.print_zoom,
+                     attributes["justification"], attributes["vertical_align"])
+
+        try:
+            cached_result, pixmap, img_width, img_height = \
+                self.image_cache[cache_key]
+        except KeyError:
+            cached_result = None
+
+        if cached_result is None or cached_result is not result:
+            if qimage is None:
+                qimage = index.data(Qt.DecorationRole)
+
+            scaled_qimage = self._scaled_qimage(rect,
+                                                attributes["justification"],
+                                                qimage)
+            if scaled_qimage is None:
+                return
+
+            qimage, img_width, img_height = scaled_qimage
+            pixmap = QPixmap.fromImage(qimage)
+
+            # The result is stored so that its id cannot be reused
+            self.image_cache[cache_key] = result, pixmap, img_width, img_height
+
+        self._draw_pixmap(painter, option, index, pixmap, img_width,
+                          img_height)
+
+    def _draw_pixmap(self, painter, option, index, pixmap, img_width,
+                     img_height):
+        """Draws pixmap aligned into the cell
+
+        :param pixmap: Pixmap to be drawn
+        :type pixmap: QPixmap
+        :param img_width: Image width, scaled to the aligned image rect
+        :type img_width: float
+        :param img_height: Image height, scaled to the aligned image rect
+        :type img_height: float
+
+        """
+
+        img_rect = self._get_aligned_image_rect(option, index,
+                                                img_width, img_height)
+        if img_rect is None:
+            return
+
         with self.painter_save(painter):
             try:
                 scale_x = img_rect.width() / img_width
@@ -1894,33 +2369,132 @@ class GridCellDelegate(QStyledItemDelegate):
                 scale_y = 1
             painter.translate(img_rect.x(), img_rect.y())
             painter.scale(scale_x, scale_y)
-            painter.drawImage(0, 0, qimage)
+            painter.drawPixmap(0, 0, pixmap)
 
     def _render_matplotlib(self, painter, option, index):
-        """Matplotlib renderer"""
+        """Matplotlib renderer
 
-        if matplotlib is None:
-            # matplotlib is not installed
-            return
+        The figure is rendered by the Agg backend at the device resolution
+        of the painted area. Rendered figures are cached in image_cache
+        until the cell result changes.
+
+        Figures that are painted on the grid are rendered in a worker thread
+        while a placeholder is shown. Other paint devices such as printers
+        get the figure rendered in the GUI thread. Figures that cannot be
+        rendered are replaced by an error text.
+
+        """
 
         key = index.row(), index.column(), self.grid.table
-        figure = self.code_array[key]
+        view = self.grid.model.cell_view(key)
+        figure = self.grid.model.cell_result(key, view)
 
-        if not isinstance(figure, matplotlib.figure.Figure):
+        if not is_matplotlib_figure(figure):
             return
 
-        # Save SVG in a fake file object.
-        filelike = BytesIO()
-        figure.savefig(filelike, format="svg")
-        svg_str = filelike.getvalue().decode()
+        attributes = view["attributes"]
+        rect = self._image_rect(option, index)
+        zoom = self.grid.zoom
+        print_zoom = self.main_window.settings.print_zoom
+        pixel_ratio = painter.device().devicePixelRatioF()
+
+        cache_key = ("matplotlib", key, rect.width(), rect.height(), zoom,
+                     print_zoom, pixel_ratio, attributes["justification"],
+                     attributes["vertical_align"])
+
+        try:
+            cached_figure, pixmap, img_width, img_height = \
+                self.image_cache[cache_key]
+        except KeyError:
+            cached_figure = None
+
+        if cached_figure is not figure:
+            # Resolution at which the figure fits into the painted area
+            # Stretched figures are downscaled in one direction only
+            scale = zoom * pixel_ratio
+            if print_zoom is not None:
+                scale *= print_zoom
+            fig_width, fig_height = figure.get_size_inches()
+            if attributes["justification"] == "justify_fill":
+                fit = max
+            else:
+                fit = min
+            try:
+                dpi = fit(rect.width() * scale / fig_width,
+                          rect.height() * scale / fig_height)
+            except ZeroDivisionError:
+                return
+            if dpi <= 0:
+                return
+
+            if painter.device() is self.grid.viewport():
+                self.chart_renderer.render(cache_key, figure, dpi)
+                self._paint_chart_placeholder(painter, option,
+                                              "Rendering chart…")
+                return
+
+            try:
+                qimage = figure2qimage(figure, dpi)
+            except Exception:  # Figures are created by user code
+                pixmap, img_width, img_height = None, 0, 0
+            else:
+                pixmap = QPixmap.fromImage(qimage)
+                img_width, img_height = qimage.width(), qimage.height()
+
+            # The figure is stored so that its id cannot be reused
+            self.image_cache[cache_key] = figure, pixmap, img_width, img_height
 
-        self._render_qimage(painter, option, index, qimage=svg_str)
+        if pixmap is None:
+            self._paint_chart_placeholder(painter, option,
+                                          "Chart could not be rendered",
+                                          Qt.red)
+        else:
+            self._draw_pixmap(painter, option, index, pixmap, img_width,
+                              img_height)
+
+    def _paint_chart_placeholder(self, painter, option, text, color=Qt.gray):
+        """Paints placeholder text instead of a chart
+
+        :param text: Text that is painted centered in the cell
+        :type text: str
+        :param color: Text color
+        :type color: Qt.GlobalColor
+
+        """
+
+        with self.painter_save(painter):
+            painter.setPen(QColor(color))
+            painter.drawText(option.rect, Qt.AlignCenter, text)
+
+    def on_chart_rendered(self, cache_key, figure, qimage):
+        """Caches chart that has been rendered in the worker thread
+
+        The cell is repainted if it is on the current table.
+
+        :param cache_key: Key of the chart in image_cache
+        :type cache_key: tuple
+        :param figure: Rendered figure
+        :type figure: matplotlib.figure.Figure
+        :param qimage: Rendered image, None if rendering failed
+        :type qimage: QImage
+
+        """
+
+        if qimage is None:
+            self.image_cache[cache_key] = figure, None, 0, 0
+        else:
+            self.image_cache[cache_key] = (figure, QPixmap.fromImage(qimage),
+                                           qimage.width(), qimage.height())
+
+        row, column, table = cache_key[1]
+        if table == self.grid.table:
+            self.grid.update(self.grid.model.index(row, column))
 
     def __paint(self, painter, option, index):
         """Calls the overloaded paint function or creates html delegate"""
 
         key = index.row(), index.column(), self.grid.table
-        renderer = self.cell_attributes[key]["renderer"]
+        renderer = self.grid.model.cell_view(key)["attributes"]["renderer"]
 
         if renderer == "text":
             super(GridCellDelegate, self).paint(painter, option, index)
@@ -1945,9 +2519,7 @@ class GridCellDelegate(QStyledItemDelegate):
         options = QStyleOptionViewItem(option)
         self.initStyleOption(options, index)
 
-        doc = QTextDocument()
-        doc.setHtml(options.text)
-        doc.setTextWidth(options.rect.width())
+        doc = self._markup_document(options.text, options.rect.width())
         return QSize(doc.idealWidth(), doc.size().height())
 
     def _rotated_paint(self, painter, option, index, angle):
@@ -1992,7 +2564,7 @@ class GridCellDelegate(QStyledItemDelegate):
             painter.translate(x, y)
             painter.scale(zoom, zoom)
             key = index.row(), index.column(), self.grid.table
-            angle = self.cell_attributes[key]["angle"]
+            angle = self.grid.model.cell_view(key)["attributes"]["angle"]
 
             ix, iy, iw, ih = self._paint_border_lines(rectf.width(),
                                                       rectf.height(),
@@ -19,7 +19,8 @@
 # --------------------------------------------------------------------
 
 
-from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QIcon, QIconEngine
 
 from settings import PYSPREAD_PATH
 
@@ -171,11 +172,54 @@ class IconPath:
     chart_surface_2_1 = CHARTS_PATH / 'chart_surface_2_1.svg'
 
 
+class LazyIconEngine(QIconEngine):
+    """Icon engine that loads the icon file when the icon is first used
+
+    Parsing the svg icon files takes a large part of the startup time while
+    most icons are only shown when a menu is opened.
+
+    """
+
+    def __init__(self, path):
+        super().__init__()
+
+        self.path = path
+        self._icon = None
+
+    @property
+    def icon(self):
+        """QIcon that is loaded from path on first access"""
+
+        if self._icon is None:
+            self._icon = QIcon(self.path)
+        return self._icon
+
+    def paint(self, painter, rect, mode, state):
+        """Overloaded method"""
+
+        self.icon.paint(painter, rect, Qt.AlignCenter, mode, state)
+
+    def pixmap(self, size, mode, state):
+        """Overloaded method"""
+
+        return self.icon.pixmap(size, mode, state)
+
+    def actualSize(self, size, mode, state):
+        """Overloaded method"""
+
+        return self.icon.actualSize(size, mode, state)
+
+    def clone(self):
+        """Overloaded method"""
+
+        return LazyIconEngine(self.path)
+
+
 class IconConverter(type):
     """Meta class that provides QIcons for IconPaths icons"""
 
     def __getattr__(cls, name):
-        return QIcon(str(getattr(IconPath, name)))
+        return QIcon(LazyIconEngine(str(getattr(IconPath, name))))
 
 
 class Icon(metaclass=IconConverter):
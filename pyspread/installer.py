@@ -8,9 +8,14 @@ except ImportError:
 import os
 
 try:
-    from pkg_resources import get_distribution, DistributionNotFound
+    # Python >= 3.8, much faster to import than pkg_resources
+    from importlib.metadata import distribution as get_distribution
+    from importlib.metadata import PackageNotFoundError as DistributionNotFound
 except ImportError:
-    get_distribution = None
+    try:
+        from pkg_resources import get_distribution, DistributionNotFound
+    except ImportError:
+        get_distribution = None
 from PyQt5.QtCore import QProcess, QSize
 from PyQt5.QtGui import QColor, QTextCursor
 from PyQt5.QtWidgets import QDialog, QButtonGroup, QVBoxLayout, QHBoxLayout
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+journal
+=======
+
+This file contains interfaces to the append-only save journal.
+
+The journal stores the changes since the last full save of a pyspread file
+in the sidecar file `<filename>.journal`. Each save appends one entry,
+which consists of records followed by a commit line:
+
+ * <section>\t<record>\n
+ * [commit]\t<number of records>\t<signature>\n
+
+The records of the sections shape, grid, attributes, row_heights and
+col_widths have the line format of the respective pys file section.
+Further records are:
+
+ * delete\t<row>\t<col>\t<tab>\n - Deletes a cell
+ * attributes_clear, row_heights_clear, col_widths_clear - Clears a section
+ * macros\t<repr of macros>\n - Replaces the macros
+
+Signatures are chained. Each signature signs the previous signature and the
+entry's records, starting with the signature of the pyspread file.
+Incomplete entries at the end of a journal, e.g. after a crash, are ignored.
+
+"""
+
+import ast
+from hmac import compare_digest
+from itertools import islice
+
+from interfaces.pys import PysReader, PysWriter
+from lib.hashing import StreamSigner
+
+COMMIT = "[commit]"
+
+
+def journal_path(filepath):
+    """Returns path of the journal of the pyspread file filepath
+
+    :param filepath: Path of pyspread file
+    :type filepath: pathlib.Path
+
+    """
+
+    return filepath.with_suffix(filepath.suffix + ".journal")
+
+
+def entry_signature(previous_signature, data, key):
+    """Returns chained signature of a journal entry
+
+    :param previous_signature: Signature of previous entry or pyspread file
+    :type previous_signature: bytes
+    :param data: Records of journal entry
+    :type data: bytes
+    :param key: Signature key
+
+    """
+
+    signer = StreamSigner(key)
+    signer.update(previous_signature)
+    signer.update(data)
+
+    return signer.signature()
+
+
+class JournalReader(PysReader):
+    """Replays a journal file on a code_array
+
+    Iterating over the reader applies the entries of the journal and yields
+    the number of each applied entry.
+
+    Parameters
+    ----------
+
+    journal_file: File object in binary mode
+    \tThe journal file
+    code_array: model.CodeArray object
+    \tThe code_array object data structure
+    signature: bytes
+    \tSignature of the pyspread file
+    key: bytes or str
+    \tSignature key
+    verify: bool, defaults to True
+    \tIf True then replay stops at the first entry with invalid signature.
+    \tOtherwise all entries are replayed and :attr:`verified` is updated.
+
+    """
+
+    def __init__(self, journal_file, code_array, signature, key, verify=True):
+        super().__init__(journal_file, code_array)
+
+        self.version = 2.0
+
+        self.signature = signature
+        """Signature of the last applied entry"""
+
+        self.key = key
+        self.verify = verify
+
+        self.verified = True
+        """False if an entry with invalid signature has been encountered"""
+
+        self._section2reader = {
+            "shape": self._pys2shape,
+            "grid": self._pys2code,
+            "delete": self._journal2delete,
+            "attributes": self._pys2attributes,
+            "attributes_clear": self._journal2attributes_clear,
+            "row_heights": self._pys2row_heights,
+            "row_heights_clear": self._journal2row_heights_clear,
+            "col_widths": self._pys2col_widths,
+            "col_widths_clear": self._journal2col_widths_clear,
+            "macros": self._journal2macros,
+        }
+
+    def __iter__(self):
+        """Iterates over journal entries, applying them to code_array"""
+
+        records = []
+        entry_no = 0
+
+        self.pys_file.seek(0)
+
+        for line in self.pys_file:
+            if not line.endswith(b"\n"):
+                break  # Incomplete line at the end of the file
+
+            if not line.startswith(bytes(COMMIT, "utf-8")):
+                records.append(line)
+                continue
+
+            _, length, signature = self._split_tidy(line.decode("utf8"))
+            if int(length) != len(records):
+                msg = "Journal entry {} is corrupt.".format(entry_no + 1)
+                raise ValueError(msg)
+
+            signature = bytes(signature, "utf-8")
+            if not self._is_valid(b"".join(records), signature):
+                self.verified = False
+                if self.verify:
+                    return
+
+            for record in records:
+                section, _, content = record.decode("utf8").partition("\t")
+                try:
+                    reader = self._section2reader[section.rstrip("\n")]
+                except KeyError:
+                    msg = "Unknown journal section {}.".format(section)
+                    raise ValueError(msg)
+                reader(content)
+
+            self.signature = signature
+            records = []
+            entry_no += 1
+
+            yield entry_no
+
+    def _is_valid(self, data, signature):
+        """Returns True if signature of entry data is valid"""
+
+        try:
+            data_signature = entry_signature(self.signature, data, self.key)
+        except (SyntaxError, ValueError):
+            return False  # Invalid key
+
+        return compare_digest(data_signature, signature)
+
+    # Sections
+
+    def _journal2delete(self, line):
+        """Deletes cell in code_array"""
+
+        key = self._get_key(*self._split_tidy(line))
+        self.code_array.dict_grid.pop(key, None)
+
+    def _journal2attributes_clear(self, line):
+        """Deletes all cell attributes in code_array"""
+
+        cell_attributes = self.code_array.cell_attributes
+        del cell_attributes[:]
+        cell_attributes._attr_cache.clear()
+        cell_attributes._table_cache.clear()
+
+    def _journal2row_heights_clear(self, line):
+        """Deletes all row heights in code_array"""
+
+        self.code_array.row_heights.clear()
+
+    def _journal2col_widths_clear(self, line):
+        """Deletes all column widths in code_array"""
+
+        self.code_array.col_widths.clear()
+
+    def _journal2macros(self, line):
+        """Replaces macros in code_array"""
+
+        self.code_array.macros = ast.literal_eval(line)
+
+
+class JournalWriter(PysWriter):
+    """Creates journal entries from changes in code_array
+
+    The changes are determined against the state at the last call of
+    :meth:`snapshot`, which is called on creation.
+
+    Iterating over the writer yields the records of all changes.
+
+    Parameters
+    ----------
+
+    code_array: model.CodeArray object
+    \tThe code_array object data structure
+
+    """
+
+    def __init__(self, code_array):
+        super().__init__(code_array)
+
+        self.snapshot()
+
+    def __iter__(self):
+        """Yields journal records for changes since the last snapshot"""
+
+        code_array = self.code_array
+
+        if code_array.shape != self._shape:
+            yield "shape\t" + next(self._shape2pys())
+
+        dict_grid = code_array.dict_grid
+        for key in sorted(dict_grid.changed_keys):
+            if dict_grid.get(key) is None:
+                yield "delete\t" + "\t".join(map(repr, key)) + "\n"
+            else:
+                for line in self._code2pys([key]):
+                    yield "grid\t" + line
+
+        cell_attributes = code_array.cell_attributes
+        n_old = len(self._attributes)
+        if len(cell_attributes) >= n_old \
+           and all(attr is old_attr for attr, old_attr
+                   in zip(cell_attributes, self._attributes)):
+            # Attributes have only been appended
+            new_attributes = islice(cell_attributes, n_old, None)
+        else:
+            yield "attributes_clear\n"
+            new_attributes = cell_attributes
+        for line in self._attributes2pys(new_attributes):
+            yield "attributes\t" + line
+
+        if code_array.row_heights != self._row_heights:
+            yield "row_heights_clear\n"
+            for line in self._row_heights2pys():
+                yield "row_heights\t" + line
+
+        if code_array.col_widths != self._col_widths:
+            yield "col_widths_clear\n"
+            for line in self._col_widths2pys():
+                yield "col_widths\t" + line
+
+        if code_array.macros != self._macros:
+            yield "macros\t" + repr(code_array.macros) + "\n"
+
+    def snapshot(self):
+        """Stores the current state as base for the next journal entry"""
+
+        code_array = self.code_array
+
+        code_array.dict_grid.changed_keys.clear()
+
+        self._shape = code_array.shape
+        self._attributes = list(code_array.cell_attributes)
+        self._row_heights = dict(code_array.row_heights)
+        self._col_widths = dict(code_array.col_widths)
+        self._macros = code_array.macros
+
+    def entry(self, previous_signature, key):
+        """Returns journal entry for changes and its signature
+
+        If there are no changes then the entry is empty.
+
+        :param previous_signature: Signature of previous entry or of file
+        :type previous_signature: bytes
+        :param key: Signature key
+
+        """
+
+        records = list(self)
+        if not records:
+            return b"", previous_signature
+
+        data = bytes("".join(records), "utf-8")
+        signature = entry_signature(previous_signature, data, key)
+        commit = "\t".join([COMMIT, str(len(records)),
+                            signature.decode("utf-8")]) + "\n"
+
+        return data + bytes(commit, "utf-8"), signature
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+npy
+===
+
+This file contains interfaces to NumPy .npy and .npz files.
+
+Exported cell results are stored in arrays with the narrowest dtype that
+holds all results of the exported region (.npy) or column (.npz):
+
+ * bool, int64, float64, complex128 or str for uniform results
+ * float64 or complex128 with nan for empty cells in numeric regions
+ * object for everything else
+
+Imported .npy files are memory mapped and never unpickled. They are either
+referenced from a single cell or their values are converted to cell code.
+
+"""
+
+from math import isfinite
+from numbers import Complex, Integral, Real
+
+import numpy
+
+
+def typed_array(results):
+    """Returns numpy array of results with narrowest fitting dtype
+
+    :param results: Cell results, None for empty cells
+    :type results: Sequence of sequences of equal length
+
+    """
+
+    array = numpy.empty((len(results), len(results[0]) if results else 0),
+                        dtype=object)
+    for i, row in enumerate(results):
+        for j, result in enumerate(row):
+            array[i, j] = result
+
+    values = [value for value in array.flat if value is not None]
+
+    def are_all(types, excluded=(bool, numpy.bool_)):
+        """True if all values are instances of types but not of excluded"""
+
+        return bool(values) and all(isinstance(value, types)
+                                    and not isinstance(value, excluded)
+                                    for value in values)
+
+    if len(values) == array.size:
+        if are_all((bool, numpy.bool_), excluded=()):
+            return array.astype(bool)
+        if are_all(Integral):
+            try:
+                return array.astype(numpy.int64)
+            except OverflowError:
+                return array
+        if are_all(str):
+            return array.astype(str)
+
+    for types, dtype in (Real, numpy.float64), (Complex, numpy.complex128):
+        if are_all(types):
+            for index, value in numpy.ndenumerate(array):
+                if value is None:
+                    array[index] = numpy.nan
+            return array.astype(dtype)
+
+    return array
+
+
+def save_npy(npy_file, results):
+    """Saves results as one 2D array to npy_file
+
+    :param npy_file: File object in binary mode
+    :param results: Cell results, None for empty cells
+    :type results: Sequence of sequences of equal length
+
+    """
+
+    numpy.save(npy_file, typed_array(results))
+
+
+def save_npz(npz_file, results, first_column=0):
+    """Saves each column of results as array column_<no> to npz_file
+
+    :param npz_file: File object in binary mode
+    :param results: Cell results, None for empty cells
+    :type results: Sequence of sequences of equal length
+    :param first_column: Grid column of the first column of results
+    :type first_column: int
+
+    """
+
+    arrays = {}
+    for i, column in enumerate(zip(*results)):
+        array = typed_array([column])[0]
+        arrays["column_{}".format(first_column + i)] = array
+
+    numpy.savez(npz_file, **arrays)
+
+
+def load_npy(filepath):
+    """Returns read-only memory map of the array in npy file filepath
+
+    Arrays of Python objects cannot be loaded because they require
+    unpickling.
+
+    :param filepath: Path of npy file
+    :type filepath: pathlib.Path
+
+    """
+
+    try:
+        return numpy.load(str(filepath), mmap_mode='r', allow_pickle=False)
+    except ValueError as err:
+        raise ValueError("{} cannot be loaded: {}".format(filepath, err))
+
+
+def reference_code(filepath):
+    """Returns cell code that memory maps the npy file filepath
+
+    :param filepath: Path of npy file
+    :type filepath: pathlib.Path
+
+    """
+
+    return "numpy.load({!r}, mmap_mode='r')".format(str(filepath))
+
+
+def value_code(value):
+    """Returns cell code for a Python scalar from a numpy array"""
+
+    if isinstance(value, float) and not isfinite(value):
+        return "float({!r})".format(repr(value))
+
+    if isinstance(value, complex) \
+       and not (isfinite(value.real) and isfinite(value.imag)):
+        return "complex({!r})".format(repr(value))
+
+    return repr(value)
+
+
+def array_codes(array, rows, columns):
+    """Returns nested list of cell code for the values of array
+
+    Scalars fill one cell, 1D arrays fill a column and 2D arrays fill rows.
+
+    :param array: Array of 2 dimensions at most
+    :type array: numpy.ndarray
+    :param rows: Maximum number of rows
+    :type rows: int
+    :param columns: Maximum number of columns
+    :type columns: int
+
+    """
+
+    if array.ndim > 2:
+        msg = "Arrays with {} dimensions cannot be placed in the grid."
+        raise ValueError(msg.format(array.ndim))
+
+    if array.ndim < 2:
+        array = array.reshape(-1, 1)
+
+    return [list(map(value_code, row[:columns].tolist()))
+            for row in array[:rows]]
@@ -112,6 +112,11 @@ class PysReader:
         for cell_attribute in self.cell_attributes_postfixes:
             self.code_array.cell_attributes.append(cell_attribute)
 
+    def tell(self):
+        """Returns number of bytes of pys_file that have been read"""
+
+        return self.pys_file.tell()
+
     # Decorators
 
     def version_handler(method):
@@ -435,14 +440,20 @@ class PysWriter(object):
 
         yield u"\t".join(map(str, self.code_array.shape)) + u"\n"
 
-    def _code2pys(self):
+    def _code2pys(self, keys=None):
         """Writes code to pys file
 
         Format: <row>\t<col>\t<tab>\t<code>\n
 
+        :param keys: Keys of cells to be written, all cells if None
+        :type keys: Iterable of 3-tuple of int, optional
+
         """
 
-        for key in self.code_array:
+        if keys is None:
+            keys = self.code_array
+
+        for key in keys:
             key_str = u"\t".join(repr(ele) for ele in key)
             if self.version <= 1.0:
                 code_str = self.code_array(key)
@@ -452,18 +463,24 @@ class PysWriter(object):
 
             yield out_str
 
-    def _attributes2pys(self):
+    def _attributes2pys(self, cell_attributes=None):
         """Writes attributes to pys file
 
         Format:
         <selection[0]>\t[...]\t<tab>\t<key>\t<value>\t[...]\n
 
+        :param cell_attributes: Attributes to be written, all if None
+        :type cell_attributes: Iterable of 3-tuple, optional
+
         """
 
+        if cell_attributes is None:
+            cell_attributes = self.code_array.cell_attributes
+
         # Remove doublettes
         purged_cell_attributes = []
         purged_cell_attributes_keys = []
-        for selection, tab, attr_dict in self.code_array.cell_attributes:
+        for selection, tab, attr_dict in cell_attributes:
             if purged_cell_attributes_keys and \
                (selection, tab) == purged_cell_attributes_keys[-1]:
                 purged_cell_attributes[-1][2].update(attr_dict)
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+pysb
+====
+
+This file contains interfaces to the binary pysb file format.
+
+A pysb file is a container of independently zlib compressed chunks:
+
+ * Header: MAGIC
+ * One chunk per section: shape, attributes, row_heights, col_widths, macros
+ * One chunk of cell code per table
+ * Index: repr of a dict that maps sections and tables to chunk positions
+ * Trailer: index offset, index length and MAGIC
+
+Each chunk contains the lines of the respective pys section so that the
+pys readers and writers are re-used. Since the index is located at the end,
+a pysb file is written in a single stream.
+
+When a pysb file is read, only the sections are parsed. The cell code of a
+table is decompressed and parsed when the table is accessed first.
+
+"""
+
+import ast
+import io
+import mmap
+import struct
+import zlib
+from collections import defaultdict
+
+from interfaces.pys import PysReader, PysWriter
+
+MAGIC = b"\x89PYSB\r\n\x1a\n"
+TRAILER = struct.Struct("<QQ")  # Index offset, index length
+
+SECTIONS = ["shape", "attributes", "row_heights", "col_widths", "macros"]
+
+
+class PysbReader(PysReader):
+    """Reads pysb v1.0 file into a code_array
+
+    Iterating over the reader reads all sections and yields their names.
+    The tables' cell code is registered for lazy loading in the code_array's
+    :class:`~model.model.DictGrid`.
+
+    The file is memory mapped if possible. The memory map stays valid after
+    closing pysb_file and is released when all tables have been loaded.
+
+    Parameters
+    ----------
+
+    pysb_file: File object in binary mode
+    \tThe pysb file
+    code_array: model.CodeArray object
+    \tThe code_array object data structure
+
+    """
+
+    def __init__(self, pysb_file, code_array):
+        super().__init__(pysb_file, code_array)
+
+        self.data = None
+        self.tables = {}  # table: (offset, length) of its code chunk
+        self.position = 0  # End of the last section that has been read
+
+    def __iter__(self):
+        """Iterates over the sections, replacing everything in code_array"""
+
+        self.data = self._map_file()
+        index = self._read_index()
+
+        self.version = index["pys_version"]
+
+        for section in SECTIONS:
+            reader = self._section2reader["[{}]\n".format(section)]
+            offset, length = index["sections"][section]
+            for line in self._lines(offset, length):
+                reader(line)
+            if section == SECTIONS[-1]:
+                # The table chunks are only read when they are loaded
+                self.position = len(self.data)
+            else:
+                self.position = offset + length
+            yield section
+
+        self.tables = dict(index["tables"])
+
+        if self.tables:
+            dict_grid = self.code_array.dict_grid
+            dict_grid.unloaded_tables.update(self.tables)
+            dict_grid.table_loader = self
+        else:
+            self._release()
+
+    def tell(self):
+        """Returns number of bytes of the file that have been processed
+
+        The file is memory mapped so that the position of pysb_file does not
+        change. Table chunks count as processed after the last section.
+
+        """
+
+        return self.position
+
+    def load_table(self, table):
+        """Reads the cell code of table into code_array
+
+        :param table: Table to be loaded
+        :type table: int
+
+        """
+
+        for line in self._lines(*self.tables.pop(table)):
+            self._pys2code(line)
+
+        if not self.tables:
+            self._release()
+
+    def copy(self, code_array):
+        """Returns reader of the unloaded tables that reads into code_array
+
+        The compressed chunks of the unloaded tables are copied. Therefore,
+        the returned reader does not access the file of this reader, and it
+        can be used in another thread.
+
+        :param code_array: Code array, into which the tables are loaded
+        :type code_array: model.CodeArray
+
+        """
+
+        reader = PysbReader(None, code_array)
+        reader.version = self.version
+
+        chunks = []
+        offset = 0
+        for table, (chunk_offset, length) in self.tables.items():
+            chunks.append(self.data[chunk_offset:chunk_offset+length])
+            reader.tables[table] = offset, length
+            offset += length
+        reader.data = b"".join(chunks)
+
+        return reader
+
+    def _map_file(self):
+        """Returns memory map of pysb_file or its content as fallback"""
+
+        try:
+            return mmap.mmap(self.pys_file.fileno(), 0,
+                             access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            # E.g. in-memory or empty files
+            self.pys_file.seek(0)
+            return self.pys_file.read()
+
+    def _release(self):
+        """Releases the file data"""
+
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = None
+
+    def _read_index(self):
+        """Returns index dict of the file after checking header and trailer"""
+
+        data = self.data
+        size = len(data)
+        trailer_start = size - TRAILER.size - len(MAGIC)
+
+        if trailer_start < len(MAGIC) \
+           or data[:len(MAGIC)] != MAGIC or data[size - len(MAGIC):] != MAGIC:
+            raise ValueError("File is not a valid pysb file.")
+
+        offset, length = \
+            TRAILER.unpack(data[trailer_start:trailer_start + TRAILER.size])
+
+        try:
+            index = ast.literal_eval(data[offset:offset+length].decode("utf8"))
+        except (SyntaxError, ValueError, UnicodeDecodeError):
+            raise ValueError("Index of pysb file is corrupt.")
+
+        if index["version"] > 1.0:
+            # Abort if file version not supported
+            msg = "File version {version} unsupported (> 1.0)."
+            raise ValueError(msg.format(version=index["version"]))
+
+        return index
+
+    def _lines(self, offset, length):
+        """Yields decoded lines of a compressed chunk"""
+
+        try:
+            chunk = zlib.decompress(self.data[offset:offset+length])
+        except zlib.error as err:
+            raise ValueError("Chunk of pysb file is corrupt: {}".format(err))
+
+        for line in io.BytesIO(chunk):
+            yield line.decode("utf8")
+
+
+class PysbWriter(PysWriter):
+    """Interface between code_array and pysb file data
+
+    Iterating over it yields the pysb file as chunks of bytes
+
+    Parameters
+    ----------
+
+    code_array: model.CodeArray object
+    \tThe code_array object data structure
+
+    """
+
+    def __init__(self, code_array):
+        super().__init__(code_array)
+
+        self.pysb_version = 1.0
+
+    def __iter__(self):
+        """Yields a pysb_file bytes chunk wise from code_array"""
+
+        index = {
+            "version": self.pysb_version,
+            "pys_version": self.version,
+            "sections": {},
+            "tables": {},
+        }
+
+        yield MAGIC
+        offset = len(MAGIC)
+
+        for section in SECTIONS:
+            writer = self._section2writer["[{}]\n".format(section)]
+            start = offset
+            for chunk in self._compress(writer()):
+                offset += len(chunk)
+                yield chunk
+            index["sections"][section] = start, offset - start
+
+        for table, keys in self._keys_per_table():
+            start = offset
+            for chunk in self._compress(self._code2pys(keys)):
+                offset += len(chunk)
+                yield chunk
+            index["tables"][table] = start, offset - start
+
+        index_data = bytes(repr(index), "utf-8")
+        yield index_data
+        yield TRAILER.pack(offset, len(index_data)) + MAGIC
+
+    def _keys_per_table(self):
+        """Returns sorted list of tables and their cell keys"""
+
+        keys_per_table = defaultdict(list)
+        for key in self.code_array:
+            keys_per_table[key[2]].append(key)
+
+        return sorted(keys_per_table.items())
+
+    def _compress(self, lines):
+        """Yields compressed data of a chunk, one item per line"""
+
+        compressor = zlib.compressobj()
+        for line in lines:
+            yield compressor.compress(bytes(line, "utf-8"))
+        yield compressor.flush()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+
+"""
+test_journal
+============
+
+Unit tests for journal.py
+
+"""
+
+from io import BytesIO
+from os.path import abspath, dirname, join
+import sys
+
+pyspread_path = abspath(join(dirname(__file__) + "/../.."))
+sys.path.insert(0, pyspread_path)
+
+from interfaces.journal import JournalReader, JournalWriter
+from model.model import CodeArray
+from lib.hashing import genkey
+from lib.selection import Selection
+sys.path.pop(0)
+
+KEY = genkey()
+
+
+class Settings:
+    """Simulates settings class"""
+
+    timeout = 1000
+
+
+def get_code_array():
+    """Returns CodeArray with some content"""
+
+    code_array = CodeArray((100, 10, 3), Settings())
+    code_array[0, 0, 0] = "1"
+    code_array[1, 0, 0] = "2"
+    code_array.macros = "a = 1\n"
+
+    return code_array
+
+
+def change(code_array):
+    """Changes code_array content in all sections"""
+
+    code_array[0, 0, 0] = "'changed'"
+    code_array.pop((1, 0, 0))
+    code_array[2, 2, 2] = "[1,\n 2]"
+    code_array.cell_attributes.append((Selection([], [], [], [], [(0, 0)]),
+                                       0, {"bgcolor": (255, 0, 0)}))
+    code_array.col_widths[(1, 2)] = 120.0
+    code_array.macros = "a = 2\n"
+
+
+def get_state(code_array):
+    """Returns comparable state of code_array"""
+
+    return (sorted(code_array.dict_grid.items()),
+            list(code_array.cell_attributes),
+            dict(code_array.row_heights), dict(code_array.col_widths),
+            code_array.macros)
+
+
+def test_write_replay():
+    """Unit test for writing and replaying journal entries"""
+
+    code_array = get_code_array()
+    writer = JournalWriter(code_array)
+    change(code_array)
+    entry1, signature1 = writer.entry(b"file signature", KEY)
+    writer.snapshot()
+    code_array[3, 3, 1] = "3"
+    entry2, signature2 = writer.entry(signature1, KEY)
+
+    replayed_code_array = get_code_array()
+    reader = JournalReader(BytesIO(entry1 + entry2), replayed_code_array,
+                           b"file signature", KEY)
+
+    assert list(reader) == [1, 2]
+    assert reader.verified
+    assert reader.signature == signature2
+    assert get_state(replayed_code_array) == get_state(code_array)
+
+
+def test_empty_entry():
+    """Unit test for journal entry without changes"""
+
+    writer = JournalWriter(get_code_array())
+
+    assert writer.entry(b"file signature", KEY) == (b"", b"file signature")
+
+
+def test_invalid_signature():
+    """Unit test for replaying journal for a different file"""
+
+    code_array = get_code_array()
+    writer = JournalWriter(code_array)
+    change(code_array)
+    entry, _ = writer.entry(b"file signature", KEY)
+
+    replayed_code_array = get_code_array()
+    reader = JournalReader(BytesIO(entry), replayed_code_array,
+                           b"other signature", KEY)
+
+    assert list(reader) == []
+    assert not reader.verified
+    assert get_state(replayed_code_array) == get_state(get_code_array())
+
+
+def test_incomplete_entry():
+    """Unit test for replaying journal with entry that has not been commited"""
+
+    code_array = get_code_array()
+    writer = JournalWriter(code_array)
+    change(code_array)
+    entry, _ = writer.entry(b"file signature", KEY)
+
+    replayed_code_array = get_code_array()
+    reader = JournalReader(BytesIO(entry[:-10]), replayed_code_array,
+                           b"file signature", KEY)
+
+    assert list(reader) == []
+    assert get_state(replayed_code_array) == get_state(get_code_array())
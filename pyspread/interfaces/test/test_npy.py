@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+
+"""
+test_npy
+========
+
+Unit tests for npy.py
+
+"""
+
+from io import BytesIO
+from os.path import abspath, dirname, join
+import sys
+
+import numpy
+import py.test as pytest
+
+pyspread_path = abspath(join(dirname(__file__) + "/../.."))
+sys.path.insert(0, pyspread_path)
+
+from interfaces.npy import (typed_array, save_npy, save_npz, load_npy,
+                            array_codes)
+sys.path.pop(0)
+
+
+param_test_typed_array = [
+    ([[1, 2], [3, 4]], numpy.int64),
+    ([[1, None], [2.5, 3]], numpy.float64),
+    ([[True, False]], bool),
+    ([[1, True]], object),
+    ([["a", "bc"]], numpy.dtype("<U2")),
+    ([[1j, None]], numpy.complex128),
+    ([[None, None]], object),
+    ([[2**70, 1]], object),
+    ([[[1, 2], 3]], object),
+]
+
+
+@pytest.mark.parametrize("results, dtype", param_test_typed_array)
+def test_typed_array(results, dtype):
+    """Unit test for typed_array"""
+
+    array = typed_array(results)
+
+    assert array.dtype == dtype
+    assert array.shape == (len(results), len(results[0]))
+
+
+def test_save_npz():
+    """Unit test for save_npz"""
+
+    npz_file = BytesIO()
+    save_npz(npz_file, [[1, "a"], [None, "b"]], first_column=3)
+    npz_file.seek(0)
+
+    arrays = numpy.load(npz_file)
+
+    assert arrays["column_3"].dtype == numpy.float64
+    assert arrays["column_4"].tolist() == ["a", "b"]
+
+
+def test_load_npy_array_codes(tmp_path):
+    """Unit test for save_npy, load_npy and array_codes"""
+
+    filepath = tmp_path / "test.npy"
+    with open(filepath, "wb") as npy_file:
+        save_npy(npy_file, [[1.5, None, 3], [4, 5, 6]])
+
+    array = load_npy(filepath)
+
+    assert isinstance(array, numpy.memmap)
+    assert array_codes(array, 10, 2) == [["1.5", "float('nan')"],
+                                         ["4.0", "5.0"]]
+    assert array_codes(array[0], 2, 10) == [["1.5"], ["float('nan')"]]
+
+    with open(filepath, "wb") as npy_file:
+        save_npy(npy_file, [[1, "a"]])
+
+    with pytest.raises(ValueError):
+        load_npy(filepath)
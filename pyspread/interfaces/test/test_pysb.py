@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+
+"""
+test_pysb
+=========
+
+Unit tests for pysb.py
+
+"""
+
+from io import BytesIO
+from os.path import abspath, dirname, join
+import sys
+
+import py.test as pytest
+
+pyspread_path = abspath(join(dirname(__file__) + "/../.."))
+sys.path.insert(0, pyspread_path)
+
+from interfaces.pysb import PysbReader, PysbWriter
+from model.model import CodeArray
+from lib.selection import Selection
+sys.path.pop(0)
+
+
+class Settings:
+    """Simulates settings class"""
+
+    timeout = 1000
+
+
+def get_code_array():
+    """Returns CodeArray with content in several tables"""
+
+    code_array = CodeArray((100, 10, 3), Settings())
+    code_array[0, 0, 0] = "1 + 2"
+    code_array[5, 3, 0] = "'\\nTab\\t'"
+    code_array[99, 9, 2] = "[x for x in range(3)]"
+    code_array.cell_attributes.append((Selection([], [], [], [], [(1, 1)]),
+                                       2, {"bgcolor": (255, 0, 0)}))
+    code_array.row_heights[(3, 1)] = 45.0
+    code_array.col_widths[(2, 2)] = 120.0
+    code_array.macros = "a = 5\n\ndef f(x):\n    return x\f\n"
+
+    return code_array
+
+
+def write_read(code_array):
+    """Returns new CodeArray that is read from written code_array"""
+
+    pysb_file = BytesIO(b"".join(PysbWriter(code_array)))
+
+    read_code_array = CodeArray((1, 1, 1), Settings())
+    sections = list(PysbReader(pysb_file, read_code_array))
+
+    assert sections == ["shape", "attributes", "row_heights", "col_widths",
+                        "macros"]
+
+    return read_code_array
+
+
+def test_write_read():
+    """Unit test for writing and reading a pysb file"""
+
+    code_array = get_code_array()
+    read_code_array = write_read(code_array)
+
+    assert read_code_array.shape == code_array.shape
+    assert read_code_array.macros == code_array.macros
+    assert read_code_array.row_heights == code_array.row_heights
+    assert read_code_array.col_widths == code_array.col_widths
+    assert list(read_code_array.cell_attributes) == \
+        list(code_array.cell_attributes)
+    assert dict(read_code_array.dict_grid.items()) == \
+        dict(code_array.dict_grid.items())
+
+
+def test_tell():
+    """Unit test for the progress of reading a pysb file"""
+
+    data = b"".join(PysbWriter(get_code_array()))
+    reader = PysbReader(BytesIO(data), CodeArray((1, 1, 1), Settings()))
+
+    positions = [reader.tell() for section in reader]
+
+    assert positions == sorted(positions)
+    assert 0 < positions[0] < positions[-2] < positions[-1] == len(data)
+
+
+def test_lazy_tables():
+    """Unit test for lazy loading of tables"""
+
+    code_array = write_read(get_code_array())
+    dict_grid = code_array.dict_grid
+
+    assert dict_grid.unloaded_tables == {0, 2}
+
+    assert code_array((99, 9, 2)) == "[x for x in range(3)]"
+    assert dict_grid.unloaded_tables == {0}
+
+    assert code_array((1, 1, 1)) is None
+    assert dict_grid.unloaded_tables == {0}
+
+    assert sorted(code_array.keys()) == [(0, 0, 0), (5, 3, 0), (99, 9, 2)]
+    assert not dict_grid.unloaded_tables
+    assert dict_grid.table_loader is None
+
+
+def test_copy():
+    """Unit test for copying the reader of unloaded tables"""
+
+    code_array = write_read(get_code_array())
+    dict_grid = code_array.dict_grid
+    code_array((99, 9, 2))
+
+    copy_code_array = CodeArray((1, 1, 1), Settings())
+    copy_dict_grid = copy_code_array.dict_grid
+    copy_dict_grid.unloaded_tables.update(dict_grid.unloaded_tables)
+    copy_dict_grid.table_loader = dict_grid.table_loader.copy(copy_code_array)
+
+    assert sorted(copy_code_array.keys()) == [(0, 0, 0), (5, 3, 0)]
+    assert not copy_dict_grid.unloaded_tables
+
+    # The original tables are still unloaded
+    assert dict_grid.unloaded_tables == {0}
+    assert sorted(code_array.keys()) == [(0, 0, 0), (5, 3, 0), (99, 9, 2)]
+
+
+def test_invalid_file():
+    """Unit test for reading a file that is no pysb file"""
+
+    code_array = CodeArray((1, 1, 1), Settings())
+
+    with pytest.raises(ValueError):
+        list(PysbReader(BytesIO(b"[shape]\n1\t1\t1\n"), code_array))
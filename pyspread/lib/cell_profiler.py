@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+Profiler for cell evaluations
+
+The profiler is attached to a :class:`model.model.CodeArray` via its
+`profiler` attribute. It is not called if the attribute is None.
+
+**Provides**
+
+* :class:`CellStats`: Evaluation statistics of one cell
+* :class:`CellProfiler`: Records evaluation statistics of all cells
+
+"""
+
+import csv
+try:
+    from dataclasses import dataclass, asdict
+except ImportError:
+    from lib.dataclasses import dataclass, asdict  # Python 3.6 compatibility
+import json
+import sys
+from time import perf_counter
+
+
+@dataclass
+class CellStats:
+    """Evaluation statistics of one cell
+
+    Times are wall clock times in seconds. The cumulative time includes the
+    evaluation of cells that the cell references, the self time excludes it.
+
+    """
+
+    row: int
+    column: int
+    table: int
+    count: int = 0
+    cumulative_time: float = 0.0
+    self_time: float = 0.0
+    last_time: float = 0.0
+    result_size: int = 0
+
+
+def result_size(result):
+    """Returns approximate memory size of a cell result in bytes"""
+
+    try:
+        return result.nbytes  # numpy arrays
+    except AttributeError:
+        pass
+
+    try:
+        return sys.getsizeof(result)
+    except TypeError:
+        return 0
+
+
+class CellProfiler:
+    """Records evaluation count, times and result size for each cell"""
+
+    fields = ("row", "column", "table", "count", "cumulative_time",
+              "self_time", "last_time", "result_size")
+
+    def __init__(self):
+        self.stats = {}  # Maps key to CellStats
+
+        # Time that is spent in cells that are evaluated by outer cells
+        self._child_times = []
+
+    def start(self):
+        """Starts timing a cell evaluation and returns the start time"""
+
+        self._child_times.append(0.0)
+        return perf_counter()
+
+    def stop(self, key, start, result):
+        """Stops timing a cell evaluation
+
+        :param key: Key of the evaluated cell
+        :type key: tuple
+        :param start: Start time that has been returned by :meth:`start`
+        :type start: float
+        :param result: Result of the cell evaluation
+
+        """
+
+        duration = perf_counter() - start
+        child_time = self._child_times.pop()
+        if self._child_times:
+            self._child_times[-1] += duration
+
+        try:
+            stats = self.stats[key]
+        except KeyError:
+            stats = self.stats[key] = CellStats(*key)
+
+        stats.count += 1
+        stats.cumulative_time += duration
+        stats.self_time += duration - child_time
+        stats.last_time = duration
+        stats.result_size = result_size(result)
+
+    def clear(self):
+        """Removes all statistics"""
+
+        self.stats.clear()
+        self._child_times.clear()
+
+    def slowest(self, number=None, sort_field="cumulative_time"):
+        """Returns list of CellStats, slowest cells first
+
+        :param number: Maximum number of returned cells, None for all
+        :type number: int
+        :param sort_field: CellStats attribute that is used for sorting
+        :type sort_field: str
+
+        """
+
+        stats = sorted(self.stats.values(),
+                       key=lambda cell_stats: getattr(cell_stats, sort_field),
+                       reverse=True)
+        return stats[:number]
+
+    def write_csv(self, textfile):
+        """Writes statistics of all cells as csv, slowest cells first
+
+        :param textfile: File object opened in text mode with newline=''
+
+        """
+
+        writer = csv.writer(textfile)
+        writer.writerow(self.fields)
+        for stats in self.slowest():
+            writer.writerow(getattr(stats, field) for field in self.fields)
+
+    def write_json(self, textfile):
+        """Writes statistics of all cells as json, slowest cells first
+
+        :param textfile: File object opened in text mode
+
+        """
+
+        json.dump([asdict(stats) for stats in self.slowest()], textfile,
+                  indent=2)
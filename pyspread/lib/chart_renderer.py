@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+Rendering of matplotlib figures into images in a worker thread
+
+**Provides**
+
+* :data:`figure_lock`: Lock that is held while a figure is rendered
+* :func:`figure2qimage`: Renders figure into a QImage
+* :class:`ChartRenderer`: Renders figures in a worker thread
+
+"""
+
+from threading import RLock
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage
+
+# Rendering and saving change dpi and canvas of the figure temporarily.
+# Therefore, figures that may be rendered in the worker thread must only be
+# rendered or saved while this lock is held.
+figure_lock = RLock()
+
+
+def figure2qimage(figure, dpi):
+    """Returns QImage of figure that is rendered by the Agg backend
+
+    The figure is rendered while figure_lock is held.
+
+    :param figure: Figure to be rendered
+    :type figure: matplotlib.figure.Figure
+    :param dpi: Resolution of the rendered figure
+    :type dpi: float
+
+    """
+
+    from lib.charts import fig2rgba
+
+    with figure_lock:
+        rgba = fig2rgba(figure, dpi)
+    height, width = rgba.shape[:2]
+
+    # The copy owns its data so that rgba may be garbage collected
+    return QImage(rgba.data, width, height, 4 * width,
+                  QImage.Format_RGBA8888).copy()
+
+
+class ChartRenderJob(QRunnable):
+    """Renders one figure and emits the rendered signal of its renderer
+
+    :param renderer: Renderer that emits the result
+    :type renderer: ChartRenderer
+    :param key: Key that identifies the job
+    :param figure: Figure to be rendered
+    :type figure: matplotlib.figure.Figure
+    :param dpi: Resolution of the rendered figure
+    :type dpi: float
+
+    """
+
+    def __init__(self, renderer, key, figure, dpi):
+        super().__init__()
+
+        self.renderer = renderer
+        self.key = key
+        self.figure = figure
+        self.dpi = dpi
+
+    def run(self):
+        """Renders the figure, the QImage is None if rendering fails"""
+
+        try:
+            qimage = figure2qimage(self.figure, self.dpi)
+        except Exception:  # Figures are created by user code
+            qimage = None
+
+        self.renderer.rendered.emit(self.key, self.figure, qimage)
+
+
+class ChartRenderer(QObject):
+    """Renders matplotlib figures into QImages in a worker thread
+
+    The signal rendered is emitted in the thread of the renderer with the
+    job key, the figure and the QImage, which is None if rendering failed.
+
+    :param parent: Parent object
+    :type parent: QObject
+
+    """
+
+    rendered = pyqtSignal(object, object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # matplotlib is not thread safe. Therefore, figures are rendered
+        # one after the other.
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+
+        self.pending = set()  # Keys of jobs that have not finished yet
+
+        # Connected first so that pending is updated before other slots run
+        self.rendered.connect(self._on_rendered)
+
+    def _on_rendered(self, key, figure, qimage):
+        """Removes key of finished job from pending"""
+
+        self.pending.discard(key)
+
+    def render(self, key, figure, dpi):
+        """Starts rendering figure unless a job with the same key is pending
+
+        :param key: Hashable key that identifies the job
+        :param figure: Figure to be rendered
+        :type figure: matplotlib.figure.Figure
+        :param dpi: Resolution of the rendered figure
+        :type dpi: float
+
+        """
+
+        if key in self.pending:
+            return
+
+        self.pending.add(key)
+        self.thread_pool.start(ChartRenderJob(self, key, figure, dpi))
+
+    def wait(self):
+        """Waits until all jobs are done"""
+
+        self.thread_pool.waitForDone()
@@ -27,6 +27,10 @@ Provides matplotlib figure that are chart templates
 Provides
 --------
 
+* fig2x: Export matplotlib figure
+* fig2rgba: Render matplotlib figure to RGBA array
+* minmax_decimate: Downsample line plot data
+* grid_decimate: Downsample scatter plot data
 * ChartFigure: Main chart class
 
 """
@@ -36,6 +40,8 @@ from io import StringIO
 import datetime
 from collections import OrderedDict
 
+import numpy
+
 try:
     from matplotlib.figure import Figure
     from matplotlib.sankey import Sankey
@@ -60,6 +66,172 @@ def fig2x(figure, format):
     return data
 
 
+def fig2rgba(figure, dpi):
+    """Returns figure rendered by the Agg backend as RGBA numpy array
+
+    The array has the shape (height, width, 4). The figure canvas and dpi
+    are restored after rendering.
+
+    :param figure: Figure to be rendered
+    :type figure: matplotlib.figure.Figure
+    :param dpi: Resolution of the rendered figure
+    :type dpi: float
+
+    """
+
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    canvas = figure.canvas
+    figure_dpi = figure.dpi
+
+    agg_canvas = FigureCanvasAgg(figure)
+    try:
+        figure.dpi = dpi
+        agg_canvas.draw()
+        return numpy.array(agg_canvas.buffer_rgba())
+    finally:
+        figure.dpi = figure_dpi
+        figure.set_canvas(canvas)
+
+
+def _finite_arrays(xdata, ydata):
+    """Returns float arrays of xdata and ydata or None if not possible
+
+    None is returned if the data is not numeric or not finite.
+
+    """
+
+    try:
+        x = numpy.asarray(xdata, dtype=float)
+        y = numpy.asarray(ydata, dtype=float)
+    except (TypeError, ValueError):
+        return
+
+    if x.ndim != 1 or x.shape != y.shape \
+       or not numpy.isfinite(x).all() or not numpy.isfinite(y).all():
+        return
+
+    return x, y
+
+
+def minmax_decimate(xdata, ydata, buckets, xlim=None):
+    """Returns downsampled xdata, ydata of a line plot
+
+    The x range is divided into equally wide buckets. For each bucket, the
+    first, the last, the minimum and the maximum point are kept. If a bucket
+    is not wider than a pixel, the line looks the same as the original line.
+
+    If xlim is given, the buckets span xlim instead of the data range. Points
+    left and right of xlim are collected in one bucket per side.
+
+    The data is returned unchanged if it is short, not numeric, not finite
+    or if xdata is not sorted.
+
+    :param xdata: x values
+    :type xdata: Iterable
+    :param ydata: y values
+    :type ydata: Iterable
+    :param buckets: Number of buckets
+    :type buckets: int
+    :param xlim: Visible x range (left, right), None for the data range
+    :type xlim: tuple
+
+    """
+
+    if len(xdata) <= 4 * buckets:
+        return xdata, ydata
+
+    arrays = _finite_arrays(xdata, ydata)
+    if arrays is None:
+        return xdata, ydata
+    x, y = arrays
+
+    if (numpy.diff(x) < 0).any():
+        return xdata, ydata
+
+    if xlim is None:
+        left, right = x[0], x[-1]
+    else:
+        try:
+            left, right = sorted(map(float, xlim))
+        except (TypeError, ValueError):
+            return xdata, ydata
+
+    if not numpy.isfinite((left, right)).all() or left == right:
+        return xdata, ydata
+
+    bucket_ids = numpy.floor((x - left) / (right - left) * buckets)
+    bucket_ids = numpy.clip(bucket_ids, -1, buckets).astype(int)
+
+    # Non-empty buckets are contiguous slices of x
+    starts = numpy.flatnonzero(numpy.diff(bucket_ids,
+                                          prepend=bucket_ids[0] - 1))
+    ends = numpy.append(starts[1:], len(x)) - 1
+    slice_ids = numpy.cumsum(numpy.diff(bucket_ids, prepend=bucket_ids[0])
+                             != 0)
+
+    def first_indices(is_extremum):
+        """Returns index of first extremum in each slice"""
+
+        indices = numpy.flatnonzero(is_extremum)
+        return indices[numpy.diff(slice_ids[indices], prepend=-1) != 0]
+
+    minima = numpy.minimum.reduceat(y, starts)[slice_ids]
+    maxima = numpy.maximum.reduceat(y, starts)[slice_ids]
+
+    indices = numpy.unique(numpy.concatenate((
+        starts, ends, first_indices(y == minima), first_indices(y == maxima))))
+    return x[indices], y[indices]
+
+
+def grid_decimate(xdata, ydata, x_buckets, y_buckets):
+    """Returns downsampled xdata, ydata of a scatter plot
+
+    The data range is divided into a grid of buckets. For each bucket, the
+    first point is kept. If a bucket is not larger than a pixel, the plot
+    looks the same as the original plot.
+
+    The data is returned unchanged if it is short, not numeric or not finite.
+
+    :param xdata: x values
+    :type xdata: Iterable
+    :param ydata: y values
+    :type ydata: Iterable
+    :param x_buckets: Number of buckets in x direction
+    :type x_buckets: int
+    :param y_buckets: Number of buckets in y direction
+    :type y_buckets: int
+
+    """
+
+    if len(xdata) <= x_buckets:
+        return xdata, ydata
+
+    arrays = _finite_arrays(xdata, ydata)
+    if arrays is None:
+        return xdata, ydata
+    x, y = arrays
+
+    def bucket_ids(data, buckets):
+        data_range = data.max() - data.min()
+        if data_range == 0:
+            return numpy.zeros(len(data), dtype=int)
+        ids = ((data - data.min()) / data_range * buckets).astype(int)
+        return numpy.minimum(ids, buckets - 1)
+
+    cell_ids = bucket_ids(x, x_buckets) * y_buckets + bucket_ids(y, y_buckets)
+    __, indices = numpy.unique(cell_ids, return_index=True)
+    indices.sort()
+
+    return x[indices], y[indices]
+
+
+def _is_numeric_array(data):
+    """Returns True if data is a numpy array of numbers"""
+
+    return isinstance(data, numpy.ndarray) and data.dtype.kind in "biuf"
+
+
 class ChartFigure(Figure):
     """Chart figure class with drawing method"""
 
@@ -97,6 +269,10 @@ class ChartFigure(Figure):
         "hatches": "hatches",
     }
 
+    # Buckets per inch of figure width for downsampling plot data.
+    # This resolution is sufficient for displaying a figure at 4x its size.
+    downsample_dpi = 400
+
     def __init__(self, *attributes):
 
         Figure.__init__(self, (5.0, 4.0), facecolor="white")
@@ -182,6 +358,42 @@ class ChartFigure(Figure):
 
                 key2setter[key](axes_data[key], **kwargs)
 
+    def _downsample(self, series, xdata, ydata):
+        """Returns downsampled xdata, ydata of a plot series
+
+        Lines without markers are reduced by min/max decimation over the
+        visible x range and markers without lines are reduced by grid
+        decimation. Other series, series
+        on non-linear axes and charts with "downsample" set to False in the
+        axes data are left unchanged.
+
+        """
+
+        axes_data = self.attributes[0]
+        if not axes_data.get("downsample", True) \
+           or axes_data.get("xscale", "linear") != "linear" \
+           or axes_data.get("yscale", "linear") != "linear":
+            return xdata, ydata
+
+        width, height = self.get_size_inches()
+        x_buckets = int(width * self.downsample_dpi)
+        y_buckets = int(height * self.downsample_dpi)
+
+        marker = series.get("marker")
+        has_marker = marker not in (None, "", " ", "None", "none")
+        linestyle = series.get("linestyle", "-")
+        has_line = linestyle not in (None, "", " ", "None", "none")
+
+        if has_line and not has_marker:
+            return minmax_decimate(xdata, ydata, x_buckets,
+                                   axes_data.get("xlim"))
+
+        if has_marker and not has_line \
+           and not axes_data.get("xlim") and not axes_data.get("ylim"):
+            return grid_decimate(xdata, ydata, x_buckets, y_buckets)
+
+        return xdata, ydata
+
     def _setup_legend(self, axes_data):
         """Sets up legend for drawing chart"""
 
@@ -209,6 +421,9 @@ class ChartFigure(Figure):
                len(series[x_str]) != len(series[y_str]):
                 # Wrong length --> ignore xdata
                 series[x_str] = list(range(len(series[y_str])))
+            elif _is_numeric_array(series[x_str]):
+                # Numbers do not need to be decoded
+                pass
             else:
                 # Solve the problem that the series data may contain utf-8 data
                 series_list = list(series[x_str])
@@ -229,9 +444,15 @@ class ChartFigure(Figure):
                     # Remove attr if it is a fixed (non-kwd) attr
                     # If a fixed attr is missing, insert a dummy
                     try:
-                        fixed_attrs.append(tuple(series.pop(attr)))
+                        data = series.pop(attr)
                     except KeyError:
-                        fixed_attrs.append(())
+                        data = ()
+                    if not _is_numeric_array(data):
+                        data = tuple(data)
+                    fixed_attrs.append(data)
+
+            if chart_type_string == "plot" and all(map(len, fixed_attrs)):
+                fixed_attrs = list(self._downsample(series, *fixed_attrs))
 
             # Remove contour chart label info from series
             cl_attrs = {}
@@ -247,7 +468,7 @@ class ChartFigure(Figure):
                     cf_attrs[self.contourf_attrs[contourf_attr]] = \
                         series.pop(contourf_attr)
 
-            if not fixed_attrs or all(fixed_attrs):
+            if not fixed_attrs or all(map(len, fixed_attrs)):
                 # Draw series to axes
 
                 # Do we have a Sankey plot --> build it
@@ -27,8 +27,12 @@ Provides
 --------
 
  * sniff: Sniffs CSV dialect and header info
+ * infer_digest_types: Infers digest types of CSV columns
  * get_first_line
  * csv_digest_gen
+ * csv_digest_chunks: Digests CSV file in chunks, in parallel if possible
+ * convert: Converts string to cell code of digest type
+ * convert_column: Converts strings to cell code of digest type
  * cell_key_val_gen
  * Digest: Converts any object to target type as good as possible
  * CsvInterface
@@ -37,9 +41,26 @@ Provides
 """
 
 import ast
+import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
 import csv
+from io import StringIO
+from itertools import islice, zip_longest
+from locale import getpreferredencoding
+import mmap
+import multiprocessing
+import os
+import re
+
 from dateutil.parser import parse
 
+CHUNK_SIZE = 2 ** 22  # Bytes per chunk for parallel csv import
+CHUNK_LINES = 1000  # Lines per chunk for sequential csv import
+
+DIALECT_PARAMETERS = ["delimiter", "doublequote", "escapechar",
+                      "lineterminator", "quotechar", "quoting",
+                      "skipinitialspace", "strict"]
+
 
 def sniff(filepath, sniff_size):
     """Sniffs CSV dialect and header info
@@ -60,6 +81,84 @@ def sniff(filepath, sniff_size):
     return dialect
 
 
+def _infer_digest_type(strings):
+    """Returns digest type that fits all non-empty strings of a csv column
+
+    Numbers with leading zeros, e.g. zip codes, are kept as strings.
+    Columns of True and False are digested as object because the bool
+    handler digests every non-empty string as True.
+
+    """
+
+    values = [string for string in strings if string]
+
+    if not values:
+        return 'repr'
+
+    if set(values) <= {"True", "False"}:
+        return 'object'
+
+    if not any(LEADING_ZERO_PATTERN.match(value) for value in values):
+        for digest_type in 'int', 'float':
+            try:
+                for value in values:
+                    typehandlers[digest_type](value)
+            except (ValueError, OverflowError):
+                continue
+            return digest_type
+
+    if not all(ISO_PATTERN.fullmatch(value) for value in values):
+        return 'repr'
+
+    has_dates = {"-" in value for value in values}
+    has_times = {":" in value for value in values}
+
+    if has_dates == {True}:
+        digest_type = 'datetime' if True in has_times else 'date'
+    elif has_dates == {False}:
+        digest_type = 'time'
+    else:
+        return 'repr'
+
+    try:
+        for value in values:
+            ISO_HANDLERS[digest_type](value)
+    except ValueError:
+        return 'repr'  # E.g. invalid day
+
+    return digest_type
+
+
+def infer_digest_types(filepath, dialect, sniff_size):
+    """Infers digest types of csv columns from the start of the file
+
+    Detects int, float, date, datetime, time and bool (as object) columns.
+    Other columns are digested as repr.
+
+    :filepath: pathlib.Path: Path of csv file
+    :dialect: Object: Csv dialect
+    :sniffsize: int: Maximum no. bytes to use for inference
+
+    Returns list of digest types, None if sample cannot be parsed
+
+    """
+
+    with open(filepath, newline='') as csvfile:
+        csv_str = csvfile.read(sniff_size)
+
+    try:
+        lines = list(csv_reader(StringIO(csv_str, newline=''), dialect))
+    except csv.Error:
+        return
+
+    if len(csv_str) == sniff_size and len(lines) > 1:
+        # Last line may be incomplete
+        lines.pop()
+
+    return [_infer_digest_type(column)
+            for column in zip_longest(*lines, fillvalue="")]
+
+
 def get_header(csvfile, dialect):
     """Returns List of first line items of file filepath"""
 
@@ -97,6 +196,200 @@ def csv_reader(csvfile, dialect, digest_types=None):
         yield line
 
 
+def _digest_lines(lines, digest_types=None):
+    """Returns list of lists of cell code strings from csv lines
+
+    The lines are converted column-wise. Columns without digest type are
+    digested as repr.
+
+    """
+
+    if digest_types is None:
+        return [[str(ele) for ele in line] for line in lines]
+
+    def get_digest_type(i):
+        return digest_types[i] if i < len(digest_types) else None
+
+    if len(set(map(len, lines))) > 1:
+        # Lines of different length are converted line-wise
+        return [[convert(ele, get_digest_type(i))
+                 for i, ele in enumerate(line)] for line in lines]
+
+    columns = [convert_column(column, get_digest_type(i))
+               for i, column in enumerate(zip(*lines))]
+
+    return [list(line) for line in zip(*columns)]
+
+
+def _digest_chunk(filepath, start, end, encoding, dialect_parameters,
+                  digest_types, skip_header):
+    """Returns list of digested lines of the file part from start to end
+
+    This function runs in the worker processes of :func:`csv_digest_chunks`.
+    It is defined at module level so that it can be pickled for workers that
+    are started with the spawn or forkserver method.
+
+    """
+
+    with open(filepath, "rb") as csvfile:
+        csvfile.seek(start)
+        data = csvfile.read(end - start)
+
+    text = StringIO(data.decode(encoding), newline='')
+    csvreader = csv.reader(text, **dialect_parameters)
+
+    if skip_header:
+        for line in csvreader:
+            break
+
+    return _digest_lines(list(csvreader), digest_types)
+
+
+def _chunk_bounds(filepath, quotechar, chunk_size):
+    """Returns list of (start, end) of chunks of about chunk_size bytes
+
+    Chunks end at newlines outside quoted fields. Quoted fields are detected
+    by the parity of the number of preceding quote characters, which holds
+    if quote characters only enclose fields or are doubled within them.
+
+    :param quotechar: Quote character byte, None if fields are not quoted
+    :type quotechar: bytes
+
+    """
+
+    starts = [0]
+
+    with open(filepath, "rb") as csvfile, \
+            mmap.mmap(csvfile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        size = len(data)
+        start = 0  # Chunks start outside quoted fields
+
+        while start + chunk_size < size:
+            pos = start + chunk_size
+            quotes = 0 if quotechar is None \
+                else data[start:pos].count(quotechar)
+
+            while True:
+                newline = data.find(b"\n", pos)
+                if newline == -1:
+                    return list(zip(starts, starts[1:] + [size]))
+                if quotechar is not None:
+                    quotes += data[pos:newline].count(quotechar)
+                pos = newline + 1
+                if quotes % 2 == 0:
+                    break
+
+            starts.append(pos)
+            start = pos
+
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def _get_mp_context():
+    """Returns multiprocessing context for the csv worker processes
+
+    Worker processes are not forked from the GUI process, which may hold
+    locks of other threads. The forkserver start method is preferred over
+    spawn because it starts workers faster.
+
+    """
+
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _is_splittable(dialect, encoding):
+    """Returns True if a file with dialect and encoding can be split in chunks
+
+    This requires an encoding, in which newline and quote character are
+    single bytes. Escape characters are not supported.
+
+    """
+
+    if getattr(dialect, "escapechar", None):
+        return False
+
+    quotechar = getattr(dialect, "quotechar", None)
+    try:
+        if "\n".encode(encoding) != b"\n":
+            return False
+        return not quotechar or len(quotechar.encode(encoding)) == 1
+    except (LookupError, UnicodeError):
+        return False
+
+
+def csv_digest_chunks(filepath, dialect, digest_types=None, encoding=None,
+                      max_workers=None, chunk_size=CHUNK_SIZE):
+    """Generator of lists of digested lines from csv file in filepath
+
+    Large files are split into chunks at newlines that are safe for the
+    dialect. The chunks are parsed and digested by a pool of worker
+    processes. The lines are yielded in file order.
+
+    Files that are small or that cannot be split are digested sequentially.
+
+    Parameters
+    ----------
+    filepath: pathlib.Path
+    \tCsv file to read
+    dialect: Object
+    \tCsv dialect
+    digest_types: tuple of types
+    \tTypes of data for each col, None for str
+    encoding: str, defaults to None
+    \tFile encoding, None for the locale's preferred encoding
+    max_workers: int, defaults to None
+    \tMaximum number of worker processes, None for number of CPUs
+    chunk_size: int, defaults to CHUNK_SIZE
+    \tApproximate size of a chunk in bytes
+
+    """
+
+    if encoding is None:
+        encoding = getpreferredencoding(False)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if max_workers < 2 or os.path.getsize(filepath) < 2 * chunk_size \
+       or not _is_splittable(dialect, encoding):
+        with open(filepath, newline='', encoding=encoding) as csvfile:
+            csvreader = csv_reader(csvfile, dialect)
+            while True:
+                lines = list(islice(csvreader, CHUNK_LINES))
+                if not lines:
+                    return
+                yield _digest_lines(lines, digest_types)
+
+    dialect_parameters = {name: getattr(dialect, name)
+                          for name in DIALECT_PARAMETERS
+                          if hasattr(dialect, name)}
+
+    quotechar = getattr(dialect, "quotechar", None)
+    if not quotechar or dialect_parameters.get("quoting") == csv.QUOTE_NONE:
+        quotechar = None
+    else:
+        quotechar = quotechar.encode(encoding)
+
+    skip_header = bool(getattr(dialect, "hasheader", False))
+
+    executor = ProcessPoolExecutor(max_workers, mp_context=_get_mp_context())
+
+    futures = [executor.submit(_digest_chunk, filepath, start, end, encoding,
+                               dialect_parameters, digest_types,
+                               skip_header and start == 0)
+               for start, end in _chunk_bounds(filepath, quotechar,
+                                               chunk_size)]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown()
+
+
 # Type conversion functions
 
 def convert(string, digest_type):
@@ -112,6 +405,53 @@ def convert(string, digest_type):
         return repr(string)
 
 
+def convert_column(strings, digest_type):
+    """Converts a column of strings, equivalent to convert for each string
+
+    Columns of builtin types such as int and float are converted in one
+    pass. If this fails or for other types, each distinct string is
+    converted once. ISO 8601 dates and times are parsed without dateutil.
+    Strings that fail to convert are digested as repr.
+
+    :param strings: Strings of a csv column
+    :type strings: Sequence of str
+    :param digest_type: Key of typehandlers, None for repr
+    :type digest_type: str
+
+    """
+
+    if digest_type is None:
+        digest_type = 'repr'
+
+    if digest_type in COLUMN_TYPES:
+        try:
+            return list(map(str, map(typehandlers[digest_type], strings)))
+        except Exception:
+            pass  # Strings that fail are digested as repr below
+
+    iso_handler = ISO_HANDLERS.get(digest_type)
+
+    cache = {}
+    codes = []
+
+    for string in strings:
+        try:
+            code = cache[string]
+        except KeyError:
+            code = None
+            if iso_handler is not None and ISO_PATTERN.fullmatch(string):
+                try:
+                    code = str(iso_handler(string))
+                except ValueError:
+                    pass  # E.g. invalid day
+            if code is None:
+                code = convert(string, digest_type)
+            cache[string] = code
+        codes.append(code)
+
+    return codes
+
+
 def date(obj):
     """Makes a date from comparable types"""
 
@@ -149,3 +489,19 @@ typehandlers = {
     'datetime': datetime,
     'time': time,
 }
+
+# Types that are converted column-wise
+COLUMN_TYPES = {'repr', 'bool', 'int', 'float', 'complex', 'str'}
+
+# Strict ISO 8601 date, datetime and time without time zone
+ISO_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}"
+                         r"([T ]\d{2}:\d{2}(:\d{2}(\.\d{6})?)?)?"
+                         r"|\d{2}:\d{2}(:\d{2}(\.\d{6})?)?")
+
+LEADING_ZERO_PATTERN = re.compile(r"\s*[+-]?0\d")
+
+ISO_HANDLERS = {
+    'date': lambda string: dt.datetime.fromisoformat(string).date(),
+    'datetime': dt.datetime.fromisoformat,
+    'time': dt.time.fromisoformat,
+}
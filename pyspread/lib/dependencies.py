@@ -18,6 +18,23 @@
 # along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
 # --------------------------------------------------------------------
 
+from importlib.util import find_spec
+
+
+def is_installed(module_name):
+    """Checks if a top level module is installed without importing it
+
+    :param module_name: Name of the top level module, e.g. `"matplotlib"`
+    :type module_name: str
+    :rtype: bool
+
+    """
+
+    try:
+        return find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
 
 def get_enchant_version():
     """
@@ -27,6 +27,9 @@ File hashing services
  * :func:`genkey` - Generates hash key
  * :func:`sign` - Returns a signature for a given file
  * :func:`verify` - Verifies file against signature
+ * :func:`sign_stream` - Returns a signature for a file stream
+ * :func:`verify_stream` - Verifies file stream against signature
+ * :class:`StreamSigner` - Signs data incrementally, e.g. while saving
 
 """
 
@@ -36,6 +39,8 @@ from hashlib import blake2b
 from hmac import compare_digest
 import secrets
 
+CHUNK_SIZE = 1024 * 1024  # Bytes that are read at once from streams
+
 
 def genkey(nbytes=64):
     """Returns a new signature key of nbytes
@@ -47,26 +52,64 @@ def genkey(nbytes=64):
     return secrets.token_bytes(nbytes)
 
 
-def sign(data, key):
-    """Returns signature for file"""
+class StreamSigner:
+    """Computes a signature incrementally from chunks of data
+
+    The signature is identical to the :func:`sign` signature of all chunks.
+
+    :param key: Signature key
+    :type key: bytes or str with repr of bytes
+
+    """
+
+    def __init__(self, key):
+        if not key:
+            raise ValueError("No signature key defined")
+
+        if not isinstance(key, bytes):
+            key = ast.literal_eval(key)
+
+        self._hash = blake2b(digest_size=64, key=key)
+
+    def update(self, data):
+        """Adds data chunk to signature"""
+
+        self._hash.update(data)
 
-    if not key:
-        raise ValueError("No signature key defined")
+    def signature(self):
+        """Returns signature of all data chunks so far"""
 
-    if not isinstance(key, bytes):
-        key = ast.literal_eval(key)
+        return self._hash.hexdigest().encode('utf-8')
 
-    signature = blake2b(digest_size=64, key=key)
-    signature.update(data)
 
-    return signature.hexdigest().encode('utf-8')
+def sign(data, key):
+    """Returns signature for file"""
+
+    signer = StreamSigner(key)
+    signer.update(data)
+
+    return signer.signature()
 
 
 def verify(data, signature, key):
     """Verifies a signature, returns True if successful else False"""
 
-    if not isinstance(key, bytes):
-        key = ast.literal_eval(key)
-
     data_signature = sign(data, key)
     return compare_digest(data_signature, signature)
+
+
+def sign_stream(stream, key, chunk_size=CHUNK_SIZE):
+    """Returns signature for file stream, which is read chunk wise"""
+
+    signer = StreamSigner(key)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        signer.update(chunk)
+
+    return signer.signature()
+
+
+def verify_stream(stream, signature, key, chunk_size=CHUNK_SIZE):
+    """Verifies a signature of a file stream, returns True if successful"""
+
+    stream_signature = sign_stream(stream, key, chunk_size)
+    return compare_digest(stream_signature, signature)
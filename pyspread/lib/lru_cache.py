@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+Bounded cache that discards the least recently used items
+
+**Provides**
+
+* :class:`LRUCache`
+
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache(OrderedDict):
+    """Dict that removes the least recently used item if it grows too large
+
+    Reading an item via `[]` or :meth:`get` and writing it marks it as
+    recently used.
+
+    If nbytes is given, least recently used items are also removed while
+    the total size of all items exceeds max_bytes. The most recently used
+    item is kept even if it is larger than max_bytes.
+
+    :param max_size: Maximum number of items
+    :type max_size: int
+    :param max_bytes: Maximum total size of all items in bytes
+    :type max_bytes: int
+    :param nbytes: Function that returns the size of a value in bytes
+    :type nbytes: Callable
+
+    """
+
+    def __init__(self, max_size=128, max_bytes=None, nbytes=None):
+        super().__init__()
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.nbytes = nbytes
+        self.total_bytes = 0
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if self.nbytes is not None:
+            if key in self:
+                del self[key]
+            self.total_bytes += self.nbytes(value)
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.max_size:
+            del self[next(iter(self))]
+        if self.nbytes is not None and self.max_bytes is not None:
+            while self.total_bytes > self.max_bytes and len(self) > 1:
+                del self[next(iter(self))]
+
+    def __delitem__(self, key):
+        if self.nbytes is not None:
+            self.total_bytes -= self.nbytes(super().__getitem__(key))
+        super().__delitem__(key)
+
+    def get(self, key, default=None):
+        """Returns value for key if key is in the cache, else default"""
+
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, *default):
+        """Removes key and returns its value, see dict.pop"""
+
+        if key in self:
+            value = super().__getitem__(key)
+            del self[key]
+            return value
+        return super().pop(key, *default)
+
+    def popitem(self, last=True):
+        """Removes and returns last or first (key, value) pair"""
+
+        if not self:
+            raise KeyError('dictionary is empty')
+        key = next(reversed(self)) if last else next(iter(self))
+        return key, self.pop(key)
+
+    def clear(self):
+        """Removes all items"""
+
+        super().clear()
+        self.total_bytes = 0
@@ -32,11 +32,8 @@ try:
 except ImportError:
     QSvgRenderer = None
 
-try:
-    import matplotlib.figure as matplotlib_figure
-    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
-except ImportError:
-    matplotlib_figure = None
+from lib.chart_renderer import figure_lock
+from lib.typechecks import is_matplotlib_figure
 
 
 class QImageSvg(QImage):
@@ -58,9 +55,12 @@ class QImageSvg(QImage):
     def _matplotlib_figure2svg_bytes(self, figure):
         """Returns an SVG bytes string from a matplotlib figure"""
 
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+
         canvas = FigureCanvasQTAgg(figure)
         svg_filelike = StringIO()
-        figure.savefig(svg_filelike, format="svg")
+        with figure_lock:
+            figure.savefig(svg_filelike, format="svg")
         svg_filelike.seek(0)
         svg_bytes = bytes(svg_filelike.read(), encoding='utf-8')
         svg_filelike.close()
@@ -70,9 +70,8 @@ class QImageSvg(QImage):
     def from_matplotlib(self, figure):
         """Paints an svg from a matplotlib figure"""
 
-        if not isinstance(figure, matplotlib_figure.Figure):
-            msg_tpl = "figure must be instance of {}."
-            msg = msg_tpl.format(matplotlib_figure.Figure)
+        if not is_matplotlib_figure(figure):
+            msg = "figure must be instance of matplotlib.figure.Figure."
             raise ValueError(msg)
 
         svg_bytes = self._matplotlib_figure2svg_bytes(figure)
@@ -92,26 +92,6 @@
 import sys
 from warnings import warn
 
-try:
-    import enchant
-    from enchant import tokenize
-    from enchant.errors import TokenizerNotFoundError
-except ImportError:
-    enchant = None
-
-try:
-    # pylint: disable=ungrouped-imports
-    from enchant.utils import trim_suggestions
-except ImportError:  # Older versions of PyEnchant as on *buntu 14.04
-    # pylint: disable=unused-argument
-    def trim_suggestions(word, suggs, maxlen, calcdist=None):
-        """API Polyfill for earlier versions of PyEnchant."""
-
-        # TODO: Make this actually do some sorting
-
-        return suggs[:maxlen]
-
-
 # pylint: disable=no-name-in-module
 from PyQt5.Qt import Qt
 from PyQt5.QtCore import QEvent, QRegExp
@@ -121,6 +101,51 @@ from PyQt5.QtGui import (QFocusEvent, QSyntaxHighlighter, QTextBlockUserData,
 from PyQt5.QtWidgets import (QAction, QActionGroup, QApplication, QMenu,
                              QPlainTextEdit)
 
+from lib.dependencies import is_installed
+
+# pyenchant is imported on first use by import_enchant because importing it
+# and loading a dictionary noticeably slows down the application start
+enchant = None
+tokenize = None
+TokenizerNotFoundError = None
+
+
+# pylint: disable=unused-argument
+def trim_suggestions(word, suggs, maxlen, calcdist=None):
+    """API Polyfill for earlier versions of PyEnchant."""
+
+    # TODO: Make this actually do some sorting
+
+    return suggs[:maxlen]
+
+
+def import_enchant():
+    """Imports pyenchant if this has not been done yet
+
+    :return: enchant module, None if pyenchant is not installed
+
+    """
+
+    global enchant, tokenize, TokenizerNotFoundError, trim_suggestions
+
+    if enchant is None and is_installed("enchant"):
+        try:
+            import enchant as enchant_module
+            from enchant import tokenize
+            from enchant.errors import TokenizerNotFoundError
+        except ImportError:
+            return
+
+        try:
+            # pylint: disable=ungrouped-imports
+            from enchant.utils import trim_suggestions
+        except ImportError:  # Older versions of PyEnchant as on *buntu 14.04
+            pass
+
+        enchant = enchant_module
+
+    return enchant
+
 
 def format(color, style=''):
     """Return a QTextCharFormat with the given attributes."""
@@ -174,9 +199,17 @@ class SpellTextEdit(QPlainTextEdit):
 
         self.setTabStopDistance(_distance * self.spaces_per_tab)
 
-        # Start with a default dictionary based on the current locale.
+        # The dictionary is loaded on first use by load_dict
         self.highlighter = PythonEnchantHighlighter(self.document())
-        if enchant is not None:
+
+    def load_dict(self):
+        """Loads a default dictionary based on the current locale if required
+
+        :return: True if a spelling dictionary is available
+
+        """
+
+        if self.highlighter.dict() is None and import_enchant() is not None:
             try:
                 self.highlighter.setDict(enchant.Dict())
             except Exception as err:
@@ -184,6 +217,8 @@ class SpellTextEdit(QPlainTextEdit):
                 # One of those has occured.
                 warn(str(err), ImportWarning)
 
+        return self.highlighter.dict() is not None
+
     def keyPressEvent(self, event):
         """Overide to change tab into spaces_per_tab spaces"""
 
@@ -195,7 +230,7 @@ class SpellTextEdit(QPlainTextEdit):
     def contextMenuEvent(self, event):
         """Custom context menu handler to add a spelling suggestions submenu"""
 
-        if enchant is None:
+        if not self.load_dict():
             return
 
         popup_menu = self.createSpellcheckContextMenu(event.pos())
@@ -343,10 +378,7 @@ class SpellTextEdit(QPlainTextEdit):
 class PythonEnchantHighlighter(QSyntaxHighlighter):
     """QSyntaxHighlighter subclass which consults a PyEnchant dictionary"""
 
-    if enchant is not None:
-        tokenizer = None
-        token_filters = (tokenize.EmailFilter, tokenize.URLFilter)
-
+    tokenizer = None
     enable_enchant = False
 
     # Define the spellcheck style once and just assign it as necessary
@@ -500,14 +532,16 @@ class PythonEnchantHighlighter(QSyntaxHighlighter):
         if enchant is None:
             return
 
+        token_filters = tokenize.EmailFilter, tokenize.URLFilter
+
         try:
             self.tokenizer = tokenize.get_tokenizer(sp_dict.tag,
                                                     chunkers=self._chunkers,
-                                                    filters=self.token_filters)
+                                                    filters=token_filters)
         except TokenizerNotFoundError:
             # Fall back to the "good for most euro languages" English tokenizer
             self.tokenizer = tokenize.get_tokenizer(
-                chunkers=self._chunkers, filters=self.token_filters)
+                chunkers=self._chunkers, filters=token_filters)
         self._sp_dict = sp_dict
 
         self.rehighlight()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+"""
+
+Measurement of the duration of application startup phases
+
+This module is imported before any other pyspread module so that it must
+not import anything that is slow to import.
+
+**Provides**
+
+* :class:`StartupTimer`: Records startup phases
+* :data:`startup_timer`: Application wide startup timer
+
+"""
+
+import builtins
+import sys
+from time import perf_counter
+
+
+class StartupTimer:
+    """Records wall clock time, import time and imported modules of phases
+
+    A phase starts at the end of the previous phase and ends when it is
+    marked. The first phase starts when the timer is created.
+
+    Import time is measured by wrapping `builtins.__import__` from
+    :meth:`start` until :meth:`stop` is called. The import time of phases
+    that have started before :meth:`start` is unknown. Only the outermost
+    import statement is timed so that nested imports are not counted twice.
+
+    """
+
+    def __init__(self):
+        self.start_time = perf_counter()
+        self.marks = []  # List of (phase, end time, import time, modules)
+        self.import_time = 0.0
+        self.import_start_time = None  # Time of the first call of start
+
+        self._start_modules = len(sys.modules)
+        self._importing = False
+        self._builtin_import = None
+
+    def _timed_import(self, *args, **kwargs):
+        """Replacement for builtins.__import__ that adds up import time"""
+
+        if self._importing:
+            return self._builtin_import(*args, **kwargs)
+
+        self._importing = True
+        start = perf_counter()
+        try:
+            return self._builtin_import(*args, **kwargs)
+        finally:
+            self.import_time += perf_counter() - start
+            self._importing = False
+
+    def start(self):
+        """Starts measuring import time"""
+
+        if self.import_start_time is None:
+            self.import_start_time = perf_counter()
+
+        if self._builtin_import is None:
+            self._builtin_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def stop(self):
+        """Stops measuring import time"""
+
+        if builtins.__import__ == self._timed_import:
+            builtins.__import__ = self._builtin_import
+            self._builtin_import = None
+
+    def mark(self, phase):
+        """Marks the end of a phase
+
+        :param phase: Name of the phase that ends now
+        :type phase: str
+
+        """
+
+        self.marks.append((phase, perf_counter(), self.import_time,
+                           len(sys.modules)))
+
+    def phases(self):
+        """Returns list of phase dicts
+
+        Each dict has the keys `phase`, `wall_time` and `import_time` in
+        seconds and `modules`, the number of newly imported modules.
+        `import_time` is None for phases that have started before
+        :meth:`start`.
+
+        """
+
+        phases = []
+        start, import_time, modules = self.start_time, 0.0, self._start_modules
+        for phase, end, end_import_time, end_modules in self.marks:
+            if self.import_start_time is None \
+               or start < self.import_start_time:
+                phase_import_time = None
+            else:
+                phase_import_time = end_import_time - import_time
+            phases.append({"phase": phase,
+                           "wall_time": end - start,
+                           "import_time": phase_import_time,
+                           "modules": end_modules - modules})
+            start, import_time, modules = end, end_import_time, end_modules
+        return phases
+
+    @staticmethod
+    def _total_import_time(phases):
+        """Returns sum of the known import times of phases, None if unknown"""
+
+        import_times = [phase["import_time"] for phase in phases
+                        if phase["import_time"] is not None]
+        if import_times:
+            return sum(import_times)
+
+    def report(self):
+        """Returns a human readable report of all marked phases"""
+
+        def ms(seconds):
+            """Returns seconds as milliseconds string, - if unknown"""
+
+            return "-" if seconds is None else "{:.1f}".format(seconds * 1000)
+
+        phases = self.phases()
+        width = max(len(phase["phase"])
+                    for phase in [{"phase": "Startup phase"}] + phases)
+        line_tpl = "{:<{}}  {:>10}  {:>12}  {:>7}"
+
+        lines = [line_tpl.format("Startup phase", width, "Time [ms]",
+                                 "Import [ms]", "Modules")]
+        for phase in phases:
+            lines.append(line_tpl.format(phase["phase"], width,
+                                         ms(phase["wall_time"]),
+                                         ms(phase["import_time"]),
+                                         phase["modules"]))
+        lines.append(line_tpl.format(
+            "Total", width,
+            ms(sum(phase["wall_time"] for phase in phases)),
+            ms(self._total_import_time(phases)),
+            sum(phase["modules"] for phase in phases)))
+
+        return "\n".join(lines)
+
+    def write_report(self, filepath, version=None):
+        """Writes a machine readable JSON report of all marked phases
+
+        :param filepath: Path of the JSON report file
+        :type filepath: pathlib.Path or str
+        :param version: Application version that is stored in the report
+        :type version: str
+
+        """
+
+        import json
+        import platform
+
+        phases = self.phases()
+        report = {
+            "version": version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "phases": phases,
+            "wall_time": sum(phase["wall_time"] for phase in phases),
+            "import_time": self._total_import_time(phases),
+        }
+
+        with open(filepath, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+startup_timer = StartupTimer()
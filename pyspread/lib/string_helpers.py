@@ -24,9 +24,13 @@
 
  * :func:`quote`
  * :func:`wrap_text`
+ * :func:`preview_str`
 
 """
 
+from itertools import islice
+from reprlib import Repr
+import sys
 import xml.etree.ElementTree as ET
 import textwrap
 
@@ -88,6 +92,73 @@ def wrap_text(text, width=80, maxlen=2000):
     return "\n".join(textwrap.wrap(text, width=width))
 
 
+class _PreviewRepr(Repr):
+    """Repr that limits each level of a container to maxlen elements
+
+    Unlike Repr, dicts keep their order and numpy arrays are summarized.
+
+    """
+
+    def __init__(self, maxlen):
+        super().__init__()
+        self.maxlevel = 20
+        self.maxtuple = self.maxlist = self.maxarray = maxlen
+        self.maxdict = self.maxset = self.maxfrozenset = self.maxdeque = maxlen
+        self.maxlong = self.maxstring = self.maxother = maxlen
+
+    def repr_dict(self, x, level):
+        if not x:
+            return '{}'
+        if level <= 0:
+            return '{...}'
+        pieces = ['%s: %s' % (self.repr1(key, level - 1),
+                              self.repr1(x[key], level - 1))
+                  for key in islice(x, self.maxdict)]
+        if len(x) > self.maxdict:
+            pieces.append('...')
+        return '{%s}' % ', '.join(pieces)
+
+    def repr_ndarray(self, x, level):
+        numpy = sys.modules["numpy"]
+        with numpy.printoptions(threshold=self.maxother):
+            return repr(x)
+
+
+def preview_str(obj, maxlen=2000):
+    """Returns string of obj that is truncated to maxlen characters
+
+    Containers, also nested ones, and large numpy arrays are summarized so
+    that they are not converted to a string completely.
+
+    Parameters
+    ----------
+
+    * obj: Object
+    \tThe object to be converted to a string
+    * maxlen: Integer, defaults to 2000
+    \tMaximum text length before text is truncated and extended by ...
+
+    """
+
+    numpy = sys.modules.get("numpy")
+
+    if isinstance(obj, (list, tuple, dict, set, frozenset)):
+        # repr of the first elements of each nesting level only
+        text = _PreviewRepr(maxlen).repr(obj)
+
+    elif numpy is not None and isinstance(obj, numpy.ndarray) \
+            and obj.size > maxlen:
+        with numpy.printoptions(threshold=maxlen):
+            text = str(obj)
+
+    else:
+        text = str(obj)
+
+    if len(text) > maxlen:
+        text = text[:maxlen] + "..."
+    return text
+
+
 def get_svg_size(svg_bytes):
     """Returns width, height tuple from svg"""
 
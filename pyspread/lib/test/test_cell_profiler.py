@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+
+"""
+test_cell_profiler
+==================
+
+Unit tests for cell_profiler.py
+
+"""
+
+import csv
+from io import StringIO
+import json
+
+import numpy
+import py.test as pytest
+
+from ..cell_profiler import CellProfiler, result_size
+
+
+def test_result_size():
+    """Unit test for result_size"""
+
+    assert result_size(numpy.zeros(10, dtype="int64")) == 80
+    assert result_size("a" * 1000) > 1000
+
+
+def test_cell_profiler():
+    """Unit test for CellProfiler"""
+
+    profiler = CellProfiler()
+
+    outer_start = profiler.start()
+    inner_start = profiler.start()
+    profiler.stop((0, 0, 0), inner_start, 1)
+    profiler.stop((1, 0, 0), outer_start, 2)
+
+    inner_start = profiler.start()
+    profiler.stop((0, 0, 0), inner_start, "x")
+
+    inner = profiler.stats[(0, 0, 0)]
+    outer = profiler.stats[(1, 0, 0)]
+
+    assert inner.count == 2
+    assert outer.count == 1
+    assert inner.cumulative_time == inner.self_time
+    assert outer.cumulative_time >= outer.self_time
+    assert outer.self_time == pytest.approx(
+        outer.cumulative_time - inner.cumulative_time + inner.last_time)
+    assert inner.result_size == result_size("x")
+
+    slowest = profiler.slowest(1, sort_field="count")
+    assert slowest == [inner]
+
+    csv_file = StringIO(newline='')
+    profiler.write_csv(csv_file)
+    csv_file.seek(0)
+    rows = list(csv.reader(csv_file))
+    assert rows[0] == list(CellProfiler.fields)
+    assert len(rows) == 3
+
+    json_file = StringIO()
+    profiler.write_json(json_file)
+    assert len(json.loads(json_file.getvalue())) == 2
+
+    profiler.clear()
+    assert profiler.stats == {}
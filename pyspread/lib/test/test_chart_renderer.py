@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+
+"""
+test_chart_renderer
+===================
+
+Unit tests for chart_renderer.py
+
+"""
+
+from os.path import abspath, dirname, join
+import sys
+from time import sleep
+
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from matplotlib.figure import Figure
+from PyQt5.QtWidgets import QApplication
+
+pyspread_path = abspath(join(dirname(__file__) + "/../.."))
+sys.path.insert(0, pyspread_path)
+
+from lib.chart_renderer import ChartRenderer, figure2qimage, figure_lock
+
+sys.path.pop(0)
+
+
+def test_figure2qimage():
+    """Unit test for figure2qimage"""
+
+    figure = Figure(figsize=(4, 3))
+    qimage = figure2qimage(figure, 50)
+
+    assert (qimage.width(), qimage.height()) == (200, 150)
+
+
+def test_chart_renderer():
+    """Unit test for ChartRenderer"""
+
+    # Other test modules create the application at import time
+    app = QApplication.instance() or QApplication([])
+
+    results = []
+
+    renderer = ChartRenderer()
+    renderer.rendered.connect(lambda *args: results.append(args))
+
+    figure = Figure(figsize=(4, 3))
+    renderer.render("key", figure, 50)
+    renderer.render("key", figure, 50)  # Ignored because job is pending
+    assert renderer.pending == {"key"}
+
+    renderer.wait()
+    app.processEvents()
+
+    assert renderer.pending == set()
+    assert len(results) == 1
+    key, rendered_figure, qimage = results[0]
+    assert key == "key"
+    assert rendered_figure is figure
+    assert (qimage.width(), qimage.height()) == (200, 150)
+
+
+def test_chart_renderer_lock():
+    """Figures are not rendered while figure_lock is held elsewhere"""
+
+    app = QApplication.instance() or QApplication([])
+
+    results = []
+
+    renderer = ChartRenderer()
+    renderer.rendered.connect(lambda *args: results.append(args))
+
+    with figure_lock:
+        renderer.render("key", Figure(figsize=(4, 3)), 50)
+        sleep(0.1)
+        app.processEvents()
+        assert not results
+
+    renderer.wait()
+    app.processEvents()
+    assert len(results) == 1
+
+
+def test_chart_renderer_failure():
+    """The QImage is None if a figure cannot be rendered"""
+
+    class BrokenFigure(Figure):
+        def draw(self, renderer):
+            raise ValueError("Broken figure")
+
+    app = QApplication.instance() or QApplication([])
+
+    results = []
+
+    renderer = ChartRenderer()
+    renderer.rendered.connect(lambda *args: results.append(args))
+
+    renderer.render("key", BrokenFigure(figsize=(4, 3)), 50)
+    renderer.wait()
+    app.processEvents()
+
+    assert results[0][2] is None
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+
+"""
+test_charts
+===========
+
+Unit tests for charts.py
+
+"""
+
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from matplotlib.figure import Figure
+import numpy
+
+from ..charts import fig2rgba, minmax_decimate, grid_decimate
+
+
+def test_fig2rgba():
+    """Unit test for fig2rgba"""
+
+    figure = Figure(figsize=(4, 3), dpi=100)
+    figure.add_subplot(111).plot([1, 2, 3])
+    canvas = figure.canvas
+
+    rgba = fig2rgba(figure, 50)
+
+    assert rgba.shape == (150, 200, 4)
+    assert rgba.dtype == "uint8"
+    assert figure.dpi == 100
+    assert figure.canvas is canvas
+
+
+def test_minmax_decimate():
+    """Unit test for minmax_decimate"""
+
+    x = numpy.arange(1000)
+    y = numpy.sin(x)
+    xd, yd = minmax_decimate(x, y, 10)
+
+    assert len(xd) <= 40
+    assert (xd[0], xd[-1]) == (0, 999)
+    assert min(yd) == min(y) and max(yd) == max(y)
+
+    # Short, unsorted and non-numeric data is not changed
+    for xdata, ydata in [(x[:40], y[:40]), (x[::-1], y), (["a"] * 1000, y)]:
+        xd, yd = minmax_decimate(xdata, ydata, 10)
+        assert xd is xdata and yd is ydata
+
+
+def test_minmax_decimate_xlim():
+    """Unit test for minmax_decimate with x limits"""
+
+    x = numpy.arange(100000)
+    y = numpy.sin(x)
+    xd, yd = minmax_decimate(x, y, 10, xlim=(500, 600))
+
+    # Buckets span xlim so that each bucket keeps its extrema
+    assert len(xd) <= 4 * 12
+    for start in range(500, 600, 10):
+        bucket = slice(start, start + 10)
+        assert y[bucket].min() in yd and y[bucket].max() in yd
+
+    # Line segments that cross the x limits are kept
+    assert {499, 500, 599, 600} <= set(xd)
+
+    # Reversed limits are supported and invalid limits are ignored
+    xd_reversed, _ = minmax_decimate(x, y, 10, xlim=(600, 500))
+    assert list(xd_reversed) == list(xd)
+    for xlim in [(None, 600), (500, 500)]:
+        xd, yd = minmax_decimate(x, y, 10, xlim=xlim)
+        assert xd is x and yd is y
+
+
+def test_grid_decimate():
+    """Unit test for grid_decimate"""
+
+    x = numpy.tile([0.0, 1.0], 500)
+    y = numpy.zeros(1000)
+    xd, yd = grid_decimate(x, y, 10, 10)
+
+    assert list(xd) == [0.0, 1.0]
+    assert list(yd) == [0.0, 0.0]
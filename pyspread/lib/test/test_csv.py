@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+
+"""
+test_csv
+========
+
+Unit tests for csv.py
+
+"""
+
+import csv
+
+import py.test as pytest
+from ..csv import (csv_digest_chunks, convert, convert_column,
+                   infer_digest_types)
+
+
+class Dialect(csv.excel):
+    """Csv dialect with header"""
+
+    hasheader = True
+
+
+CSV_LINES = ['"a","b","c"'] + \
+    ['{},"x\n""{}"",y",2020-01-{:02d}'.format(i, i, i % 28 + 1)
+     for i in range(500)]
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """Returns path of csv file with header and multi-line quoted fields"""
+
+    path = tmp_path / "test.csv"
+    path.write_text("\n".join(CSV_LINES) + "\n", encoding="utf-8")
+    return path
+
+
+param_test_csv_digest_chunks = [
+    (None, ["0", 'x\n"0",y', "2020-01-01"]),
+    (["int", "str", "date"], ["0", 'x\n"0",y', "2020-01-01"]),
+    (["float", "repr"], ["0.0", repr('x\n"0",y'), repr("2020-01-01")]),
+]
+
+
+@pytest.mark.parametrize("digest_types, first_line",
+                         param_test_csv_digest_chunks)
+def test_csv_digest_chunks(csv_path, digest_types, first_line):
+    """Unit test for csv_digest_chunks in parallel and sequentially"""
+
+    kwargs = {"digest_types": digest_types, "encoding": "utf-8"}
+
+    sequential = list(csv_digest_chunks(csv_path, Dialect, max_workers=1,
+                                        **kwargs))
+    parallel = list(csv_digest_chunks(csv_path, Dialect, max_workers=2,
+                                      chunk_size=1000, **kwargs))
+
+    assert len(parallel) > 2
+
+    sequential_lines = [line for chunk in sequential for line in chunk]
+    parallel_lines = [line for chunk in parallel for line in chunk]
+
+    assert len(parallel_lines) == 500
+    assert parallel_lines == sequential_lines
+    assert parallel_lines[0] == first_line
+
+
+CONVERT_STRINGS = ["1", " 12 ", "1_000", "1.5", "nan", "99999999999999999999",
+                   "2020-01-05", "2020-02-30", "2020-01-05T23:59:59.123456",
+                   "2020-01-05 12:30", "12:30", "Jan 5 2020", "[1, 'a']",
+                   "False", "", "1\x00", "x"]
+
+
+@pytest.mark.parametrize("digest_type", [None, "object", "repr", "bool",
+                                         "int", "float", "complex", "str",
+                                         "bytes", "date", "datetime", "time"])
+def test_convert_column(digest_type):
+    """Unit test for convert_column"""
+
+    res = [convert(string, digest_type) for string in CONVERT_STRINGS]
+    assert convert_column(CONVERT_STRINGS, digest_type) == res
+    assert convert_column(CONVERT_STRINGS[:2], digest_type) == res[:2]
+
+
+INFER_LINES = ["i,f,z,d,dt,t,b,s,e",
+               "1,1.5,00123,2020-01-05,2020-01-05 12:30,12:30,True,a,",
+               "-2,2,00124,2021-12-31,2021-12-31,23:59:59,False,1,",
+               "3,nan,10000,2020-02-29,2020-02-29T01:02:03,00:00,True,2,"]
+
+
+def test_infer_digest_types(tmp_path):
+    """Unit test for infer_digest_types"""
+
+    path = tmp_path / "test.csv"
+    path.write_text("\n".join(INFER_LINES) + "\n")
+
+    res = ["int", "float", "repr", "date", "datetime", "time", "object",
+           "repr", "repr"]
+
+    assert infer_digest_types(path, Dialect, 10000) == res
+
+    # Incomplete last line is ignored
+    size = len("\n".join(INFER_LINES[:3])) + 4
+    assert infer_digest_types(path, Dialect, size) == res
@@ -27,8 +27,10 @@ Unit tests for hashing.py
 
 """
 
+from io import BytesIO
+
 import py.test as pytest
-from ..hashing import genkey, sign, verify
+from ..hashing import genkey, sign, verify, sign_stream, verify_stream
 
 
 KEYS = [genkey() for _ in range(100)]
@@ -68,3 +70,13 @@ def test_sign_verify(data1, sigkey, data2, verkey, res):
 
     signature = sign(data1, sigkey)
     assert verify(data2, signature, verkey) == res
+
+
+@pytest.mark.parametrize("data1, sigkey, data2, verkey, res",
+                         param_test_sign_verify)
+def test_sign_verify_stream(data1, sigkey, data2, verkey, res):
+    """Unit test for sign_stream and verify_stream"""
+
+    signature = sign_stream(BytesIO(data1), sigkey, chunk_size=1000)
+    assert signature == sign(data1, sigkey)
+    assert verify_stream(BytesIO(data2), signature, verkey, 7) == res
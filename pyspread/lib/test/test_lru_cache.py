@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+
+"""
+test_lru_cache
+==============
+
+Unit tests for lru_cache.py
+
+"""
+
+from ..lru_cache import LRUCache
+
+
+def test_lru_cache():
+    """Unit test for LRUCache"""
+
+    cache = LRUCache(max_size=2)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    # Reading "a" makes "b" the least recently used item
+    assert cache["a"] == 1
+    cache["c"] = 3
+
+    assert list(cache) == ["a", "c"]
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    # Overwriting "a" marks it as recently used
+    cache["a"] = 4
+    cache["d"] = 5
+    assert list(cache.items()) == [("a", 4), ("d", 5)]
+
+
+def test_lru_cache_max_bytes():
+    """Unit test for LRUCache with a size limit in bytes"""
+
+    cache = LRUCache(max_size=10, max_bytes=10, nbytes=len)
+    cache["a"] = "xxxx"
+    cache["b"] = "xxxx"
+    assert cache.total_bytes == 8
+
+    # Overwriting "a" replaces its size
+    cache["a"] = "xx"
+    assert cache.total_bytes == 6
+
+    # Adding "c" removes the least recently used item "b"
+    cache["c"] = "xxxxxx"
+    assert list(cache) == ["a", "c"]
+    assert cache.total_bytes == 8
+
+    # The most recently used item is kept even if it is too large
+    cache["d"] = "x" * 20
+    assert list(cache) == ["d"]
+    assert cache.total_bytes == 20
+
+    assert cache.pop("d") == "x" * 20
+    assert cache.total_bytes == 0
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+
+"""
+test_startup_timer
+==================
+
+Unit tests for startup_timer.py
+
+"""
+
+import builtins
+import json
+
+from ..startup_timer import StartupTimer
+
+
+def test_startup_timer(tmpdir):
+    """Unit test for StartupTimer"""
+
+    builtin_import = builtins.__import__
+
+    timer = StartupTimer()
+    assert builtins.__import__ is builtin_import
+
+    timer.start()
+    timer.mark("Phase 1")
+    import xml.dom.minidom  # noqa: F401
+    timer.mark("Phase 2")
+    timer.stop()
+    assert builtins.__import__ is builtin_import
+
+    phases = timer.phases()
+    assert [phase["phase"] for phase in phases] == ["Phase 1", "Phase 2"]
+    # Phase 1 has started before the import time measurement
+    assert phases[0]["import_time"] is None
+    assert phases[1]["wall_time"] >= phases[1]["import_time"] > 0
+    assert all(phase["modules"] >= 0 for phase in phases)
+
+    report = timer.report().splitlines()
+    assert report[0].startswith("Startup phase")
+    assert report[1].startswith("Phase 1")
+    assert report[1].split()[3] == "-"
+    assert report[-1].startswith("Total")
+
+    report_path = tmpdir / "startup.json"
+    timer.write_report(str(report_path), version="1.0")
+    with open(str(report_path)) as report_file:
+        report = json.load(report_file)
+    assert report["version"] == "1.0"
+    assert report["phases"] == phases
+    assert report["import_time"] == phases[1]["import_time"]
@@ -28,7 +28,7 @@ Unit tests for string_helpers.py
 """
 
 import py.test as pytest
-from ..string_helpers import quote, wrap_text, get_svg_size
+from ..string_helpers import quote, wrap_text, preview_str, get_svg_size
 
 
 param_test_quote = [
@@ -70,6 +70,25 @@ def test_wrap_text(text, width, maxlen, res):
     assert wrap_text(text, width, maxlen) == res
 
 
+param_test_preview_str = [
+    (None, 2000, "None"),
+    ([1, 2], 2000, "[1, 2]"),
+    ("x"*10, 4, "xxxx..."),
+    (list(range(100)), 10, "[0, 1, 2, ..."),
+    (tuple(range(10)), 4, "(0, ..."),
+    ((1,), 2000, "(1,)"),
+    ({"b": [1.5, None], "a": "x"}, 2000, "{'b': [1.5, None], 'a': 'x'}"),
+    ([list(range(10 ** 6))], 10, "[[0, 1, 2,..."),
+]
+
+
+@pytest.mark.parametrize("obj, maxlen, res", param_test_preview_str)
+def test_preview_str(obj, maxlen, res):
+    """Unit test for preview_str"""
+
+    assert preview_str(obj, maxlen) == res
+
+
 SVG_1 = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
 <!-- Created with Inkscape (http://www.inkscape.org/) -->
 
@@ -25,6 +25,7 @@ Contains functions for checking type likeness.
 """
 
 from io import BytesIO
+import sys
 import xml.etree.ElementTree as ET
 
 
@@ -64,3 +65,15 @@ def is_svg(svg_bytes):
     svg.close()
 
     return tag == '{http://www.w3.org/2000/svg}svg'
+
+
+def is_matplotlib_figure(obj):
+    """Returns True if obj is a matplotlib figure
+
+    matplotlib is not imported. If it has not been imported yet then obj
+    cannot be a figure.
+
+    """
+
+    figure_module = sys.modules.get("matplotlib.figure")
+    return figure_module is not None and isinstance(obj, figure_module.Figure)
@@ -40,12 +40,8 @@ from pathlib import Path
 
 from PyQt5.QtWidgets import QMenuBar, QMenu, QAction
 
-try:
-    import matplotlib.figure as matplotlib_figure
-except ImportError:
-    matplotlib_figure = None
-
 from icons import Icon
+from lib.dependencies import is_installed
 
 
 class MenuBar(QMenuBar):
@@ -164,6 +160,9 @@ class ViewMenu(QMenu):
         self.addAction(actions.toggle_periodic_updates)
         self.addSeparator()
         self.addAction(actions.show_frozen)
+        self.addSeparator()
+        self.addAction(actions.toggle_cell_profiler)
+        self.addAction(actions.show_cell_profile)
 
 
 class FormatMenu(QMenu):
@@ -186,7 +185,7 @@ class FormatMenu(QMenu):
         self.renderer_submenu.addAction(actions.text)
         self.renderer_submenu.addAction(actions.image)
         self.renderer_submenu.addAction(actions.markup)
-        if matplotlib_figure is not None:
+        if is_installed("matplotlib"):
             self.renderer_submenu.addAction(actions.matplotlib)
 
         self.addAction(actions.freeze_cell)
@@ -237,7 +236,7 @@ class MacroMenu(QMenu):
         super().__init__('&Macro', parent)
 
         self.addAction(actions.insert_image)
-        if matplotlib_figure is not None:
+        if is_installed("matplotlib"):
             self.addAction(actions.insert_chart)
 
 
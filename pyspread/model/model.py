@@ -39,21 +39,94 @@ from builtins import object
 
 import ast
 import base64
+import builtins
 import bz2
 from copy import copy
 import datetime
+from importlib import import_module
 from inspect import isgenerator
 from itertools import product
 import re
 import sys
 
 import numpy
-from PyQt5.QtGui import QImage, QPixmap
 
-import lib.charts as charts
 from lib.typechecks import isslice, isstring
 from lib.selection import Selection
 
+# Names in cells and macros that are imported on first use
+# Importing them on demand keeps Qt and matplotlib out of the model.
+LAZY_GLOBALS = {
+    'QImage': ('PyQt5.QtGui', 'QImage'),
+    'QPixmap': ('PyQt5.QtGui', 'QPixmap'),
+    'charts': ('lib.charts', None),
+    'Figure': ('matplotlib.figure', 'Figure'),
+}
+
+
+def lazy_global(name):
+    """Imports and returns the object of a name in LAZY_GLOBALS
+
+    :param name: Name in LAZY_GLOBALS
+    :type name: str
+    :raises KeyError: If name is not in LAZY_GLOBALS or cannot be imported
+
+    """
+
+    module_name, attr_name = LAZY_GLOBALS[name]
+
+    try:
+        module = import_module(module_name)
+    except ImportError:
+        raise KeyError(name)
+
+    if attr_name is None:
+        return module
+    return getattr(module, attr_name)
+
+
+def lazy_globals(code):
+    """Returns dict of the lazily imported globals that code refers to
+
+    Only names in the code are found. Names in strings, comments or dynamic
+    code are not. Names, which modules cannot be imported, are omitted.
+
+    :param code: Macros
+    :type code: str
+
+    """
+
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return {}
+
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+
+    _lazy_globals = {}
+
+    for name in names.intersection(LAZY_GLOBALS):
+        try:
+            _lazy_globals[name] = lazy_global(name)
+        except KeyError:
+            pass
+
+    return _lazy_globals
+
+
+class LazyBuiltins(dict):
+    """Builtins dict that imports names in LAZY_GLOBALS on first access
+
+    Cells are evaluated with a LazyBuiltins copy of the builtins. Python
+    calls __missing__ of builtins that are a dict subclass for names that
+    are neither local nor global, also in dynamic code, e.g. of eval.
+
+    """
+
+    def __missing__(self, name):
+        value = self[name] = lazy_global(name)
+        return value
+
 
 class CellAttributes(list):
     """Stores cell formatting attributes in a list of three tuples
@@ -206,9 +279,13 @@ class CellAttributes(list):
 
         row, col, tab = key
 
+        # Update table cache if it is outdated (e.g. when creating a new grid)
+        if len(self) != self._len_table_cache():
+            self._update_table_cache()
+
         # Is cell merged
-        for selection, table, attr in self:
-            if tab == table and "merge_area" in attr:
+        for selection, attr in self._table_cache.get(tab, []):
+            if "merge_area" in attr:
                 top, left, bottom, right = attr["merge_area"]
                 if top <= row <= bottom and left <= col <= right:
                     return top, left, tab
@@ -283,6 +360,27 @@ class DictGrid(KeyValueStore):
         self.row_heights = defaultdict(float)  # Keys have format (row, table)
         self.col_widths = defaultdict(float)  # Keys have format (col, table)
 
+        self.table_loader = None
+        """Loader that reads the cell code of one table into the grid
+
+        It is used for tables in :attr:`~DictGrid.unloaded_tables`, which
+        are loaded lazily, e.g. from a `.pysb` file. Its method
+        `load_table(table)` loads a table. Its method `copy(code_array)`
+        returns a loader of the unloaded tables into a copy of the grid.
+
+        """
+
+        self.unloaded_tables = set()
+        """Tables with cell code that has not been loaded yet"""
+
+        self.changed_keys = set()
+        """Keys of cells that have been changed since the last save
+
+        The keys are added by :class:`DataArray`. They allow saving only
+        the changed cells to a journal.
+
+        """
+
     def __getitem__(self, key):
 
         shape = self.shape
@@ -296,9 +394,80 @@ class DictGrid(KeyValueStore):
         return super().__getitem__(key)
 
     def __missing__(self, key):
-        """Default value is None"""
+        """Default value is None
+
+        If the table of key has not been loaded yet then it is loaded first.
+
+        """
+
+        if self.unloaded_tables and key[2] in self.unloaded_tables:
+            self.load_tables([key[2]])
+            return self.get(key)
+
+    def __setitem__(self, key, value):
+        if self.unloaded_tables:
+            self.load_tables([key[2]])
+        super().__setitem__(key, value)
+
+    def __iter__(self):
+        self.load_tables()
+        return super().__iter__()
+
+    def __len__(self):
+        self.load_tables()
+        return super().__len__()
+
+    def __contains__(self, key):
+        if self.unloaded_tables:
+            self.load_tables([key[2]])
+        return super().__contains__(key)
+
+    def keys(self):
+        self.load_tables()
+        return super().keys()
+
+    def values(self):
+        self.load_tables()
+        return super().values()
+
+    def items(self):
+        self.load_tables()
+        return super().items()
+
+    def pop(self, key, *args):
+        if self.unloaded_tables:
+            self.load_tables([key[2]])
+        return super().pop(key, *args)
+
+    def clear(self):
+        """Clears all cells including tables that have not been loaded"""
 
-        return
+        self.table_loader = None
+        self.unloaded_tables.clear()
+        self.changed_keys.clear()
+        super().clear()
+
+    def load_tables(self, tables=None):
+        """Loads cell code of unloaded tables via :attr:`table_loader`
+
+        :param tables: Tables to be loaded, all unloaded tables if None
+        :type tables: Iterable of int, optional
+
+        """
+
+        if not self.unloaded_tables:
+            return
+
+        if tables is None:
+            tables = sorted(self.unloaded_tables)
+
+        for table in tables:
+            if table in self.unloaded_tables:
+                self.unloaded_tables.remove(table)
+                self.table_loader.load_table(table)
+
+        if not self.unloaded_tables:
+            self.table_loader = None
 
 # End of class DictGrid
 
@@ -598,6 +767,7 @@ class DataArray:
                     self.cell_attributes.get_merging_cell(single_key)
                 if merging_cell is None or merging_cell == single_key:
                     self.dict_grid[single_key] = value
+                    self.dict_grid.changed_keys.add(single_key)
             else:
                 # Value is empty --> delete cell
                 try:
@@ -606,6 +776,61 @@ class DataArray:
                 except (KeyError, TypeError):
                     pass
 
+    def set_code_block(self, key, block):
+        """Sets the code of a block of cells in one operation
+
+        Cells outside the grid shape and cells that are merged into other
+        cells are not changed. Empty code deletes a cell.
+
+        :param key: Top left cell of the block
+        :type key: tuple of 3 int
+        :param block: Rows of cell code
+        :type block: Iterable of Iterable of str or None
+        :return: Previous code of all cells in the block that had code
+        :rtype: dict
+
+        """
+
+        top, left, table = key
+        rows, columns, _ = self.shape
+
+        dict_grid = self.dict_grid
+        dict_grid.load_tables([table])
+
+        cell_attributes = self.cell_attributes
+        has_merged_cells = any(tab == table and attr.get("merge_area")
+                               for _, tab, attr in cell_attributes)
+
+        old_codes = {}
+
+        for row, line in zip(range(top, rows), block):
+            for column, code in zip(range(left, columns), line):
+                single_key = row, column, table
+
+                if has_merged_cells:
+                    # Never change merged cells
+                    merging_cell = \
+                        cell_attributes.get_merging_cell(single_key)
+                    if merging_cell not in (None, single_key):
+                        continue
+
+                old_code = dict.get(dict_grid, single_key)
+                if old_code is not None:
+                    old_codes[single_key] = old_code
+
+                if not code:
+                    code = None
+                if code == old_code:
+                    continue
+
+                if code is None:
+                    del dict_grid[single_key]
+                else:
+                    dict_grid[single_key] = code
+                dict_grid.changed_keys.add(single_key)
+
+        return old_codes
+
     # Pickle support
 
     def __getstate__(self):
@@ -643,7 +868,9 @@ class DataArray:
     def pop(self, key):
         """dict_grid pop wrapper"""
 
-        return self.dict_grid.pop(key)
+        value = self.dict_grid.pop(key)
+        self.dict_grid.changed_keys.add(key)
+        return value
 
     def get_last_filled_cell(self, table=None):
         """Returns key for the bottommost rightmost cell with content
@@ -1059,6 +1286,9 @@ class CodeArray(DataArray):
     # Custom font storage
     custom_fonts = {}
 
+    # Optional lib.cell_profiler.CellProfiler, cells are not profiled if None
+    profiler = None
+
     def __setitem__(self, key, value):
         """Sets cell code and resets result cache"""
 
@@ -1080,6 +1310,18 @@ class CodeArray(DataArray):
             # Reset result cache
             self.result_cache = {}
 
+    def set_code_block(self, key, block):
+        """Sets the code of a block of cells and resets result cache"""
+
+        # Change numpy array repr function for grid cell results
+        numpy.set_string_function(lambda s: repr(s.tolist()))
+
+        old_codes = super().set_code_block(key, block)
+
+        self.result_cache = {}
+
+        return old_codes
+
     def __getitem__(self, key):
         """Returns _eval_cell"""
 
@@ -1166,7 +1408,10 @@ class CodeArray(DataArray):
             for target in last_body.targets:
                 _globals[target.id] = res
 
+        # Cells must not replace the builtins of the model
+        _builtins = globals()['__builtins__']
         globals().update(_globals)
+        globals()['__builtins__'] = _builtins
 
         return res
 
@@ -1184,11 +1429,11 @@ class CodeArray(DataArray):
                 return numpy.array([_f for _f in val if _f])
 
         # Set up environment for evaluation
-        from matplotlib.figure import Figure  # Needs to be imported here
         env_dict = {'X': key[0], 'Y': key[1], 'Z': key[2], 'bz2': bz2,
-                    'base64': base64, 'nn': nn, 'Figure': Figure,
+                    'base64': base64, 'nn': nn,
                     'R': key[0], 'C': key[1], 'T': key[2], 'S': self}
         env = self._get_updated_environment(env_dict=env_dict)
+        env['__builtins__'] = LazyBuiltins(vars(builtins))
 
         # Return cell value if in safe mode
 
@@ -1215,6 +1460,12 @@ class CodeArray(DataArray):
             # No POSIX system
             pass
 
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.start()
+
+        result = None
+
         try:
             result = self.exec_then_eval(code, env, {})
 
@@ -1235,6 +1486,9 @@ class CodeArray(DataArray):
                 # No POSIX system
                 pass
 
+            if profiler is not None:
+                profiler.stop(key, start, result)
+
         # Change back cell value for evaluation from other cells
         # self.dict_grid[key] = _old_code
 
@@ -1274,7 +1528,10 @@ class CodeArray(DataArray):
                      'CellAttributes', 'product', 'ast', '__builtins__',
                      '__file__', 'sys', 'isslice', '__name__', 'QImage',
                      'copy', 'imap', 'ifilter', 'Selection', 'DictGrid',
-                     'numpy', 'CodeArray', 'DataArray', 'datetime']
+                     'numpy', 'CodeArray', 'DataArray', 'datetime',
+                     'Figure', 'LAZY_GLOBALS', 'lazy_global',
+                     'lazy_globals', 'LazyBuiltins', 'builtins',
+                     'import_module']
 
         for key in list(globals().keys()):
             if key not in base_keys:
@@ -1304,6 +1561,7 @@ class CodeArray(DataArray):
 
         # Set up environment for evaluation
         globals().update(self._get_updated_environment())
+        globals().update(lazy_globals(self.macros))
 
         # Create file-like string to capture output
         import io
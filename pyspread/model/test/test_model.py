@@ -36,6 +36,7 @@ from builtins import object
 import fractions  # Yes, it is required
 import math  # Yes, it is required
 from os.path import abspath, dirname, join
+import subprocess
 import sys
 
 import py.test as pytest
@@ -47,6 +48,7 @@ sys.path.insert(0, pyspread_path)
 from model.model \
     import KeyValueStore, CellAttributes, DictGrid, DataArray, CodeArray
 
+from lib.cell_profiler import CellProfiler
 from lib.selection import Selection
 sys.path.pop(0)
 
@@ -184,6 +186,30 @@ class TestDataArray(object):
 
         assert sorted(self.data_array.keys()) == [(1, 2, 4)]
 
+    def test_set_code_block(self):
+        """Unit test for set_code_block"""
+
+        self.data_array[(1, 2, 3)] = "12"
+        self.data_array[(1, 3, 3)] = "13"
+        self.data_array[(5, 5, 3)] = "55"
+
+        block = [["a", "b"], ["c", ""], ["d"]]
+        old_codes = self.data_array.set_code_block((0, 2, 3), block)
+
+        assert old_codes == {(1, 2, 3): "12", (1, 3, 3): "13"}
+        assert self.data_array((0, 3, 3)) == "b"
+        assert self.data_array((1, 2, 3)) == "c"
+        assert self.data_array((1, 3, 3)) is None
+        assert self.data_array((2, 2, 3)) == "d"
+        assert self.data_array((5, 5, 3)) == "55"
+
+        # Cells outside the grid are ignored
+        old_codes = self.data_array.set_code_block((99, 99, 0),
+                                                   [["x", "y"], ["z"]])
+        assert old_codes == {}
+        assert self.data_array.keys().count((99, 99, 0)) == 1
+        assert len(self.data_array.keys()) == 6
+
     def test_get_shape(self):
         """Unit test for _get_shape"""
 
@@ -454,6 +480,77 @@ class TestCodeArray(object):
         assert self.code_array._eval_cell((0, 0, 0), "a") == 5
         assert self.code_array._eval_cell((0, 0, 0), "f(2)") == 4
 
+    def test_lazy_globals(self):
+        """Unit test for lazily imported Figure, QImage, QPixmap and charts"""
+
+        code = "type(Figure()).__name__, QImage.__name__, charts.__name__"
+        res = self.code_array._eval_cell((0, 0, 0), code)
+        assert res == ("Figure", "QImage", "lib.charts")
+
+        self.code_array.macros = "def f(): return QPixmap.__name__"
+        self.code_array.execute_macros()
+        assert self.code_array._eval_cell((0, 0, 0), "f()") == "QPixmap"
+
+        # Names are also resolved in dynamic code and nested scopes
+        code = "eval('QImage').__name__, (lambda: charts.__name__)()"
+        res = self.code_array._eval_cell((0, 0, 0), code)
+        assert res == ("QImage", "lib.charts")
+
+        # Cell globals shadow lazy globals
+        self.code_array.macros = "QImage = 1"
+        self.code_array.execute_macros()
+        assert self.code_array._eval_cell((0, 0, 0), "QImage") == 1
+        self.code_array.clear_globals()
+
+    def test_profiler(self):
+        """Unit test for profiling cell evaluations"""
+
+        self.code_array[0, 0, 0] = "1"
+        self.code_array[1, 0, 0] = "S[0, 0, 0] + 1"
+
+        self.code_array.profiler = CellProfiler()
+        try:
+            assert self.code_array[1, 0, 0] == 2
+        finally:
+            stats = self.code_array.profiler.stats
+            self.code_array.profiler = None
+
+        assert sorted(stats) == [(0, 0, 0), (1, 0, 0)]
+        assert stats[(1, 0, 0)].count == 1
+        assert stats[(1, 0, 0)].cumulative_time >= \
+            stats[(0, 0, 0)].cumulative_time
+
+    def test_profiler_interrupt(self):
+        """Profiled evaluations are stopped if they are interrupted"""
+
+        self.code_array[0, 0, 0] = "exec('raise SystemExit')"
+
+        profiler = self.code_array.profiler = CellProfiler()
+        try:
+            with pytest.raises(SystemExit):
+                self.code_array[0, 0, 0]
+        finally:
+            self.code_array.profiler = None
+
+        assert not profiler._child_times
+        assert profiler.stats[(0, 0, 0)].count == 1
+
+    def test_import_without_qt(self):
+        """The model must not import Qt or matplotlib"""
+
+        code = "import sys; sys.path.insert(0, {!r}); " \
+               "from types import SimpleNamespace; " \
+               "from model.model import CodeArray; " \
+               "settings = SimpleNamespace(timeout=10, max_unredo=5, " \
+               "safe_mode=False); " \
+               "code_array = CodeArray((1, 1, 1), settings); " \
+               "code_array[0, 0, 0] = '\"QImage, Figure\"  # charts'; " \
+               "code_array[0, 0, 0]; " \
+               "print(any(name.split('.')[0] in ('PyQt5', 'matplotlib') " \
+               "for name in sys.modules))".format(pyspread_path)
+        output = subprocess.check_output([sys.executable, "-c", code])
+        assert output.strip() == b"False"
+
     def test_sorted_keys(self):
         """Unit test for _sorted_keys"""
 
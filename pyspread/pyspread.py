@@ -39,7 +39,10 @@ pyspread
 import os
 import sys
 
-from PyQt5.QtCore import Qt, pyqtSignal, QEvent, QTimer, QRectF
+from lib.startup_timer import startup_timer
+
+from PyQt5.QtCore import (Qt, pyqtSignal, QEvent, QTimer, QRectF,
+                          QModelIndex)
 from PyQt5.QtWidgets import (QMainWindow, QApplication, QSplitter, QMessageBox,
                              QDockWidget, QUndoStack, QStyleOptionViewItem)
 try:
@@ -61,11 +64,15 @@ from actions import MainWindowActions
 from workflows import Workflows
 from widgets import Widgets
 from dialogs import (ApproveWarningDialog, PreferencesDialog, ManualDialog,
-                     TutorialDialog, PrintAreaDialog, PrintPreviewDialog)
+                     TutorialDialog, PrintAreaDialog, PrintPreviewDialog,
+                     CellProfileDialog)
 from installer import DependenciesDialog
 from panels import MacroPanel
+from lib.cell_profiler import CellProfiler
 from lib.hashing import genkey
 
+startup_timer.mark("Imports")
+
 LICENSE = "GNU GENERAL PUBLIC LICENSE Version 3"
 
 os.environ["QT_AUTO_SCREEN_SCALE_FACTOR"] = "1"
@@ -96,18 +103,28 @@ class MainWindow(QMainWindow):
         self.workflows = Workflows(self)
         self.undo_stack = QUndoStack(self)
         self.refresh_timer = QTimer()
+        self.autosave_timer = QTimer()
+        self.cell_profiler = CellProfiler()
+        startup_timer.mark("Main window setup")
 
         self._init_widgets()
 
         self.main_window_actions = MainWindowActions(self)
+        startup_timer.mark("Actions")
 
         self._init_window()
+        startup_timer.mark("Window")
+
         self._init_toolbars()
+        startup_timer.mark("Toolbars")
 
         self.settings.restore()
         if self.settings.signature_key is None:
             self.settings.signature_key = genkey()
 
+        self.update_autosave_timer()
+        startup_timer.mark("Settings restore")
+
         # Update recent files in the file menu
         self.menuBar().file_menu.history_submenu.update()
 
@@ -123,6 +140,7 @@ class MainWindow(QMainWindow):
 
         self._loading = False
         self._previous_window_state = self.windowState()
+        startup_timer.mark("Window update")
 
         # Open initial file if provided by the command line
         if args.file is not None:
@@ -131,6 +149,11 @@ class MainWindow(QMainWindow):
             else:
                 msg = "File '{}' could not be opened.".format(args.file)
                 self.statusBar().showMessage(msg)
+            startup_timer.mark("File open")
+
+        # Offer recovery of an untitled workbook of a crashed session
+        elif self.workflows.recover_untitled():
+            startup_timer.mark("File recovery")
 
     def _init_window(self):
         """Initialize main window components"""
@@ -167,7 +190,10 @@ class MainWindow(QMainWindow):
         self.widgets = Widgets(self)
 
         self.entry_line = Entryline(self)
+        startup_timer.mark("Entry line")
+
         self.grid = Grid(self)
+        startup_timer.mark("Grid model creation")
 
         self.macro_panel = MacroPanel(self, self.grid.model.code_array)
 
@@ -189,6 +215,8 @@ class MainWindow(QMainWindow):
 
         self.gui_update.connect(self.on_gui_update)
         self.refresh_timer.timeout.connect(self.on_refresh_timer)
+        self.autosave_timer.timeout.connect(self.workflows.autosave)
+        startup_timer.mark("Macro panel")
 
     def eventFilter(self, source, event):
         """Event filter for handling QDockWidget close events
@@ -375,6 +403,29 @@ class MainWindow(QMainWindow):
         self.grid.model.code_array.clear_globals()
         self.grid.model.code_array.reload_modules()
 
+    def on_toggle_cell_profiler(self, toggled):
+        """Toggles profiling of cell evaluations
+
+        The result cache is cleared so that visible cells are evaluated and
+        profiled again.
+
+        """
+
+        code_array = self.grid.model.code_array
+
+        if toggled:
+            code_array.profiler = self.cell_profiler
+            code_array.result_cache.clear()
+            self.grid.model.dataChanged.emit(QModelIndex(), QModelIndex())
+        else:
+            code_array.profiler = None
+
+    def on_show_cell_profile(self):
+        """Shows the slowest cells report of the cell profiler"""
+
+        dialog = CellProfileDialog(self, self.cell_profiler)
+        dialog.exec_()
+
     def on_preferences(self):
         """Preferences event handler (:class:`dialogs.PreferencesDialog`) """
 
@@ -394,6 +445,8 @@ class MainWindow(QMainWindow):
             if max_file_history_changed:
                 self.menuBar().file_menu.history_submenu.update()
 
+            self.update_autosave_timer()
+
     def on_dependencies(self):
         """Dependancies installer (:class:`installer.InstallerDialog`) """
 
@@ -410,6 +463,15 @@ class MainWindow(QMainWindow):
 
         self.undo_stack.redo()
 
+    def update_autosave_timer(self):
+        """Starts or stops the autosave timer according to the settings"""
+
+        interval = self.settings.autosave_interval
+        if interval and not self.unit_test:
+            self.autosave_timer.start(interval * 1000)
+        else:
+            self.autosave_timer.stop()
+
     def on_toggle_refresh_timer(self, toggled):
         """Toggles periodic timer for frozen cells"""
 
@@ -587,13 +649,51 @@ class MainWindow(QMainWindow):
         merge_cells_action.setChecked(attributes["merge_area"] is not None)
 
 
+def report_startup(args, profiler=None):
+    """Ends startup time measurement and reports startup phases
+
+    :param args: Command line arguments object from argparse
+    :param profiler: Profiler of the main window startup
+    :type profiler: cProfile.Profile
+
+    """
+
+    startup_timer.mark("First event loop iteration")
+    startup_timer.stop()
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(str(args.profile_stats))
+
+    if args.startup_time:
+        sys.stderr.write(startup_timer.report() + "\n")
+
+    if args.profile_startup is not None:
+        startup_timer.write_report(args.profile_startup, version=VERSION)
+
+
 def main():
     parser = ArgumentParser()
     args = parser.parse_args()
+    if args.profile_stats is not None and args.profile_startup is None:
+        parser.error("--profile-stats requires --profile-startup")
+    if args.startup_time or args.profile_startup is not None:
+        startup_timer.start()
+    startup_timer.mark("Command line")
+
+    profiler = None
+    if args.profile_stats is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
 
     app = QApplication(sys.argv)
+    startup_timer.mark("Application")
+
     main_window = MainWindow(app, args)
 
+    QTimer.singleShot(0, lambda: report_startup(args, profiler))
+
     app.exec_()
 
 
@@ -81,6 +81,16 @@ class Settings:
     # Key for signing save files
     signature_key = None
 
+    # Maximum size of the save journal in MB before it is compacted into the
+    # save file. If 0 then saves always write the whole file.
+    journal_size = 0
+
+    # Period for saving recovery files in seconds, 0 disables autosave
+    autosave_interval = 300
+
+    # Number of rotating recovery files for each file
+    autosave_files = 3
+
     font_sizes = (6, 8, 10, 12, 14, 16, 18, 20, 24, 28, 32)
 
     zoom_levels = (0.4, 0.5, 0.6, 0.7, 0.8, 1.0,
@@ -145,6 +155,9 @@ class Settings:
         settings.setValue("timeout", self.timeout)
         settings.setValue("refresh_timeout", self.refresh_timeout)
         settings.setValue("signature_key", self.signature_key)
+        settings.setValue("journal_size", self.journal_size)
+        settings.setValue("autosave_interval", self.autosave_interval)
+        settings.setValue("autosave_files", self.autosave_files)
 
         # GUI state
         for widget_name in self.widget_names:
@@ -205,6 +218,9 @@ class Settings:
         setting2attr("timeout", mapper=int)
         setting2attr("refresh_timeout", mapper=int)
         setting2attr("signature_key")
+        setting2attr("journal_size", mapper=int)
+        setting2attr("autosave_interval", mapper=int)
+        setting2attr("autosave_files", mapper=int)
 
         # GUI state
 
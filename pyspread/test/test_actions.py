@@ -40,6 +40,7 @@ from PyQt5.QtWidgets import QApplication
 pyspread_path = abspath(join(dirname(__file__) + "/.."))
 sys.path.insert(0, pyspread_path)
 from ..pyspread import MainWindow
+from lib.selection import Selection
 sys.path.pop(0)
 
 app = QApplication([])
@@ -120,6 +121,60 @@ class TestActions:
             assert code_array((2, 1, 0)).startswith(res)
         assert self.main_window.safe_mode == safe_mode
 
+    def test_file_open_recovery(self, tmp_path):
+        """Unit test for File -> Open of a recovery file"""
+
+        infilepath = Path(__file__).parent / "test.pysu"
+        recovery_path = tmp_path / "test.pysu"
+        recovery_path.write_bytes(infilepath.read_bytes())
+
+        workflows = self.main_window.workflows
+        workflows._get_recovery_path = lambda filepath: recovery_path
+
+        self.main_window.unit_test_data = infilepath
+        self.main_window.main_window_actions.open.trigger()
+
+        code_array = self.main_window.grid.model.code_array
+        assert code_array((2, 1, 0)).startswith("fig")
+
+        # The recovered work must not be discarded without a prompt
+        assert workflows.file_recovered
+        assert self.main_window.settings.changed_since_save
+
+    def test_recover_untitled(self, tmp_path, monkeypatch):
+        """Unit test for recovering an untitled workbook of a crashed session
+        """
+
+        autosave = sys.modules["autosave"]
+        monkeypatch.setattr(autosave, "recovery_directory", lambda: tmp_path)
+
+        # No process has the id 2 ** 30, so that its session has ended
+        infilepath = Path(__file__).parent / "test.pysu"
+        for i in range(2):
+            path = tmp_path / "untitled-{}-1.{}.pysu".format(2 ** 30, i)
+            path.write_bytes(infilepath.read_bytes())
+        # Recovery files of this session and of saved files are not offered
+        (tmp_path / (autosave.UNTITLED_NAME + ".0.pysu")).write_bytes(b"")
+        (tmp_path / "untitled-a-1234.0.pysu").write_bytes(b"")
+
+        recovery_paths = autosave.untitled_recovery_paths()
+        assert recovery_paths == [tmp_path / "untitled-{}-1.0.pysu".format(
+            2 ** 30)]
+
+        workflows = self.main_window.workflows
+        workflows._get_untitled_recovery_path = lambda: recovery_paths[0]
+        assert workflows.recover_untitled()
+
+        code_array = self.main_window.grid.model.code_array
+        assert code_array((2, 1, 0)).startswith("fig")
+        assert self.main_window.settings.changed_since_save
+        assert self.main_window.settings.last_file_input_path == Path.home()
+
+        # The recovery files belong to this session now
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            autosave.UNTITLED_NAME + ".0.pysu",
+            autosave.UNTITLED_NAME + ".1.pysu", "untitled-a-1234.0.pysu"]
+
     def test_file_save(self):
         """Unit test for File -> Save"""
 
@@ -135,3 +190,23 @@ class TestActions:
 
         save_path.with_suffix(save_path.suffix + ".sig").unlink()
         save_path.unlink()
+
+    def test_display_markup(self):
+        """Long markup results are displayed completely"""
+
+        grid = self.main_window.grid
+        code_array = grid.model.code_array
+        index = grid.model.index(0, 0)
+
+        html = "<table>" + "<tr><td>Row</td></tr>" * 2000 + "</table>"
+        code_array[0, 0, 0] = repr(html)
+        code_array[0, 1, 0] = repr(html)
+        code_array.cell_attributes.append((Selection([], [], [], [], [(0, 0)]),
+                                           0, {"renderer": "markup"}))
+
+        assert len(html) > grid.model.display_maxlen
+        assert grid.model.data(index, Qt.DisplayRole) == html
+
+        # Text is truncated
+        text = grid.model.data(grid.model.index(0, 1), Qt.DisplayRole)
+        assert len(text) == grid.model.display_maxlen + len("...")
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+# Copyright Martin Manns
+# Distributed under the terms of the GNU General Public License
+
+# --------------------------------------------------------------------
+# pyspread is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyspread is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyspread.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------------------------------
+
+
+"""
+test_batch
+==========
+
+Unit tests for batch.py
+
+"""
+
+import csv
+import json
+from os.path import abspath, dirname, join
+import sys
+
+import numpy
+import py.test as pytest
+
+pyspread_path = abspath(join(dirname(__file__) + "/.."))
+sys.path.insert(0, pyspread_path)
+from batch import load, evaluate, main
+from interfaces.pys import PysWriter
+from lib.hashing import genkey, sign
+from model.model import CodeArray
+sys.path.pop(0)
+
+KEY = genkey()
+
+
+class Settings:
+    """Simulates settings class"""
+
+    timeout = 1000
+
+
+@pytest.fixture
+def pysu_path(tmp_path):
+    """Returns path of signed pysu file"""
+
+    code_array = CodeArray((10, 5, 2), Settings())
+    code_array[0, 0, 0] = "1"
+    code_array[1, 0, 0] = "a + 1"
+    code_array[1, 2, 0] = "'x'"
+    code_array[0, 0, 1] = "2"
+    code_array.macros = "a = 41"
+
+    path = tmp_path / "test.pysu"
+    data = bytes("".join(PysWriter(code_array)), "utf-8")
+    path.write_bytes(data)
+    (tmp_path / "test.pysu.sig").write_bytes(sign(data, KEY))
+
+    return path
+
+
+def test_load(pysu_path):
+    """Unit test for load"""
+
+    assert load(pysu_path, KEY).shape == (10, 5, 2)
+
+    with pytest.raises(ValueError):
+        load(pysu_path, genkey())
+
+    assert load(pysu_path, genkey(), unsigned=True).shape == (10, 5, 2)
+
+
+def test_evaluate(pysu_path):
+    """Unit test for evaluate"""
+
+    code_array = load(pysu_path, KEY)
+
+    assert evaluate(code_array) == [[1, None, None], [42, None, 'x']]
+    assert evaluate(code_array, 1) == [[2]]
+    assert evaluate(code_array, 0, (1, 1, 20, 2)) == [[None, 'x']] + \
+        [[None, None]] * 8
+
+    with pytest.raises(ValueError):
+        evaluate(code_array, 2)
+
+
+def test_main(pysu_path, monkeypatch):
+    """Unit test for main"""
+
+    monkeypatch.setenv("PYSPREAD_SIGNATURE_KEY", repr(KEY))
+
+    output = pysu_path.parent
+    files = [str(pysu_path), str(output / "out")]
+
+    assert main([files[0], files[1] + ".csv"]) == 0
+    with open(files[1] + ".csv", newline='') as csvfile:
+        assert list(csv.reader(csvfile)) == [["1", "", ""], ["42", "", "x"]]
+
+    assert main([files[0], files[1] + ".json", "--region", "1", "0", "1",
+                 "2"]) == 0
+    with open(files[1] + ".json") as jsonfile:
+        assert json.load(jsonfile) == [[42, None, "x"]]
+
+    assert main([files[0], files[1] + ".npz", "--table", "1"]) == 0
+    assert numpy.load(files[1] + ".npz")["column_0"].tolist() == [2]
+
+    monkeypatch.setenv("PYSPREAD_SIGNATURE_KEY", repr(genkey()))
+    assert main([files[0], files[1] + ".npy"]) == 1
@@ -33,12 +33,8 @@
 from PyQt5.QtWidgets import QToolBar, QToolButton, QMenu
 from PyQt5.QtWidgets import QHBoxLayout, QUndoView
 
-try:
-    import matplotlib.figure as matplotlib_figure
-except ImportError:
-    matplotlib_figure = None
-
 from icons import Icon
+from lib.dependencies import is_installed
 from menus import ToolbarManagerMenu
 from widgets import FindEditor
 
@@ -143,7 +139,7 @@ class MacroToolbar(ToolBarBase):
         """Fills the macro toolbar with QActions"""
 
         self.addAction(actions.insert_image)
-        if matplotlib_figure is not None:
+        if is_installed("matplotlib"):
             self.addAction(actions.insert_chart)
 
         self.addWidget(self.get_manager_button())
@@ -30,6 +30,7 @@ import bz2
 from contextlib import contextmanager
 from copy import deepcopy
 import csv
+from datetime import datetime
 from itertools import cycle
 import io
 from itertools import takewhile, repeat
@@ -39,7 +40,8 @@ from shutil import move
 from tempfile import NamedTemporaryFile
 
 from PyQt5.QtCore \
-    import Qt, QMimeData, QModelIndex, QBuffer, QRect, QRectF, QSize
+    import (Qt, QMimeData, QModelIndex, QBuffer, QRect, QRectF, QSize,
+            QThread)
 from PyQt5.QtGui import QTextDocument, QImage, QPainter, QBrush, QPen
 from PyQt5.QtWidgets \
     import (QApplication, QProgressDialog, QMessageBox, QInputDialog,
@@ -49,29 +51,43 @@ try:
 except ImportError:
     QSvgGenerator = None
 
-try:
-    import matplotlib.figure as matplotlib_figure
-except ImportError:
-    matplotlib_figure = None
-
+from autosave \
+    import (AutosaveThread, recovery_paths, remove_recovery_files, snapshot,
+            untitled_recovery_paths, adopt_recovery_files,
+            discard_recovery_files)
 import commands
 from dialogs \
     import (DiscardChangesDialog, FileOpenDialog, GridShapeDialog,
             FileSaveDialog, ImageFileOpenDialog, ChartDialog, CellKeyDialog,
             FindDialog, ReplaceDialog, CsvFileImportDialog, CsvImportDialog,
             CsvExportDialog, CsvExportAreaDialog, CsvFileExportDialog,
-            SvgExportAreaDialog)
+            SvgExportAreaDialog, NpyExportAreaDialog)
 from interfaces.pys import PysReader, PysWriter
-from lib.hashing import sign, verify
+from interfaces.pysb import PysbReader, PysbWriter
+from interfaces.journal import JournalReader, JournalWriter, journal_path
+from interfaces.npy \
+    import array_codes, load_npy, reference_code, save_npy, save_npz
+from lib.hashing import sign_stream, verify_stream, StreamSigner
 from lib.selection import Selection
-from lib.typechecks import is_svg
-from lib.csv import csv_reader, convert
+from lib.typechecks import is_svg, is_matplotlib_figure
+from lib.chart_renderer import figure_lock
+from lib.csv import csv_digest_chunks
 
 
 class Workflows:
     def __init__(self, main_window):
         self.main_window = main_window
 
+        # Save journal state of the current file
+        self.journal = None
+        self.journal_filepath = None
+        self.journal_signature = None
+
+        self.autosave_thread = None
+
+        # True if the last opened file has been loaded from a recovery file
+        self.file_recovered = False
+
     @contextmanager
     def progress_dialog(self, title, label, maximum):
         """:class:`~contextlib.contextmanager` that displays a progress dialog
@@ -138,11 +154,18 @@ class Workflows:
                     if self.file_save() is False:
                         # File could not be saved --> Abort
                         return
+                else:
+                    # Changes are discarded and so are their recovery files
+                    filepath = self.main_window.settings.last_file_input_path
+                    self.remove_recovery_files(filepath)
+            self.file_recovered = False
             try:
                 func(self, *args, **kwargs)
             except TypeError:
                 func(self)  # No args accepted
-            self.reset_changed_since_save()
+            # A recovered file has not been saved to its filepath yet
+            if not self.file_recovered:
+                self.reset_changed_since_save()
             self.update_main_window_title()
 
         return function_wrapper
@@ -194,6 +217,9 @@ class Workflows:
         # Delete old filepath
         self.main_window.settings.last_file_input_path = Path.home()
 
+        # A new file is not journaled before it is saved
+        self.journal = None
+
         # Set new shape
         self.main_window.grid.model.shape = shape
 
@@ -230,18 +256,37 @@ class Workflows:
             return
         return filesize
 
-    def filepath_open(self, filepath):
-        """Workflow for opening a file if a filepath is known"""
+    def filepath_open(self, filepath, recovery_path=None):
+        """Workflow for opening a file if a filepath is known
+
+        Parameters
+        ----------
+        * filepath: pathlib.Path
+        \tPath of pyspread file, path without suffix for untitled workbooks
+        * recovery_path: pathlib.Path, defaults to None
+        \tRecovery file that is loaded instead of filepath, if None the user
+        \tis asked if a newer recovery file of filepath shall be loaded
+
+        """
 
         grid = self.main_window.grid
         code_array = grid.model.code_array
 
-        filesize = self._get_filesize(filepath)
+        # Load recovery file instead of filepath if the user chooses so
+        if recovery_path is None:
+            recovery_path = self._get_recovery_path(filepath)
+        if recovery_path is None:
+            load_path = filepath
+        else:
+            load_path = recovery_path
+
+        filesize = self._get_filesize(load_path)
         if filesize is None:
             return
 
         # Reset grid
         grid.model.reset()
+        self.journal = None
 
         # Reset macro editor
         self.main_window.macro_panel.macro_editor.clear()
@@ -249,35 +294,44 @@ class Workflows:
         # Is the file signed properly ?
         self.main_window.safe_mode = True
         signature_key = self.main_window.settings.signature_key
+        signature = None
         try:
-            with open(filepath, "rb") as infile:
-                signature_path = filepath.with_suffix(filepath.suffix + '.sig')
+            with open(load_path, "rb") as infile:
+                signature_path = \
+                    load_path.with_suffix(load_path.suffix + '.sig')
                 with open(signature_path, "rb") as sigfile:
-                    self.main_window.safe_mode = not verify(infile.read(),
-                                                            sigfile.read(),
-                                                            signature_key)
+                    signature = sigfile.read()
+                    self.main_window.safe_mode = \
+                        not verify_stream(infile, signature, signature_key)
         except OSError:
             self.main_window.safe_mode = True
 
         # File compression handling
-        if filepath.suffix == ".pysu":
+        if load_path.suffix in (".pysu", ".pysb"):
             fopen = open
         else:
             fopen = bz2.open
 
+        # Binary files are read section wise, tables are loaded lazily
+        if load_path.suffix == ".pysb":
+            reader_class = PysbReader
+        else:
+            reader_class = PysReader
+
         # Process events before showing the modal progress dialog
         self.main_window.application.processEvents()
 
         # Load file into grid
         try:
-            with fopen(filepath, "rb") as infile:
+            with fopen(load_path, "rb") as infile:
                 title = "File open progress"
-                label = "Opening {}...".format(filepath.name)
+                label = "Opening {}...".format(load_path.name)
                 with self.progress_dialog(title, label,
                                           filesize) as progress_dialog:
                     try:
-                        for line in PysReader(infile, code_array):
-                            progress_dialog.setValue(infile.tell())
+                        reader = reader_class(infile, code_array)
+                        for line in reader:
+                            progress_dialog.setValue(reader.tell())
                             self.main_window.application.processEvents()
                             if progress_dialog.wasCanceled():
                                 grid.model.reset()
@@ -295,10 +349,18 @@ class Workflows:
             # Reset grid
             grid.model.reset()
             return
+
+        # Apply changes from the save journal, which a recovery file contains
+        if recovery_path is None:
+            signature = self._replay_journal(filepath, signature)
+
         # Explicitly set the grid shape
         shape = code_array.shape
         grid.model.shape = shape
 
+        # Load the current table of lazily loaded files
+        code_array.dict_grid.load_tables([grid.table])
+
         # Update cell spans and zoom because this is unsupported by the model
         with self.main_window.grid.undo_resizing_row():
             with self.main_window.grid.undo_resizing_column():
@@ -315,16 +377,122 @@ class Workflows:
         self.main_window.settings.last_file_input_path = filepath
 
         # Change the main window filepath state
-        self.main_window.settings.changed_since_save = False
+        # A recovered file has not been saved to filepath yet
+        self.file_recovered = recovery_path is not None
+        self.main_window.settings.changed_since_save = self.file_recovered
 
         # Update macro editor
         self.main_window.macro_panel.update()
 
-        # Add to file history
-        self.main_window.settings.add_to_file_history(filepath.as_posix())
+        # Add to file history unless the workbook is untitled
+        if filepath.suffix:
+            self.main_window.settings.add_to_file_history(filepath.as_posix())
+
+        # Journal changes against the opened file
+        if recovery_path is None:
+            self._reset_journal(filepath, signature)
+        else:
+            msg = "File recovered from {}.".format(recovery_path)
+            self.main_window.statusBar().showMessage(msg)
 
         return filepath
 
+    def _get_recovery_path(self, filepath):
+        """Returns path of recovery file if the user wants to recover it
+
+        Recovery is offered if the newest recovery file of filepath is newer
+        than filepath and its save journal. Otherwise, None is returned.
+
+        Parameters
+        ----------
+        * filepath: pathlib.Path
+        \tPath of pyspread file that is opened
+
+        """
+
+        if self.main_window.unit_test:
+            return
+
+        recovery_path = recovery_paths(filepath, 1)[0]
+
+        try:
+            recovery_time = recovery_path.stat().st_mtime
+            file_time = filepath.stat().st_mtime
+        except OSError:
+            return
+
+        try:
+            file_time = max(file_time, journal_path(filepath).stat().st_mtime)
+        except OSError:
+            pass
+
+        if recovery_time <= file_time:
+            return
+
+        title = "Recover file"
+        text_tpl = "An autosaved recovery file of {name} from {time} is " \
+                   "newer than the file. Open the recovery file instead?\n\n" \
+                   "Recovery file: {path}"
+        time = datetime.fromtimestamp(recovery_time).strftime("%c")
+        text = text_tpl.format(name=filepath.name, time=time,
+                               path=recovery_path)
+        choice = QMessageBox.question(self.main_window, title, text,
+                                      QMessageBox.Yes | QMessageBox.No,
+                                      QMessageBox.Yes)
+        if choice == QMessageBox.Yes:
+            return recovery_path
+
+    def recover_untitled(self):
+        """Workflow for recovering an untitled workbook of an ended session
+
+        The recovery files are moved to this session and the newest one is
+        opened as untitled workbook. Returns True if a workbook is recovered.
+
+        """
+
+        recovery_path = self._get_untitled_recovery_path()
+        if recovery_path is None:
+            return False
+
+        recovery_path = adopt_recovery_files(recovery_path)
+        if not self.filepath_open(Path.home(), recovery_path):
+            return False
+
+        self.update_main_window_title()
+        return True
+
+    def _get_untitled_recovery_path(self):
+        """Returns newest untitled recovery file if the user wants to open it
+
+        Recovery files that the user discards are removed.
+
+        """
+
+        if self.main_window.unit_test:
+            return
+
+        try:
+            recovery_path = untitled_recovery_paths()[0]
+            recovery_time = recovery_path.stat().st_mtime
+        except (IndexError, OSError):
+            return
+
+        title = "Recover untitled workbook"
+        text_tpl = "An autosaved recovery file of an untitled workbook from " \
+                   "{time} has been found. Open it?\n\n" \
+                   "Discard removes the recovery file, Cancel keeps it for " \
+                   "the next start.\n\nRecovery file: {path}"
+        time = datetime.fromtimestamp(recovery_time).strftime("%c")
+        text = text_tpl.format(time=time, path=recovery_path)
+        choice = QMessageBox.question(
+            self.main_window, title, text,
+            QMessageBox.Open | QMessageBox.Discard | QMessageBox.Cancel,
+            QMessageBox.Open)
+        if choice == QMessageBox.Open:
+            return recovery_path
+        if choice == QMessageBox.Discard:
+            discard_recovery_files(recovery_path)
+
     @handle_changed_since_save
     def file_open(self):
         """File open workflow"""
@@ -348,8 +516,20 @@ class Workflows:
 
         self.filepath_open(Path(filepath))
 
-    def sign_file(self, filepath):
-        """Signs filepath if not in :attr:`model.model.DataArray.safe_mode`"""
+    def sign_file(self, filepath, signature=None):
+        """Signs filepath if not in :attr:`model.model.DataArray.safe_mode`
+
+        Returns the signature if the file has been signed else None
+
+        Parameters
+        ----------
+        * filepath: pathlib.Path
+        \tPath of file to be signed
+        * signature: bytes, defaults to None
+        \tSignature that has been computed while saving, if None then the
+        \tsignature is computed from the file
+
+        """
 
         if self.main_window.safe_mode:
             msg = "File saved but not signed because it is unapproved."
@@ -357,13 +537,14 @@ class Workflows:
             return
 
         signature_key = self.main_window.settings.signature_key
-        try:
-            with open(filepath, "rb") as infile:
-                signature = sign(infile.read(), signature_key)
-        except OSError as err:
-            msg = "Error signing file: {}".format(err)
-            self.main_window.statusBar().showMessage(msg)
-            return
+        if signature is None:
+            try:
+                with open(filepath, "rb") as infile:
+                    signature = sign_stream(infile, signature_key)
+            except (OSError, ValueError) as err:
+                msg = "Error signing file: {}".format(err)
+                self.main_window.statusBar().showMessage(msg)
+                return
 
         if signature is None or not signature:
             msg = 'Error signing file. '
@@ -378,13 +559,141 @@ class Workflows:
         except OSError as err:
             msg_tpl = "Error signing file {filepath}: {err}."
             msg = msg_tpl.format(filepath=filepath, err=err)
+            signature = None
 
         self.main_window.statusBar().showMessage(msg)
 
+        return signature
+
+    def _replay_journal(self, filepath, signature):
+        """Applies the save journal of filepath to the grid if present
+
+        Replay stops at the first journal entry with an invalid signature
+        unless in :attr:`model.model.DataArray.safe_mode`.
+        Returns signature of the last applied journal entry, which is None if
+        not all entries have been applied.
+
+        Parameters
+        ----------
+        * filepath: pathlib.Path
+        \tPath of pyspread file that has been opened
+        * signature: bytes
+        \tSignature of pyspread file
+
+        """
+
+        code_array = self.main_window.grid.model.code_array
+        signature_key = self.main_window.settings.signature_key
+        safe_mode = self.main_window.safe_mode
+
+        try:
+            with open(journal_path(filepath), "rb") as journal_file:
+                reader = JournalReader(journal_file, code_array,
+                                       signature or b"", signature_key,
+                                       verify=not safe_mode)
+                for _ in reader:
+                    pass
+        except FileNotFoundError:
+            return signature
+        except (OSError, ValueError) as err:
+            msg = "Error reading save journal: {}".format(err)
+            self.main_window.statusBar().showMessage(msg)
+            return
+
+        if not reader.verified:
+            if not safe_mode:
+                msg = "Save journal entries with invalid signature ignored."
+                self.main_window.statusBar().showMessage(msg)
+            return
+
+        return reader.signature
+
+    def _reset_journal(self, filepath, signature):
+        """Bases future journal entries on the current state of filepath
+
+        Parameters
+        ----------
+        * filepath: pathlib.Path
+        \tPath of pyspread file
+        * signature: bytes
+        \tSignature of pyspread file including its journal, None disables
+        \tjournal saves
+
+        """
+
+        code_array = self.main_window.grid.model.code_array
+
+        self.journal = JournalWriter(code_array)
+        self.journal_filepath = filepath
+        self.journal_signature = signature
+
+    def _journal_save(self, filepath):
+        """Appends the changes since the last save to the save journal
+
+        Returns True if the changes have been saved. Otherwise, a full save is
+        required. This is the case if journal saves are switched off, the
+        file has not been opened or saved before, it is not signed or its
+        journal has reached the maximum journal size, i.e. it is compacted.
+
+        Parameters
+        ----------
+        * filepath: pathlib.Path
+        \tSave file path
+
+        """
+
+        settings = self.main_window.settings
+
+        if not settings.journal_size or self.main_window.safe_mode \
+           or self.journal is None or self.journal_filepath != filepath \
+           or self.journal_signature is None or not filepath.exists():
+            return False
+
+        path = journal_path(filepath)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        except OSError:
+            return False
+
+        if size >= settings.journal_size * 1024 * 1024:
+            return False
+
+        with self.busy_cursor():
+            try:
+                entry, signature = \
+                    self.journal.entry(self.journal_signature,
+                                       settings.signature_key)
+                if entry:
+                    with open(path, "ab") as journal_file:
+                        journal_file.write(entry)
+                        journal_file.flush()
+                        os.fsync(journal_file.fileno())
+            except (OSError, ValueError) as err:
+                msg = "Error writing save journal: {}".format(err)
+                self.main_window.statusBar().showMessage(msg)
+                return False
+
+        self.journal.snapshot()
+        self.journal_signature = signature
+
+        self.remove_recovery_files(filepath)
+
+        settings.changed_since_save = False
+        settings.last_file_input_path = filepath
+        self.update_main_window_title()
+
+        msg = "Changes saved to journal {}.".format(path.name)
+        self.main_window.statusBar().showMessage(msg)
+
+        return True
+
     def _save(self, filepath):
         """Save filepath using chosen_filter
 
         Compresses save file if filepath.suffix is `.pys`
+        Saves binary file if filepath.suffix is `.pysb`
 
         Parameters
         ----------
@@ -393,8 +702,20 @@ class Workflows:
 
         """
 
+        if self._journal_save(filepath):
+            return
+
         code_array = self.main_window.grid.model.code_array
 
+        # The signature is computed while writing so that the file is not
+        # read again for signing
+        signer = None
+        if not self.main_window.safe_mode:
+            try:
+                signer = StreamSigner(self.main_window.settings.signature_key)
+            except ValueError:
+                pass  # Error is reported when signing the file
+
         # Process events before showing the modal progress dialog
         self.main_window.application.processEvents()
 
@@ -402,15 +723,21 @@ class Workflows:
         with NamedTemporaryFile(delete=False) as tempfile:
             filename = tempfile.name
             try:
-                pys_writer = PysWriter(code_array)
+                if filepath.suffix == ".pysb":
+                    pys_writer = PysbWriter(code_array)
+                else:
+                    pys_writer = PysWriter(code_array)
                 with self.progress_dialog("File save progress",
                                           "Saving {}...".format(filepath.name),
                                           len(pys_writer)) as progress_dialog:
                     for i, line in enumerate(pys_writer):
-                        line = bytes(line, "utf-8")
+                        if filepath.suffix != ".pysb":
+                            line = bytes(line, "utf-8")
                         if filepath.suffix == ".pys":
                             line = bz2.compress(line)
                         tempfile.write(line)
+                        if signer is not None:
+                            signer.update(line)
                         progress_dialog.setValue(i)
                         self.main_window.application.processEvents()
                         if progress_dialog.wasCanceled():
@@ -432,6 +759,10 @@ class Workflows:
                                  str(err))
             return
 
+        # Recovery files of the file and of a new file are obsolete now
+        previous_filepath = self.main_window.settings.last_file_input_path
+        self.remove_recovery_files(previous_filepath, filepath)
+
         # Change the main window filepath state
         self.main_window.settings.changed_since_save = False
 
@@ -442,7 +773,21 @@ class Workflows:
         window_title = "{filename} - pyspread".format(filename=filepath.name)
         self.main_window.setWindowTitle(window_title)
 
-        self.sign_file(filepath)
+        if signer is None:
+            signature = self.sign_file(filepath)
+        else:
+            signature = self.sign_file(filepath, signer.signature())
+
+        # The saved file comprises all changes from the save journal
+        try:
+            journal_path(filepath).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            msg = "Error removing save journal: {}".format(err)
+            self.main_window.statusBar().showMessage(msg)
+            signature = None  # Disable journal saves
+        self._reset_journal(filepath, signature)
 
     def file_save(self):
         """File save workflow"""
@@ -472,8 +817,56 @@ class Workflows:
 
         self._save(fp)
 
+    def autosave(self):
+        """Autosave workflow, saves a recovery file in the background
+
+        Nothing is saved if there are no changes since the last save or if
+        the previous autosave is still running. Only a snapshot of the grid
+        is taken in the main thread.
+
+        """
+
+        settings = self.main_window.settings
+
+        if not settings.changed_since_save or not settings.autosave_files:
+            return
+
+        if self.autosave_thread is not None \
+           and self.autosave_thread.isRunning():
+            return
+
+        paths = recovery_paths(settings.last_file_input_path,
+                               settings.autosave_files)
+
+        # Recovery files of unapproved files are not signed
+        signature_key = None
+        if not self.main_window.safe_mode:
+            signature_key = settings.signature_key
+
+        code_array = snapshot(self.main_window.grid.model.code_array)
+
+        self.autosave_thread = AutosaveThread(self.main_window, code_array,
+                                              paths, signature_key)
+        self.autosave_thread.failed.connect(self.on_autosave_failed)
+        self.autosave_thread.start(QThread.LowestPriority)
+
+    def on_autosave_failed(self, message):
+        """Autosave error handler that shows the error in the statusbar"""
+
+        msg = "Autosave failed: {}".format(message)
+        self.main_window.statusBar().showMessage(msg)
+
+    def remove_recovery_files(self, *filepaths):
+        """Removes recovery files of filepaths after a running autosave"""
+
+        if self.autosave_thread is not None:
+            self.autosave_thread.wait()
+
+        for filepath in filepaths:
+            remove_recovery_files(filepath)
+
     def file_import(self):
-        """Import csv files"""
+        """Import csv and npy files"""
 
         def rawincount(filepath):
             """Counts lines of file"""
@@ -494,6 +887,10 @@ class Workflows:
                 return  # Cancel pressed
             filepath = Path(dial.file_path)
 
+        if filepath.suffix == ".npy":
+            self._npy_import(filepath)
+            return
+
         csv_dlg = CsvImportDialog(self.main_window, filepath)
 
         if not csv_dlg.exec():
@@ -514,58 +911,102 @@ class Workflows:
             self.main_window.statusBar().showMessage(str(error))
             return
 
-        command = None
+        block = []
 
+        title = "csv import progress"
+        label = "Importing {}...".format(filepath.name)
         try:
-            with open(filepath, newline='') as csvfile:
-                title = "csv import progress"
-                label = "Importing {}...".format(filepath.name)
-                with self.progress_dialog(title, label,
-                                          filelines) as progress_dialog:
-                    try:
-                        # Enter safe mode
-                        self.main_window.safe_mode = True
+            with self.progress_dialog(title, label,
+                                      filelines) as progress_dialog:
+                try:
+                    # Enter safe mode
+                    self.main_window.safe_mode = True
 
-                        reader = csv_reader(csvfile, csv_dlg.dialect,
-                                            csv_dlg.digest_types)
-                        for i, line in enumerate(reader):
-                            if row + i >= rows:
-                                break
-                            if i % 100 == 0:
-                                progress_dialog.setValue(i)
-                                self.main_window.application.processEvents()
-                                if progress_dialog.wasCanceled():
-                                    return
-
-                            for j, ele in enumerate(line):
-                                if column + j >= columns:
-                                    break
-
-                                if csv_dlg.digest_types is None:
-                                    code = str(ele)
-                                else:
-                                    code = convert(ele,
-                                                   csv_dlg.digest_types[j])
-                                index = model.index(row + i, column + j)
-                                cmd = commands.SetCellCode(code, model, index,
-                                                           description)
-
-                                if command is None:
-                                    command = cmd
-                                else:
-                                    command.mergeWith(cmd)
-                    except ValueError as error:
-                        msg = str(error)
-                        self.main_window.statusBar().showMessage(msg)
-                        return
+                    chunks = csv_digest_chunks(filepath, csv_dlg.dialect,
+                                               csv_dlg.digest_types)
+                    for chunk in chunks:
+                        for line in chunk[:rows - row - len(block)]:
+                            block.append(line[:columns - column])
+
+                        progress_dialog.setValue(len(block))
+                        self.main_window.application.processEvents()
+                        if progress_dialog.wasCanceled():
+                            chunks.close()
+                            return
 
-                    self.main_window.undo_stack.push(command)
+                        if row + len(block) >= rows:
+                            chunks.close()
+                            break
+                except ValueError as error:
+                    msg = str(error)
+                    self.main_window.statusBar().showMessage(msg)
+                    return
+
+                command = commands.SetCellCodeBlock(block, model, current,
+                                                    description)
+                self.main_window.undo_stack.push(command)
         except OSError as error:
             self.main_window.statusBar().showMessage(str(error))
             return
 
+    def _npy_import(self, filepath):
+        """Import npy file filepath at the current cell
+
+        The memory mapped array is either referenced from the current cell
+        or its values are pasted into the grid.
+
+        """
+
+        try:
+            array = load_npy(filepath)
+        except (OSError, ValueError) as error:
+            self.main_window.statusBar().showMessage(str(error))
+            return
+
+        grid = self.main_window.grid
+        model = grid.model
+        row, column, table = current = grid.current
+        rows, columns, tables = model.shape
+
+        description_tpl = "Import from npy file {} at cell {}"
+        description = description_tpl.format(filepath, current)
+
+        paste_values = False
+        if not self.main_window.unit_test:
+            title = "Import NumPy array"
+            text = "Reference the {} array {} from the current cell or " \
+                "paste its values into the grid?".format(array.shape,
+                                                         filepath.name)
+            msg_box = QMessageBox(QMessageBox.Question, title, text,
+                                  QMessageBox.Cancel, self.main_window)
+            reference_button = msg_box.addButton("Reference",
+                                                 QMessageBox.AcceptRole)
+            values_button = msg_box.addButton("Paste values",
+                                              QMessageBox.AcceptRole)
+            msg_box.setDefaultButton(reference_button)
+            msg_box.exec()
+
+            if msg_box.clickedButton() not in (reference_button,
+                                               values_button):
+                return  # Cancel pressed
+            paste_values = msg_box.clickedButton() == values_button
+
+        if paste_values:
+            try:
+                block = array_codes(array, rows - row, columns - column)
+            except ValueError as error:
+                self.main_window.statusBar().showMessage(str(error))
+                return
+            command = commands.SetCellCodeBlock(block, model, current,
+                                                description)
+        else:
+            command = commands.SetCellCode(reference_code(filepath), model,
+                                           grid.currentIndex(), description)
+
+        self.main_window.undo_stack.push(command)
+
     def file_export(self):
-        """Export csv and svg files"""
+        """Export csv, svg and npy files"""
 
         # Get filepath from user
         dial = CsvFileExportDialog(self.main_window)
@@ -580,6 +1021,11 @@ class Workflows:
             if filepath.suffix != dial.suffix:
                 filepath = filepath.with_suffix(dial.suffix)
             self._svg_export(filepath)
+        elif "NumPy" in dial.selected_filter:
+            # Extend filepath suffix if needed
+            if filepath.suffix != dial.suffix:
+                filepath = filepath.with_suffix(dial.suffix)
+            self._npy_export(filepath)
 
     def _csv_export(self, filepath):
         """Export to csv file filepath"""
@@ -593,20 +1039,74 @@ class Workflows:
         top, left, bottom, right = csv_area
         code_array = self.main_window.grid.model.code_array
         table = self.main_window.grid.table
-        csv_data = code_array[top: bottom + 1, left: right + 1, table]
 
         csv_dlg = CsvExportDialog(self.main_window, csv_area)
 
         if not csv_dlg.exec():
             return
 
+        # Process events before showing the modal progress dialog
+        self.main_window.application.processEvents()
+
+        block_rows = 100  # Rows that are evaluated between progress updates
+        title = "csv export progress"
+        label = "Exporting {}...".format(filepath.name)
+
+        # Rows are evaluated and written block-wise to a temporary file
+        completed = False
+        with NamedTemporaryFile("w", newline='', buffering=2**20,
+                                delete=False) as tempfile:
+            filename = tempfile.name
+            try:
+                writer = csv.writer(tempfile, dialect=csv_dlg.dialect)
+                with self.progress_dialog(title, label,
+                                          bottom + 1 - top) as progress_dialog:
+                    for block_top in range(top, bottom + 1, block_rows):
+                        block_bottom = min(block_top + block_rows, bottom + 1)
+                        writer.writerows(code_array[block_top:block_bottom,
+                                                    left:right + 1, table])
+
+                        progress_dialog.setValue(block_bottom - top)
+                        self.main_window.application.processEvents()
+                        if progress_dialog.wasCanceled():
+                            break
+                    else:
+                        completed = True
+            except (OSError, csv.Error) as error:
+                self.main_window.statusBar().showMessage(str(error))
+
         try:
-            with open(filepath, "w", newline='') as csvfile:
-                writer = csv.writer(csvfile, dialect=csv_dlg.dialect)
-                writer.writerows(csv_data)
+            if completed:
+                move(filename, filepath)
+            else:
+                os.remove(filename)  # Delete incomplete tmpfile
         except OSError as error:
             self.main_window.statusBar().showMessage(str(error))
 
+    def _npy_export(self, filepath):
+        """Export results to npy or npz file filepath"""
+
+        # Get area for npy export
+        area = NpyExportAreaDialog(self.main_window,
+                                   self.main_window.grid).area
+        if area is None:
+            return
+
+        top, left, bottom, right = area
+        code_array = self.main_window.grid.model.code_array
+        table = self.main_window.grid.table
+
+        results = [list(row) for row in code_array[top: bottom + 1,
+                                                   left: right + 1, table]]
+        try:
+            with open(filepath, "wb") as npy_file:
+                if filepath.suffix == ".npz":
+                    save_npz(npy_file, results, left)
+                else:
+                    save_npy(npy_file, results)
+        except (OSError, ValueError) as error:
+            self.main_window.statusBar().showMessage(str(error))
+
     def _svg_export(self, filepath):
         """Export to svg file filepath"""
 
@@ -738,6 +1238,10 @@ class Workflows:
     def file_quit(self):
         """Program exit workflow"""
 
+        # Changes have been saved or discarded
+        filepath = self.main_window.settings.last_file_input_path
+        self.remove_recovery_files(filepath)
+
         self.main_window.settings.save()
         self.main_window.application.quit()
 
@@ -839,13 +1343,13 @@ class Workflows:
 
             clipboard.setMimeData(mime_data)
 
-        elif renderer == "matplotlib" and isinstance(data,
-                                                     matplotlib_figure.Figure):
+        elif renderer == "matplotlib" and is_matplotlib_figure(data):
             # We copy and svg to the clipboard
             svg_filelike = io.BytesIO()
             png_filelike = io.BytesIO()
-            data.savefig(svg_filelike, format="svg")
-            data.savefig(png_filelike, format="png")
+            with figure_lock:
+                data.savefig(svg_filelike, format="svg")
+                data.savefig(png_filelike, format="png")
             svg_bytes = (svg_filelike.getvalue())
             png_image = QImage().fromData(png_filelike.getvalue())
             mime_data = QMimeData()